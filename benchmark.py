@@ -0,0 +1,607 @@
+"""
+End to end benchmarks for the bots against local fakes
+Serves Monday.com GraphQL and the Slack Web API from fixtures on localhost,
+either synthetic boards of any size shaped like the employee, birthday and
+jobs boards or a recorded dump of the real ones, then runs each bot's entry
+point in a fresh process, cold (empty cache) and warm (cache from the cold
+run). Every run reports wall time, peak memory and the requests it made, and
+results can be compared against a saved baseline to catch regressions.
+
+Usage:
+    python benchmark.py run [size ...]              (default 100 1000 10000)
+    python benchmark.py generate <size> <path>
+    python benchmark.py record <path>               (needs MONDAY_API_TOKEN)
+    python benchmark.py compare <results> <baseline>
+"""
+
+import os
+import re
+import sys
+import json
+import gzip
+import time
+import random
+import shutil
+import tempfile
+import threading
+import subprocess
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Configuration
+SIZES = [100, 1000, 10000]
+SEED = int(os.environ.get('BENCH_SEED', '42'))
+BOTS = {
+    'contract': ('contract_expiration_bot', 'check_contract_expirations'),
+    'jobs': ('job_alert_bot', 'get_new_jobs'),
+    'pulse': ('pulse_check', 'send_pulse_check'),
+    'coffee': ('coffee_matcher', 'create_coffee_pairings'),
+    'birthday': ('birthday_bot', 'check_celebrations'),
+    'welcome': ('welcome_bot', 'check_new_hires')
+}
+SELECTED_BOTS = [bot for bot in os.environ.get('BENCH_BOTS', ','.join(BOTS)).split(',') if bot]
+FIXTURES_PATH = os.environ.get('BENCH_FIXTURES')  # a recorded dump instead of synthetic boards
+RESULTS_PATH = os.environ.get('BENCH_OUTPUT', 'benchmark_results.json')
+BASELINE_PATH = os.environ.get('BENCH_BASELINE')
+LATENCY = float(os.environ.get('BENCH_LATENCY_MS', '0')) / 1000  # simulated network round trip per request
+TRACEMALLOC = os.environ.get('BENCH_TRACEMALLOC', '').lower() in ('1', 'true', 'yes')
+RUN_TIMEOUT = int(os.environ.get('BENCH_TIMEOUT', '1800'))
+REGRESSION_RATIO = float(os.environ.get('BENCH_REGRESSION_RATIO', '1.25'))
+MIN_REGRESSION_SECONDS = 0.05
+MIN_REGRESSION_MB = 5
+
+EMPLOYEE_BOARD_ID = "6329303796"
+BIRTHDAY_BOARD_ID = "6329174559"
+JOBS_BOARD_ID = "6239668497"
+RESULTS_USER = "Den"
+MANILA_TZ = timezone(timedelta(hours=8))
+
+FIRST_NAMES = ['Maria', 'Jose', 'Ana', 'Juan', 'Mark', 'Angela', 'John', 'Kristine', 'Paolo', 'Camille',
+               'Miguel', 'Patricia', 'Carlo', 'Bea', 'Rafael', 'Jasmine', 'Daniel', 'Nicole', 'Gabriel', 'Andrea',
+               'Joshua', 'Katrina', 'Christian', 'Denise', 'Joseph', 'Erika', 'Paul', 'Frances', 'Vincent', 'Hazel',
+               'Adrian', 'Isabel', 'Marco', 'Louise', 'Kevin', 'Trisha', 'Ryan', 'Bianca', 'Noel', 'Celine']
+LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Ocampo', 'Garcia', 'Mendoza', 'Torres', 'Tomas', 'Andrada',
+              'Castillo', 'Flores', 'Villanueva', 'Ramos', 'Castro', 'Rivera', 'Aquino', 'Navarro', 'Salazar', 'Mercado',
+              'Aguilar', 'Domingo', 'Gonzales', 'Lopez', 'Dela Cruz', 'Manalo', 'Pascual', 'Soriano', 'Valdez', 'Lim',
+              'Tan', 'Gomez', 'Santiago', 'Hernandez', 'Perez', 'Diaz', 'Morales', 'Francisco', 'Javier', 'Fernandez']
+POSITIONS = ['Software Engineer', 'Senior Software Engineer', 'QA Engineer', 'Business Analyst',
+             'Project Manager', 'DevOps Engineer', 'Data Engineer', 'UX Designer', 'Tech Lead']
+CLIENTS = ['Northwind', 'Contoso', 'Fabrikam', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark', 'Wayne', 'Acme']
+SKILLS = ['Python', 'React', 'AWS', 'Java', 'SQL', 'Go', 'Kubernetes', 'TypeScript', 'Azure', 'Salesforce']
+CONTRACT_STATUSES = ['Active', 'For Renewal', 'Renewed', 'Ending']
+ROLE_STATUSES = ['Sourcing', 'Interviewing', 'Offer', 'On Hold']
+
+
+def _date_column(col_id, day):
+    return {"id": col_id, "text": day.isoformat(), "value": json.dumps({"date": day.isoformat()})}
+
+
+def _text_column(col_id, text):
+    return {"id": col_id, "text": text, "value": json.dumps(text) if text else None}
+
+
+def _names(rng, count):
+    """count unique full names, adding middle initials once first and last names run out"""
+    names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    if count > len(names):
+        names += [f"{first} {initial}. {last}" for first in FIRST_NAMES
+                  for initial in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' for last in LAST_NAMES]
+    rng.shuffle(names)
+    return names[:count]
+
+
+def _item(item_id, name, column_values):
+    return {"id": str(item_id), "name": name, "column_values": column_values}
+
+
+def synthetic_fixtures(size, seed=SEED):
+    """Boards and Slack users for size employees, dated around today so every bot has work to do"""
+    rng = random.Random(seed)
+    today = datetime.now(MANILA_TZ).date()
+    names = _names(rng, size)
+    projects = [f"{rng.choice(CLIENTS)} {suffix}" for suffix in range(max(1, size // 15))]
+
+    groups = [("topics", "Active Employees", []), ("group_mkn1", "Active - Non billable", []),
+              ("group_mkn2", "Not Active Employees (Bench)", [])]
+    birthdays = []
+    for i, name in enumerate(names):
+        # One in 300 starts today, the rest over the last eight years
+        start = today if i % 300 == 0 else today - timedelta(days=rng.randint(1, 8 * 365))
+        contract_start = start + timedelta(days=rng.choice([0, 0, 0, 365, 730]))
+        if contract_start > today:
+            contract_start = start
+        column_values = [
+            _text_column("position", rng.choice(POSITIONS)),
+            _text_column("project", rng.choice(projects)),
+            _date_column("start_date___", start),
+            _date_column("date_mkkgvb4z", contract_start),
+            _text_column("numbers_mkm2917g", str(rng.choice([6, 12, 12, 24]))),
+            _text_column("status_mkn52y8w", rng.choice(CONTRACT_STATUSES)),
+            _text_column("email", name.lower().replace(' ', '.').replace('..', '.') + "@example.com"),
+            _text_column("long_text", "Onboarding notes. " * rng.randint(0, 20))
+        ]
+        roll = rng.random()
+        group = groups[0] if roll < 0.7 else groups[1] if roll < 0.95 else groups[2]
+        group[2].append(_item(1000000000 + i, name, column_values))
+
+        first, _, last = name.partition(' ')
+        birth = datetime(rng.randint(1970, 2002), 1, 1).date() + timedelta(days=rng.randint(0, 364))
+        birthdays.append(_item(2000000000 + i, name, [
+            _text_column("first_name", first),
+            _text_column("last_name", last),
+            _date_column("date_of_birth", birth)
+        ]))
+
+    jobs = [("topics", "Active Recruitment", []), ("group_mkm1", "On Hold", []), ("group_mkm2", "Filled", [])]
+    for i in range(size):
+        roll = rng.random()
+        group = jobs[0] if roll < 0.6 else jobs[1] if roll < 0.8 else jobs[2]
+        group[2].append(_item(3000000000 + i, f"{rng.choice(POSITIONS)} - {rng.choice(CLIENTS)}", [
+            _text_column("status7", rng.choice(ROLE_STATUSES)),
+            _text_column("dropdown", rng.choice(CLIENTS)),
+            _text_column("dropdown_mkxfm4d1", ", ".join(rng.sample(SKILLS, 5))),
+            _text_column("numbers", str(rng.randint(1, 4))),
+            _date_column("date_1_mkn7ny21", today - timedelta(days=rng.randint(0, 120)))
+        ]))
+
+    def board(columns, group_list):
+        return {
+            "columns": [{"id": col_id, "title": title, "type": col_type} for col_id, title, col_type in columns],
+            "groups": [{"id": group_id, "title": title, "items": items} for group_id, title, items in group_list]
+        }
+
+    return {
+        "boards": {
+            EMPLOYEE_BOARD_ID: board([
+                ("name", "Name", "name"), ("position", "Position", "text"), ("project", "Project", "text"),
+                ("start_date___", "Adaca Start Date", "date"), ("date_mkkgvb4z", "Contract Start Date", "date"),
+                ("numbers_mkm2917g", "Contract Duration (Months)", "numbers"),
+                ("status_mkn52y8w", "Contract Status", "status"), ("email", "Email", "email"),
+                ("long_text", "Notes", "long_text")
+            ], groups),
+            BIRTHDAY_BOARD_ID: board([
+                ("name", "Name", "name"), ("first_name", "First Name", "text"),
+                ("last_name", "Last Name", "text"), ("date_of_birth", "Date of Birth", "date")
+            ], [("topics", "Birthdays", birthdays)]),
+            JOBS_BOARD_ID: board([
+                ("name", "Name", "name"), ("status7", "Role Status", "status"), ("dropdown", "Client", "dropdown"),
+                ("dropdown_mkxfm4d1", "Top 5 Skills", "dropdown"), ("numbers", "Headcount", "numbers"),
+                ("date_1_mkn7ny21", "Job Listed", "date")
+            ], jobs)
+        },
+        "slack_users": [
+            {"id": f"U{i:07d}", "name": name.lower().replace(' ', '.'), "real_name": name,
+             "profile": {"display_name": "", "real_name": name}}
+            for i, name in enumerate(names + [RESULTS_USER])
+        ] + [{"id": "UBENCHBOT", "name": "bots", "is_bot": True, "profile": {}}]
+    }
+
+
+def load_fixtures(path):
+    """Read a fixture file written by generate or record"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_fixtures(fixtures, path):
+    """Write fixtures as JSON, gzipped when the path ends in .gz"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        json.dump(fixtures, f, separators=(',', ':'))
+
+
+def record_fixtures():
+    """Dump the live boards (and Slack users, when a Slack token is set) into the fixture format"""
+    import monday_client
+    from column_spec import get_board_columns
+
+    boards = {}
+    for board_id in (EMPLOYEE_BOARD_ID, BIRTHDAY_BOARD_ID, JOBS_BOARD_ID):
+        print(f"📼 Recording board {board_id}...")
+        groups = {group['id']: {"id": group['id'], "title": group['title'], "items": []}
+                  for group in monday_client.get_board_groups(board_id)}
+        for group, item in monday_client.iter_group_items(board_id, "id\nname\ncolumn_values { id text value }"):
+            groups[group['id']]['items'].append(item)
+        boards[board_id] = {"columns": get_board_columns(board_id, ttl=0), "groups": list(groups.values())}
+
+    slack_users = []
+    if os.environ.get('SLACK_BOT_TOKEN'):
+        from slack_directory import iter_slack_members
+        print("📼 Recording Slack users...")
+        slack_users = list(iter_slack_members())
+    return {"boards": boards, "slack_users": slack_users}
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    """Keep-alive request handler shared by both fakes, counts every request by operation"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _count(self, operation):
+        with self.server.lock:
+            self.server.counts[operation] += 1
+        if LATENCY:
+            time.sleep(LATENCY)
+
+    def _send(self, body, status=200):
+        payload = json.dumps(body, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+
+class FakeMondayHandler(FakeAPIHandler):
+    """Answers the GraphQL queries the bots make, paging items 'board|group|offset' cursors"""
+
+    def do_POST(self):
+        body = self._body()
+        query = body.get('query', '')
+        variables = body.get('variables') or {}
+        boards = self.server.fixtures['boards']
+        match = re.search(r'boards\(ids: (\d+)\)', query)
+        board = boards.get(match.group(1)) if match else None
+        limit = variables.get('limit', 25)
+
+        if 'next_items_page' in query:
+            self._count('next_items_page')
+            board_id, group_id, offset = variables['cursor'].split('|')
+            items = self.server.items(board_id, group_id)
+            page = self._page(items, int(offset), limit, query, board_id, group_id)
+            return self._send({"data": {"next_items_page": page}})
+
+        if board is None and 'items(ids' in query:
+            self._count('items')
+            wanted = {str(item_id) for item_id in variables.get('ids') or []}
+            found = []
+            for board_data in boards.values():
+                for group in board_data['groups']:
+                    for item in group['items']:
+                        if item['id'] in wanted:
+                            found.append(dict(self._project(item, query), state="active",
+                                              group={"id": group['id'], "title": group['title']}))
+            return self._send({"data": {"items": found}})
+
+        if board is None:
+            return self._send({"errors": [{"message": "Board not found"}]})
+        board_id = match.group(1)
+
+        if 'activity_logs' in query:
+            self._count('activity_logs')
+            return self._send({"data": {"boards": [{"activity_logs": []}]}})
+
+        if 'items_page' in query and 'groups' in query:
+            self._count('group_items_page')
+            group_match = re.search(r'groups\(ids: (\[.*?\])\)', query)
+            group_ids = json.loads(group_match.group(1)) if group_match else None
+            groups = [{"id": group['id'], "title": group['title'],
+                       "items_page": self._page(group['items'], 0, limit, query, board_id, group['id'])}
+                      for group in board['groups'] if group_ids is None or group['id'] in group_ids]
+            return self._send({"data": {"boards": [{"groups": groups}]}})
+
+        if 'items_page' in query:
+            self._count('items_page')
+            items = self.server.items(board_id, '*')
+            return self._send({"data": {"boards": [{"items_page": self._page(items, 0, limit, query, board_id, '*')}]}})
+
+        if 'groups' in query:
+            self._count('groups')
+            groups = [{"id": group['id'], "title": group['title']} for group in board['groups']]
+            return self._send({"data": {"boards": [{"groups": groups}]}})
+
+        if 'columns' in query:
+            self._count('columns')
+            return self._send({"data": {"boards": [{"columns": board['columns']}]}})
+
+        self._count('unknown')
+        self._send({"errors": [{"message": "Query not supported by the benchmark fake"}]})
+
+    def _page(self, items, offset, limit, query, board_id, group_id):
+        end = offset + limit
+        return {
+            "cursor": f"{board_id}|{group_id}|{end}" if end < len(items) else None,
+            "items": [self._project(item, query) for item in items[offset:end]]
+        }
+
+    def _project(self, item, query):
+        """Only the columns a column_values(ids: [...]) projection asked for, none if it asked for no columns"""
+        if 'column_values' not in query:
+            return {"id": item['id'], "name": item['name']}
+        match = re.search(r'column_values\(ids: (\[.*?\])\)', query)
+        if not match:
+            return item
+        wanted = set(json.loads(match.group(1)))
+        return {"id": item['id'], "name": item['name'],
+                "column_values": [col for col in item['column_values'] if col['id'] in wanted]}
+
+
+class FakeSlackHandler(FakeAPIHandler):
+    """Answers users.list, conversations.open, conversations.history and chat.postMessage"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        method = url.path.rsplit('/', 1)[-1]
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self._count(method)
+
+        if method == 'users.list':
+            users = self.server.fixtures['slack_users']
+            start = int(params.get('cursor') or 0)
+            end = start + int(params.get('limit') or 200)
+            return self._send({"ok": True, "members": users[start:end],
+                               "response_metadata": {"next_cursor": str(end) if end < len(users) else ""}})
+        if method == 'conversations.history':
+            return self._send({"ok": True, "messages": [], "response_metadata": {"next_cursor": ""}})
+        self._send({"ok": True})
+
+    def do_POST(self):
+        method = urlparse(self.path).path.rsplit('/', 1)[-1]
+        body = self._body()
+        self._count(method)
+
+        if method == 'conversations.open':
+            return self._send({"ok": True, "channel": {"id": f"D{body.get('users', '')}"}})
+        if method == 'chat.postMessage':
+            with self.server.lock:
+                self.server.sequence += 1
+                ts = f"{time.time():.0f}.{self.server.sequence:06d}"
+            return self._send({"ok": True, "channel": body.get('channel'), "ts": ts})
+        self._send({"ok": True})
+
+
+class FakeServer(ThreadingHTTPServer):
+    """Threaded local server holding the current fixtures and request counts"""
+
+    daemon_threads = True
+
+    def __init__(self, handler, fixtures=None):
+        super().__init__(('127.0.0.1', 0), handler)
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.sequence = 0
+        self.load(fixtures or {"boards": {}, "slack_users": []})
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def host(self):
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    def load(self, fixtures):
+        """Serve a new set of fixtures"""
+        self.fixtures = fixtures
+        self._items = {}
+
+    def items(self, board_id, group_id):
+        """Items of one group, or of the whole board for '*', in board order"""
+        key = (board_id, group_id)
+        if key not in self._items:
+            groups = self.fixtures['boards'][board_id]['groups']
+            self._items[key] = [item for group in groups if group_id in ('*', group['id']) for item in group['items']]
+        return self._items[key]
+
+    def snapshot(self):
+        with self.lock:
+            return Counter(self.counts)
+
+
+def _peak_rss_mb():
+    """Peak resident memory of this process in MB"""
+    # ru_maxrss survives exec on Linux, so a child would inherit the parent's peak, VmHWM does not
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+
+
+def run_bot(bot, monday_host, slack_host):
+    """Run one bot's entry point in this process against the fakes, returns its measurements"""
+    import http.client
+    import importlib
+    import tracemalloc
+    import bot_log
+    import monday_client
+    import slack_client
+
+    monday_client.MONDAY_API_HOST = monday_host
+    monday_client.CONNECTION_CLASS = http.client.HTTPConnection
+    slack_client.SLACK_API_HOST = slack_host
+    slack_client.CONNECTION_CLASS = http.client.HTTPConnection
+
+    module_name, function_name = BOTS[bot]
+    entry_point = getattr(importlib.import_module(module_name), function_name)
+
+    if TRACEMALLOC:
+        tracemalloc.start()
+    rss_before = _peak_rss_mb()
+    error = None
+    stdout = sys.stdout
+    started = time.perf_counter()
+    try:
+        with open(os.devnull, 'w') as sys.stdout:
+            try:
+                entry_point()
+            finally:
+                bot_log.report_sampled()  # here rather than at exit, the last stdout line is the result
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        sys.stdout = stdout
+    seconds = time.perf_counter() - started
+
+    rss_after = _peak_rss_mb()
+    result = {
+        'seconds': round(seconds, 4),
+        'peak_rss_mb': round(rss_after, 1),
+        'rss_growth_mb': round(rss_after - rss_before, 1),
+        'error': error
+    }
+    if TRACEMALLOC:
+        result['peak_traced_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+    return result
+
+
+def _run_in_process(bot, cache_dir, monday, slack):
+    """Run a bot in a fresh interpreter, returns its measurements plus the requests it made"""
+    env = dict(os.environ)
+    env.pop('RUN_LEDGER_PATH', None)
+    env.update({
+        'BOARD_CACHE_DIR': cache_dir,
+        'MONDAY_API_TOKEN': 'benchmark',
+        'SLACK_BOT_TOKEN': 'xoxb-benchmark',
+        'FORCE_RESEND': '1'  # warm runs post again instead of skipping everything in the ledger
+    })
+    # Real send rates would make a 10k run take minutes of sleeping, override with SLACK_SEND_RATE
+    # and SLACK_CHANNEL_RATE
+    env.setdefault('SLACK_SEND_RATE', '1000')
+    env.setdefault('SLACK_SEND_BURST', '50')
+    env.setdefault('SLACK_CHANNEL_RATE', '1000')
+
+    monday_before, slack_before = monday.snapshot(), slack.snapshot()
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '_run', bot, monday.host, slack.host],
+        env=env, capture_output=True, text=True, timeout=RUN_TIMEOUT,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    try:
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        result = {'seconds': None, 'error': (process.stderr.strip().splitlines() or ['no output'])[-1]}
+
+    monday_requests = monday.snapshot() - monday_before
+    slack_requests = slack.snapshot() - slack_before
+    result['monday_requests'] = sum(monday_requests.values())
+    result['slack_requests'] = sum(slack_requests.values())
+    result['requests'] = dict(monday_requests + slack_requests)
+    return result
+
+
+def run_benchmarks(sizes, bots=None):
+    """Benchmark every selected bot at every size, cold then warm, returns {size: {bot: {run: result}}}"""
+    bots = bots or SELECTED_BOTS
+    monday = FakeServer(FakeMondayHandler)
+    slack = FakeServer(FakeSlackHandler)
+    recorded = load_fixtures(FIXTURES_PATH) if FIXTURES_PATH else None
+    results = {}
+
+    try:
+        for size in sizes:
+            fixtures = recorded or synthetic_fixtures(size)
+            monday.load(fixtures)
+            slack.load(fixtures)
+            employees = sum(len(group['items']) for group in fixtures['boards'][EMPLOYEE_BOARD_ID]['groups'])
+            label = 'recorded' if recorded else str(size)
+            print(f"\n📏 {label} boards ({employees} employees)")
+            print(f"  {'bot':<10}{'run':<6}{'seconds':>9}{'peak MB':>9}{'monday':>8}{'slack':>7}")
+
+            results[label] = {}
+            for bot in bots:
+                cache_dir = tempfile.mkdtemp(prefix=f"bench_{bot}_")
+                try:
+                    runs = {}
+                    for run in ('cold', 'warm'):
+                        result = _run_in_process(bot, cache_dir, monday, slack)
+                        runs[run] = result
+                        seconds = f"{result['seconds']:.3f}" if result.get('seconds') is not None else '-'
+                        memory = result.get('peak_traced_mb', result.get('peak_rss_mb', '-'))
+                        print(f"  {bot:<10}{run:<6}{seconds:>9}{memory:>9}{result['monday_requests']:>8}"
+                              f"{result['slack_requests']:>7}")
+                        if result.get('error'):
+                            print(f"    ❌ {result['error']}")
+                    results[label][bot] = runs
+                finally:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+            if recorded:
+                break
+    finally:
+        monday.shutdown()
+        slack.shutdown()
+    return results
+
+
+def compare(results, baseline):
+    """Print runs that got slower, heavier or chattier than the baseline, returns how many did"""
+    regressions = 0
+    for size, bots in results.items():
+        for bot, runs in bots.items():
+            for run, result in runs.items():
+                before = baseline.get(size, {}).get(bot, {}).get(run)
+                if not before or result.get('error'):
+                    continue
+                label = f"{size}/{bot}/{run}"
+                problems = []
+                if before.get('seconds') and result.get('seconds') is not None and \
+                        result['seconds'] > before['seconds'] * REGRESSION_RATIO and \
+                        result['seconds'] - before['seconds'] > MIN_REGRESSION_SECONDS:
+                    problems.append(f"{before['seconds']:.3f}s -> {result['seconds']:.3f}s")
+                memory_key = 'peak_traced_mb' if 'peak_traced_mb' in result else 'peak_rss_mb'
+                if before.get(memory_key) and result.get(memory_key) and \
+                        result[memory_key] > before[memory_key] * REGRESSION_RATIO and \
+                        result[memory_key] - before[memory_key] > MIN_REGRESSION_MB:
+                    problems.append(f"{before[memory_key]} MB -> {result[memory_key]} MB")
+                for key in ('monday_requests', 'slack_requests'):
+                    if key in before and result.get(key, 0) > before[key]:
+                        problems.append(f"{key.replace('_', ' ')} {before[key]} -> {result[key]}")
+                if problems:
+                    regressions += 1
+                    print(f"⚠️ {label}: {', '.join(problems)}")
+    if not regressions:
+        print("✅ No regressions against the baseline")
+    return regressions
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else 'run'
+
+    if command == 'run':
+        sizes = [int(size) for size in argv[2:]] or SIZES
+        unknown = [bot for bot in SELECTED_BOTS if bot not in BOTS]
+        if unknown:
+            print(f"❌ Unknown bot(s): {', '.join(unknown)} (choose from {', '.join(BOTS)})")
+            return 1
+        results = run_benchmarks(sizes)
+        with open(RESULTS_PATH, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {RESULTS_PATH}")
+        if BASELINE_PATH:
+            with open(BASELINE_PATH, 'r') as f:
+                return 1 if compare(results, json.load(f)) else 0
+    elif command == 'generate' and len(argv) > 3:
+        save_fixtures(synthetic_fixtures(int(argv[2])), argv[3])
+        print(f"💾 Wrote {argv[2]} employee fixtures to {argv[3]}")
+    elif command == 'record' and len(argv) > 2:
+        save_fixtures(record_fixtures(), argv[2])
+        print(f"💾 Recorded fixtures to {argv[2]}")
+    elif command == 'compare' and len(argv) > 3:
+        with open(argv[2], 'r') as f:
+            results = json.load(f)
+        with open(argv[3], 'r') as f:
+            baseline = json.load(f)
+        return 1 if compare(results, baseline) else 0
+    elif command == '_run' and len(argv) > 4:
+        print(json.dumps(run_bot(argv[2], argv[3], argv[4])))
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,16 +1,42 @@
+"""
+Birthday and work anniversary bot
+Posts today's birthdays and work anniversaries, looked up in the calendar
+index built from the birthday and employee boards.
+
+Usage:
+    python birthday_bot.py                      (post today's celebrations)
+    python birthday_bot.py upcoming [days]      (list the next days' celebrations, default 7)
+"""
+
 import os
-import json
-import urllib.request
-import urllib.parse
-from datetime import datetime, timezone, timedelta
+import sys
+import time
 import random
+from datetime import datetime, timezone, timedelta
+
+from board_cache import CACHE_TTL, resolve_groups, fields_key
+from board_sync import sync_board
+from employees import EmployeeSchema
+from calendar_index import CalendarIndex, INDEX_PATH
+from slack_messages import post_coalesced
+from run_ledger import RunLedger
+from instrumentation import run_report, span
 
 # Configuration
-MONDAY_API_TOKEN = os.environ.get('MONDAY_API_TOKEN')
-SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
 BIRTHDAY_BOARD_ID = "6329174559"
 ANNIVERSARY_BOARD_ID = "6329303796"
 SLACK_CHANNEL = "celebrations"
+CALENDAR_TTL = int(os.environ.get('CALENDAR_TTL', str(CACHE_TTL)))  # how long the index is trusted without syncing
+
+# Columns read from each board
+BIRTHDAY_COLUMNS = {
+    'first_name': lambda col: 'first' in col['id'].lower(),
+    'last_name': lambda col: 'last' in col['id'].lower(),
+    'date_of_birth': lambda col: 'date_of_birth' in col['id'].lower()
+}
+ANNIVERSARY_COLUMNS = {
+    'start_date': lambda col: ('adaca' in col['id'].lower() or 'start' in col['id'].lower()) and 'date' in col['id'].lower()
+}
 
 # Birthday message templates
 BIRTHDAY_MESSAGES = [
@@ -30,49 +56,6 @@ ANNIVERSARY_MESSAGES = [
     "🎊 *Cheers to {name}!* 🎉\n\n{years} with Adaca and still going strong! We appreciate all your contributions to the team. Here's to the journey ahead! 🚀"
 ]
 
-def query_monday(query):
-    """Query Monday.com API"""
-    url = "https://api.monday.com/v2"
-    headers = {
-        "Authorization": MONDAY_API_TOKEN,
-        "Content-Type": "application/json"
-    }
-    data = json.dumps({"query": query}).encode('utf-8')
-    
-    req = urllib.request.Request(url, data=data, headers=headers)
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read().decode('utf-8'))
-
-def post_to_slack(message):
-    """Post message to Slack"""
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "channel": SLACK_CHANNEL,
-        "text": message,
-        "unfurl_links": False
-    }
-    
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode('utf-8'),
-        headers=headers
-    )
-    
-    with urllib.request.urlopen(req) as response:
-        result = json.loads(response.read().decode('utf-8'))
-        return result.get("ok")
-
-def calculate_years(start_date, today):
-    """Calculate years of service"""
-    years = today.year - start_date.year
-    if (today.month, today.day) < (start_date.month, start_date.day):
-        years -= 1
-    return years
-
 def format_years(years):
     """Format years text"""
     if years == 1:
@@ -80,6 +63,77 @@ def format_years(years):
     else:
         return f"{years} years"
 
+def _source(replica, group_ids=None):
+    """Identifies the replica version and groups an index was built from"""
+    return [fields_key(replica['fields'], group_ids), replica.get('changed_at')]
+
+def get_celebration_calendar(ttl=CALENDAR_TTL, path=INDEX_PATH):
+    """Calendar of birthdays and work anniversaries, rebuilt only when one of the boards changed"""
+    cached = CalendarIndex.load(path)
+    if cached and ttl > 0 and time.time() - cached.checked_at < ttl:
+        print(f"📦 Using cached celebration calendar ({len(cached)} celebrations)")
+        return cached
+    
+    # Birthday Board
+    with span('fetch', board=BIRTHDAY_BOARD_ID):
+        birthday_schema = EmployeeSchema.for_board(BIRTHDAY_BOARD_ID, BIRTHDAY_COLUMNS, date_fields=('date_of_birth',))
+        birthdays = sync_board(BIRTHDAY_BOARD_ID)
+    
+    # Anniversary Board - Only Active Employees group
+    with span('fetch', board=ANNIVERSARY_BOARD_ID):
+        group_ids = resolve_groups(
+            ANNIVERSARY_BOARD_ID,
+            lambda title: 'active' in title.lower() and 'employee' in title.lower()
+        )
+        anniversary_schema = EmployeeSchema.for_board(ANNIVERSARY_BOARD_ID, ANNIVERSARY_COLUMNS, date_fields=('start_date',))
+        anniversaries = sync_board(ANNIVERSARY_BOARD_ID)
+    
+    sources = {BIRTHDAY_BOARD_ID: _source(birthdays), ANNIVERSARY_BOARD_ID: _source(anniversaries, group_ids)}
+    if cached and cached.sources == sources:
+        # Neither board changed: keep the index and just mark it as checked
+        cached.checked_at = time.time()
+        cached.save(path)
+        print(f"✅ Celebration calendar unchanged ({len(cached)} celebrations)")
+        return cached
+    
+    entries = []
+    for _, _, item in birthdays['items'].values():
+        person = birthday_schema.parse(item)
+        full_name = f"{person['first_name']} {person['last_name']}".strip()
+        birth_date = person.date('date_of_birth')
+        if full_name and birth_date:
+            entries.append(('birthday', full_name, birth_date))
+    
+    for group_id, group_title, item in anniversaries['items'].values():
+        if group_id not in group_ids:
+            continue
+        emp = anniversary_schema.parse(item, {'id': group_id, 'title': group_title})
+        hire_date = emp.date('start_date')
+        if emp.name and hire_date:
+            entries.append(('anniversary', emp.name, hire_date))
+    
+    calendar = CalendarIndex.build(entries, sources)
+    calendar.save(path)
+    print(f"✅ Indexed {len(calendar)} birthdays and anniversaries")
+    return calendar
+
+def print_upcoming(days=7):
+    """Print the celebrations in the next days, starting today"""
+    manila_tz = timezone(timedelta(hours=8))
+    today = datetime.now(manila_tz).date()
+    upcoming = get_celebration_calendar().between(today, days)
+    
+    print(f"📅 Celebrations from {today.strftime('%B %d')} over the next {days} day(s):")
+    for day, celebrations in upcoming:
+        print(f"\n{day.strftime('%A, %B %d')}")
+        for name, _ in celebrations.get('birthday', []):
+            print(f"  🎂 {name}")
+        for name, start_year in celebrations.get('anniversary', []):
+            if day.year > start_year:
+                print(f"  🎊 {name} ({format_years(day.year - start_year)})")
+    if not upcoming:
+        print("ℹ️ No celebrations coming up")
+
 def check_celebrations():
     """Check for birthdays and work anniversaries today"""
     print("🎉 Checking for celebrations today...")
@@ -91,163 +145,61 @@ def check_celebrations():
     today_day = today.day
     print(f"Today is: {today_month}/{today_day}/{today.year} (Manila time)")
     
-    birthdays_today = []
+    celebrations = get_celebration_calendar().on(today.date())
+    birthdays_today = [name for name, _ in celebrations.get('birthday', [])]
     anniversaries_today = []
+    for name, start_year in celebrations.get('anniversary', []):
+        years = today.year - start_year
+        if years > 0:
+            anniversaries_today.append({
+                'name': name,
+                'years': years
+            })
     
-    # Check Birthday Board
-    birthday_query = f'''
-    {{
-      boards(ids: {BIRTHDAY_BOARD_ID}) {{
-        items_page {{
-          items {{
-            name
-            column_values {{
-              id
-              text
-              value
-            }}
-          }}
-        }}
-      }}
-    }}
-    '''
-    
-    birthday_result = query_monday(birthday_query)
-    
-    if birthday_result.get('data'):
-        items = birthday_result['data']['boards'][0]['items_page']['items']
-        
-        for item in items:
-            first_name = ""
-            last_name = ""
-            dob = ""
-            
-            for col in item['column_values']:
-                col_id = col.get('id', '')
-                col_text = (col.get('text') or '').strip()
-                col_value = col.get('value') or ''
-                
-                if 'first' in col_id.lower():
-                    first_name = col_text
-                elif 'last' in col_id.lower():
-                    last_name = col_text
-                elif 'date_of_birth' in col_id.lower():
-                    dob = col_text
-                    if not dob and col_value:
-                        try:
-                            value_obj = json.loads(col_value)
-                            if 'date' in value_obj:
-                                dob = value_obj['date']
-                        except:
-                            pass
-            
-            full_name = f"{first_name} {last_name}".strip()
-            
-            if dob and full_name:
-                try:
-                    for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%m-%d-%Y', '%m/%d/%y']:
-                        try:
-                            birth_date = datetime.strptime(dob, fmt)
-                            if birth_date.month == today_month and birth_date.day == today_day:
-                                birthdays_today.append(full_name)
-                            break
-                        except ValueError:
-                            continue
-                except:
-                    pass
-    
-    # Check Anniversary Board - Only Active Employees group
-    anniversary_query = f'''
-    {{
-      boards(ids: {ANNIVERSARY_BOARD_ID}) {{
-        groups {{
-          id
-          title
-          items_page {{
-            items {{
-              name
-              column_values {{
-                id
-                text
-                value
-              }}
-            }}
-          }}
-        }}
-      }}
-    }}
-    '''
-    
-    anniversary_result = query_monday(anniversary_query)
-    
-    if anniversary_result.get('data') and anniversary_result['data'].get('boards'):
-        groups = anniversary_result['data']['boards'][0]['groups']
-        
-        for group in groups:
-            group_title = group.get('title', '')
-            
-            if 'active' in group_title.lower() and 'employee' in group_title.lower():
-                items = group['items_page']['items']
-                
-                for item in items:
-                    name = item.get('name', '').strip()
-                    start_date = ""
-                    
-                    for col in item['column_values']:
-                        col_id = col.get('id', '')
-                        col_text = (col.get('text') or '').strip()
-                        col_value = col.get('value') or ''
-                        
-                        if ('adaca' in col_id.lower() or 'start' in col_id.lower()) and 'date' in col_id.lower():
-                            start_date = col_text
-                            if not start_date and col_value:
-                                try:
-                                    value_obj = json.loads(col_value)
-                                    if 'date' in value_obj:
-                                        start_date = value_obj['date']
-                                except:
-                                    pass
-                    
-                    if start_date and name:
-                        try:
-                            for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%m-%d-%Y', '%m/%d/%y']:
-                                try:
-                                    hire_date = datetime.strptime(start_date, fmt)
-                                    if hire_date.month == today_month and hire_date.day == today_day:
-                                        years = calculate_years(hire_date, today)
-                                        if years > 0:
-                                            anniversaries_today.append({
-                                                'name': name,
-                                                'years': years
-                                            })
-                                    break
-                                except ValueError:
-                                    continue
-                        except:
-                            pass
-    
-    # Post birthdays to Slack
+    # Build one message per celebration
+    messages = []
+    labels = []
+    keys = []
     if birthdays_today:
         print(f"🎂 Found {len(birthdays_today)} birthday(s) today!")
         for name in birthdays_today:
-            message = random.choice(BIRTHDAY_MESSAGES).format(name=name)
-            if post_to_slack(message):
-                print(f"✅ Posted birthday message for {name}")
+            messages.append(random.choice(BIRTHDAY_MESSAGES).format(name=name))
+            labels.append(f"birthday message for {name}")
+            keys.append(f"birthday:{name}")
     
-    # Post anniversaries to Slack
     if anniversaries_today:
         print(f"🎊 Found {len(anniversaries_today)} work anniversary/anniversaries today!")
         for person in anniversaries_today:
             years_text = format_years(person['years'])
-            message = random.choice(ANNIVERSARY_MESSAGES).format(
+            messages.append(random.choice(ANNIVERSARY_MESSAGES).format(
                 name=person['name'],
                 years=years_text
-            )
-            if post_to_slack(message):
-                print(f"✅ Posted anniversary message for {person['name']}")
+            ))
+            labels.append(f"anniversary message for {person['name']}")
+            keys.append(f"anniversary:{person['name']}")
+    
+    # Post to Slack, one post per celebration unless coalescing is on, skipping any already posted today
+    title = f"🎉 Celebrations for {today.strftime('%B %d')}"
+    ledger = RunLedger('birthday_bot')
+    for label, result in zip(labels, post_coalesced(SLACK_CHANNEL, title, messages, ledger=ledger, keys=keys)):
+        if result and result.attempts:
+            print(f"✅ Posted {label}")
     
     if not birthdays_today and not anniversaries_today:
         print("ℹ️ No celebrations today")
 
+def main(argv):
+    command = argv[1] if len(argv) > 1 else 'check'
+    
+    if command == 'check':
+        with run_report('birthday_bot'):
+            check_celebrations()
+    elif command == 'upcoming':
+        print_upcoming(int(argv[2]) if len(argv) > 2 else 7)
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
 if __name__ == "__main__":
-    check_celebrations()
+    sys.exit(main(sys.argv))
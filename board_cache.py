@@ -0,0 +1,239 @@
+"""
+Local snapshot cache for Monday.com boards
+Bots that run on the same morning read the same board, so the first run
+streams it from Monday.com into a compact gzip file and later runs inside the
+TTL read that file instead of querying again. A snapshot holds every column
+of the items in a set of groups and is keyed by board and groups only; each
+bot's own columns are picked out locally, so bots asking for different
+columns of the same groups share it.
+
+In GitHub Actions every workflow restores and saves one shared cache of the
+snapshots, board_sync replicas and Slack directory (each bot's own state is
+cached per workflow). Workflows that start together can't see each other's
+snapshots, later ones within the TTL can, and replicas are synced
+incrementally however old they are.
+
+Usage:
+    python board_cache.py list
+    python board_cache.py invalidate [board_id]
+"""
+
+import os
+import re
+import sys
+import json
+import gzip
+import time
+import hashlib
+import threading
+
+import monday_client
+
+# Configuration
+CACHE_DIR = os.environ.get('BOARD_CACHE_DIR', '.board_cache')
+CACHE_TTL = int(os.environ.get('BOARD_CACHE_TTL', str(6 * 60 * 60)))  # 6 hours
+
+# Every column of an item is stored, with the column fields any bot reads
+COLUMN_FIELDS = "id text value type"
+_COLUMN_VALUES_RE = re.compile(r'column_values\s*(?:\((?P<args>[^)]*)\))?\s*\{[^}]*\}')
+_COLUMN_IDS_RE = re.compile(r'ids:\s*(\[[^\]]*\])')
+
+
+def fields_key(item_fields, group_ids=None):
+    """Stable key for a set of requested item fields and groups"""
+    normalized = ' '.join(item_fields.split())
+    if group_ids is not None:
+        normalized += ' groups:' + ','.join(sorted(group_ids))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+
+def split_fields(item_fields):
+    """Split an item selection into the column ids it projects (None for every column) and the fields
+    it needs besides id, name and column values, e.g. assets, which become part of what is stored"""
+    column_ids = frozenset()
+    match = _COLUMN_VALUES_RE.search(item_fields)
+    if match:
+        ids = _COLUMN_IDS_RE.search(match.group('args') or '')
+        column_ids = frozenset(json.loads(ids.group(1))) if ids else None
+        item_fields = item_fields[:match.start()] + item_fields[match.end():]
+
+    extra = []
+    depth = 0
+    for token in re.findall(r'[{}]|[^\s{}]+', item_fields):
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+        elif depth == 0 and token in ('id', 'name'):
+            continue
+        extra.append(token)
+    return column_ids, ' '.join(extra)
+
+
+def stored_fields(extra_fields=''):
+    """Item selection that is stored: id, name, every column and any extra fields"""
+    return f"id\nname\n{extra_fields}\ncolumn_values {{ {COLUMN_FIELDS} }}"
+
+
+def project(item, column_ids):
+    """A stored item with only the given columns (None keeps them all)"""
+    if column_ids is None:
+        return item
+    projected = dict(item)
+    projected['column_values'] = [col for col in item.get('column_values') or () if col.get('id') in column_ids]
+    return projected
+
+
+def snapshot_path(board_id, extra_fields='', kind='groups', group_ids=None):
+    """Path of the snapshot file for a board and groups (and extra fields, when a bot needs any)"""
+    return os.path.join(CACHE_DIR, f"board_{board_id}_{kind}_{fields_key(extra_fields, group_ids)}.jsonl.gz")
+
+
+def temp_path(path):
+    """Private temporary path to write a file before moving it into place, unique per process and thread"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _is_fresh(path, ttl):
+    """Check if a snapshot exists and is younger than the TTL"""
+    try:
+        return ttl > 0 and time.time() - os.path.getmtime(path) < ttl
+    except OSError:
+        return False
+
+
+def _read_snapshot(path):
+    """Yield records from a snapshot file, skipping the header line"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        next(f, None)
+        for line in f:
+            yield json.loads(line)
+
+
+def _write_through(path, header, records):
+    """Yield records while writing them to a snapshot, publishing it only once complete"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = temp_path(path)
+    completed = False
+    try:
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=5) as f:
+            f.write(json.dumps(header, separators=(',', ':')) + "\n")
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')) + "\n")
+                yield record
+        completed = True
+        os.replace(tmp_path, path)
+    finally:
+        if not completed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def is_active_group(title):
+    """Include both "Active Employees" and "Active - Non billable" groups, exclude "Not Active" groups"""
+    title = title.lower()
+    return ('active' in title and 'employee' in title and 'not' not in title) or \
+           ('active' in title and 'non' in title and 'billable' in title)
+
+
+def resolve_groups(board_id, wanted, ttl=CACHE_TTL):
+    """Ids of the board's groups whose title passes the wanted(title) check, with the title to id map cached on disk"""
+    path = os.path.join(CACHE_DIR, f"board_{board_id}_groupmap.json")
+    groups = None
+    if _is_fresh(path, ttl):
+        try:
+            with open(path, 'r') as f:
+                groups = json.load(f)
+        except (OSError, ValueError):
+            groups = None
+
+    if groups is None:
+        groups = {group['title']: group['id'] for group in monday_client.get_board_groups(board_id)}
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = temp_path(path)
+        with open(tmp_path, 'w') as f:
+            json.dump(groups, f)
+        os.replace(tmp_path, path)
+
+    group_ids = [group_id for title, group_id in groups.items() if wanted(title)]
+    if not group_ids:
+        print(f"⚠️ No matching group on board {board_id}. Available groups: {list(groups)}")
+    return group_ids
+
+
+def iter_group_items(board_id, item_fields, ttl=CACHE_TTL, group_ids=None):
+    """Yield (group, item) for every item in the selected groups (default all) with the columns item_fields
+    projects, from the snapshot when it is fresh"""
+    column_ids, extra_fields = split_fields(item_fields)
+    path = snapshot_path(board_id, extra_fields, 'groups', group_ids)
+
+    if _is_fresh(path, ttl):
+        print(f"📦 Using cached snapshot of board {board_id}")
+        records = _read_snapshot(path)
+    else:
+        fields = stored_fields(extra_fields)
+        header = {'board_id': str(board_id), 'fields': ' '.join(fields.split()),
+                  'group_ids': group_ids, 'fetched_at': time.time()}
+        records = _write_through(path, header, (
+            [group['id'], group['title'], item]
+            for group, item in monday_client.iter_group_items(board_id, fields, group_ids=group_ids)
+        ))
+    for group_id, group_title, item in records:
+        yield {'id': group_id, 'title': group_title}, project(item, column_ids)
+
+
+def iter_board_items(board_id, item_fields, ttl=CACHE_TTL):
+    """Yield every item on a board with the columns item_fields projects, from the snapshot when it is fresh"""
+    column_ids, extra_fields = split_fields(item_fields)
+    path = snapshot_path(board_id, extra_fields, 'items')
+
+    if _is_fresh(path, ttl):
+        print(f"📦 Using cached snapshot of board {board_id}")
+        records = _read_snapshot(path)
+    else:
+        fields = stored_fields(extra_fields)
+        header = {'board_id': str(board_id), 'fields': ' '.join(fields.split()), 'fetched_at': time.time()}
+        records = _write_through(path, header, monday_client.iter_board_items(board_id, fields))
+    for item in records:
+        yield project(item, column_ids)
+
+
+def _snapshot_files(board_id=None):
+    """List snapshot and metadata files, optionally for one board"""
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    prefix = f"board_{board_id}_" if board_id else "board_"
+    return sorted(
+        os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR)
+        if name.startswith(prefix) and name.endswith(('.jsonl.gz', '.json'))
+    )
+
+
+def invalidate(board_id=None):
+    """Delete cached snapshots and metadata for a board, or for every board"""
+    removed = 0
+    for path in _snapshot_files(board_id):
+        os.remove(path)
+        removed += 1
+    return removed
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else 'list'
+
+    if command == 'invalidate':
+        board_id = argv[2] if len(argv) > 2 else None
+        removed = invalidate(board_id)
+        print(f"🗑️ Removed {removed} snapshot(s){f' for board {board_id}' if board_id else ''}")
+    elif command == 'list':
+        for path in _snapshot_files():
+            age = time.time() - os.path.getmtime(path)
+            status = 'fresh' if age < CACHE_TTL else 'stale'
+            print(f"{os.path.basename(path)}  {os.path.getsize(path)} bytes  {age / 60:.0f} min old ({status})")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,232 @@
+"""
+Incremental Monday.com board sync
+Keeps a local replica of a board plus a high-water mark. Each run reads the
+board's activity log since the mark and refetches only the items that
+changed, so steady-state traffic follows the daily change volume instead of
+headcount. Falls back to a full sync when there is no usable replica.
+
+There is one replica per board, holding every column of every group; bots
+select their groups and columns from it locally, so every bot reading a
+board syncs and shares the same replica.
+
+Usage:
+    python board_sync.py reset [board_id]
+"""
+
+import os
+import sys
+import json
+import gzip
+import time
+from datetime import datetime, timezone, timedelta
+
+import monday_client
+from board_cache import CACHE_DIR, fields_key, temp_path, split_fields, stored_fields, project
+
+# Configuration
+FULL_SYNC_AFTER = int(os.environ.get('BOARD_SYNC_FULL_AFTER', str(7 * 24 * 60 * 60)))  # 7 days
+OVERLAP = timedelta(minutes=5)  # re-read a little of the log to absorb clock skew
+ACTIVITY_PAGE_SIZE = 1000
+ITEMS_CHUNK_SIZE = 100
+
+REMOVE_EVENTS = ('delete_pulse', 'archive_pulse', 'batch_delete_pulses', 'batch_archive_pulses')
+
+
+def replica_path(board_id, extra_fields=''):
+    """Path of the replica file for a board (and extra fields, when a bot needs any)"""
+    return os.path.join(CACHE_DIR, f"replica_{board_id}_{fields_key(extra_fields)}.json.gz")
+
+
+def load_replica(board_id, extra_fields=''):
+    """Load a replica from disk, or None if there is none"""
+    try:
+        with gzip.open(replica_path(board_id, extra_fields), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_replica(replica, extra_fields=''):
+    """Write a replica to disk atomically"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = replica_path(replica['board_id'], extra_fields)
+    tmp_path = temp_path(path)
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=5) as f:
+        json.dump(replica, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _utc_now():
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def full_sync(board_id, item_fields):
+    """Fetch every item of the board and start a fresh replica"""
+    print(f"🔄 Full sync of board {board_id}...")
+    started = _utc_now()
+    items = {}
+    for group, item in monday_client.iter_group_items(board_id, item_fields):
+        items[str(item['id'])] = [group['id'], group['title'], item]
+
+    return {
+        'board_id': str(board_id),
+        'fields': ' '.join(item_fields.split()),
+        'high_water_mark': _iso(started),
+        'full_synced_at': time.time(),
+        'changed_at': time.time(),
+        'items': items
+    }
+
+
+def _changed_item_ids(board_id, since):
+    """Read the activity log since a timestamp, returns (changed_ids, removed_ids) or None on board-level changes.
+    An id can be in both, e.g. an item archived and restored again since the timestamp"""
+    query = f'''
+    query ($from: ISO8601DateTime, $page: Int!) {{
+      boards(ids: {board_id}) {{
+        activity_logs(from: $from, limit: {ACTIVITY_PAGE_SIZE}, page: $page) {{
+          event
+          data
+        }}
+      }}
+    }}
+    '''
+    changed = set()
+    removed = set()
+    page = 1
+    while True:
+        result = monday_client.query_monday(query, {"from": since, "page": page})
+        monday_client.raise_for_errors(result)
+        logs = result['data']['boards'][0]['activity_logs'] or []
+
+        for log in logs:
+            try:
+                data = json.loads(log.get('data') or '{}')
+            except ValueError:
+                data = {}
+            item_id = data.get('pulse_id') or data.get('item_id')
+            if not item_id:
+                # Group or column level change, the replica can't be patched item by item
+                print(f"  Board-level change '{log.get('event')}' since last sync")
+                return None
+            if log.get('event') in REMOVE_EVENTS:
+                removed.add(str(item_id))
+            else:
+                changed.add(str(item_id))
+
+        if len(logs) < ACTIVITY_PAGE_SIZE:
+            return changed, removed
+        page += 1
+
+
+def _fetch_items(item_ids, item_fields):
+    """Fetch specific items with their current group, in chunks"""
+    query = f'''
+    query ($ids: [ID!]) {{
+      items(ids: $ids, limit: {ITEMS_CHUNK_SIZE}) {{
+        id
+        state
+        group {{
+          id
+          title
+        }}
+        {item_fields}
+      }}
+    }}
+    '''
+    item_ids = sorted(item_ids)
+    for i in range(0, len(item_ids), ITEMS_CHUNK_SIZE):
+        result = monday_client.query_monday(query, {"ids": item_ids[i:i + ITEMS_CHUNK_SIZE]})
+        monday_client.raise_for_errors(result)
+        yield from result['data']['items']
+
+
+def sync_board(board_id, extra_fields=''):
+    """Bring the local replica of a board up to date and return it, items as {id: [group id, group title, item]}
+    with every column"""
+    item_fields = stored_fields(extra_fields)
+    replica = load_replica(board_id, extra_fields)
+
+    if (not replica
+            or replica.get('fields') != ' '.join(item_fields.split())
+            or time.time() - replica.get('full_synced_at', 0) > FULL_SYNC_AFTER):
+        replica = full_sync(board_id, item_fields)
+        save_replica(replica, extra_fields)
+        return replica
+
+    started = _utc_now()
+    since = datetime.strptime(replica['high_water_mark'], '%Y-%m-%dT%H:%M:%SZ') - OVERLAP
+    changes = _changed_item_ids(board_id, _iso(since))
+
+    if changes is None:
+        replica = full_sync(board_id, item_fields)
+        save_replica(replica, extra_fields)
+        return replica
+
+    # Removed items are refetched too: one archived and restored since the last sync is active again,
+    # and the item's current state decides either way
+    changed, removed = changes
+    touched = changed | removed
+    items = replica['items']
+    updated = dropped = 0
+
+    fetched = set()
+    for item in _fetch_items(touched, item_fields):
+        item_id = str(item['id'])
+        fetched.add(item_id)
+        group = item.pop('group', None)
+        state = item.pop('state', 'active')
+        if state != 'active' or not group:
+            dropped += items.pop(item_id, None) is not None
+        else:
+            items[item_id] = [group['id'], group['title'], item]
+            updated += 1
+
+    # Items we were told about but can no longer read (deleted) are gone
+    for item_id in touched - fetched:
+        dropped += items.pop(item_id, None) is not None
+
+    print(f"🔄 Incremental sync of board {board_id}: {updated} updated, {dropped} removed, {len(items)} total")
+    if touched:
+        # Lets indexes built from the replica tell whether they are still current
+        replica['changed_at'] = time.time()
+
+    replica['high_water_mark'] = _iso(started)
+    save_replica(replica, extra_fields)
+    return replica
+
+
+def iter_group_items(board_id, item_fields, group_ids=None):
+    """Yield (group, item) for every item in the selected groups (default all) with the columns item_fields
+    projects, from the synced replica"""
+    column_ids, extra_fields = split_fields(item_fields)
+    replica = sync_board(board_id, extra_fields)
+    for group_id, group_title, item in replica['items'].values():
+        if group_ids is None or group_id in group_ids:
+            yield {'id': group_id, 'title': group_title}, project(item, column_ids)
+
+
+def reset(board_id=None):
+    """Delete replicas so the next run does a full sync"""
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+    prefix = f"replica_{board_id}_" if board_id else "replica_"
+    removed = 0
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix) and name.endswith('.json.gz'):
+            os.remove(os.path.join(CACHE_DIR, name))
+            removed += 1
+    return removed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'reset':
+        board_id = sys.argv[2] if len(sys.argv) > 2 else None
+        print(f"🗑️ Removed {reset(board_id)} replica(s)")
+    else:
+        print(__doc__)
+        sys.exit(1)
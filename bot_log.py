@@ -0,0 +1,148 @@
+"""
+Levelled, sampled logging for the bots
+Thin setup over the standard logging module: messages go to stdout exactly as
+the bots' print lines did, formatting is lazy (%-style arguments are only
+formatted for lines that are actually emitted), per-item lines in hot loops
+are sampled so a 10k item board doesn't flood the log, and full per-item
+column dumps sit on a separate 'dump' logger that is off unless asked for.
+
+Configuration (environment):
+    LOG_LEVEL=DEBUG|INFO|WARNING    default INFO
+    LOG_DUMP_ITEMS=1                dump every item's columns, whatever LOG_LEVEL is
+    LOG_SAMPLE_FIRST=20             per-item lines kept for each kind, 0 keeps them all
+    LOG_SAMPLE_EVERY=0              after that keep every Nth, 0 drops the rest
+"""
+
+import os
+import sys
+import atexit
+import logging
+import threading
+
+# Configuration
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_DUMP_ITEMS = os.environ.get('LOG_DUMP_ITEMS', '').lower() in ('1', 'true', 'yes')
+LOG_SAMPLE_FIRST = int(os.environ.get('LOG_SAMPLE_FIRST', '20'))
+LOG_SAMPLE_EVERY = int(os.environ.get('LOG_SAMPLE_EVERY', '0'))
+
+ROOT = 'bots'
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Stream handler that always writes to the current sys.stdout, so redirecting stdout redirects logs too"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class SampleFilter(logging.Filter):
+    """Keeps the first LOG_SAMPLE_FIRST records of each sample key (then every LOG_SAMPLE_EVERY-th)
+    and counts the rest, records without a key always pass"""
+
+    def __init__(self, first=LOG_SAMPLE_FIRST, every=LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.first = first
+        self.every = every
+        self.seen = {}
+        self.dropped = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, 'sample', None)
+        if key is None or self.first <= 0:
+            return True
+        with self.lock:
+            n = self.seen.get(key, 0) + 1
+            self.seen[key] = n
+            if n <= self.first or (self.every and (n - self.first) % self.every == 0):
+                return True
+            self.dropped[key] = self.dropped.get(key, 0) + 1
+            return False
+
+    def take_dropped(self):
+        """Counts of dropped records per key since the last call, resetting the sampler"""
+        with self.lock:
+            dropped = self.dropped
+            self.seen, self.dropped = {}, {}
+            return dropped
+
+
+sampler = SampleFilter()
+
+
+def configure():
+    """Attach the stdout handler, sampler and levels once per process"""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        handler = _StdoutHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler.addFilter(sampler)
+
+        root = logging.getLogger(ROOT)
+        root.addHandler(handler)
+        root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+        root.propagate = False
+
+        # Column dumps only show when asked for, or at DEBUG
+        dump = logging.getLogger(f"{ROOT}.dump")
+        dump.setLevel(logging.DEBUG if LOG_DUMP_ITEMS or root.level <= logging.DEBUG else logging.WARNING)
+
+        atexit.register(report_sampled)
+        _configured = True
+
+
+def get_logger(name):
+    """Logger for a bot or module"""
+    configure()
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def sampled(key):
+    """extra= argument marking a per-item line as one of many of its kind"""
+    return {'sample': key}
+
+
+def dump_enabled():
+    """Whether per-item column dumps are on, check it before building an expensive dump"""
+    configure()
+    return logging.getLogger(f"{ROOT}.dump").isEnabledFor(logging.DEBUG)
+
+
+def dump_item(title, columns):
+    """Log a heading and every (label, text[, value]) column of one item on the dump logger"""
+    if not dump_enabled():
+        return
+    log = logging.getLogger(f"{ROOT}.dump")
+    log.debug("%s", title)
+    # Columns sit two spaces in from the title's own indentation
+    heading = title.rsplit('\n', 1)[-1]
+    indent = heading[:len(heading) - len(heading.lstrip())] + '  '
+    for column in columns:
+        label, text = column[0], column[1]
+        value = column[2] if len(column) > 2 else None
+        if value is not None and str(value) != text:
+            log.debug("%s[%s]: %s  (value: %s)", indent, label, text, value)
+        else:
+            log.debug("%s[%s]: %s", indent, label, text)
+
+
+def report_sampled():
+    """Log how many per-item lines sampling dropped, once per kind"""
+    dropped = sampler.take_dropped()
+    if not dropped:
+        return
+    log = logging.getLogger(ROOT)
+    for key, count in dropped.items():
+        log.info("  … %d more '%s' line(s) not shown (LOG_SAMPLE_FIRST=0 shows all)", count, key)
@@ -0,0 +1,100 @@
+"""
+Calendar index of birthdays and work anniversaries
+Maps every (month, day) to the people celebrating on it, so the daily check
+is a dictionary lookup instead of a scan and date parse of every board item,
+and lookahead queries ("the next 7 days") are a lookup per day. The index is
+stored next to the board cache together with the versions of the board
+replicas it was built from, so it is only rebuilt when a board changed.
+People born (or hired) on Feb 29 celebrate on LEAP_DAY_OBSERVED in other years.
+"""
+
+import os
+import json
+import time
+import calendar
+from datetime import timedelta
+
+from board_cache import CACHE_DIR, temp_path
+
+# Configuration
+INDEX_PATH = os.path.join(CACHE_DIR, "calendar_index.json")
+LEAP_DAY_OBSERVED = os.environ.get('LEAP_DAY_OBSERVED', '02-28')  # or 03-01
+
+LEAP_DAY = '02-29'
+
+
+def day_key(day):
+    """Index key of a date's month and day, MM-DD"""
+    return f"{day.month:02d}-{day.day:02d}"
+
+
+class CalendarIndex:
+    """People by the month and day they celebrate, as {MM-DD: {kind: [[name, year], ...]}}"""
+
+    def __init__(self, days, sources, built_at, checked_at=None):
+        self.days = days
+        self.sources = sources
+        self.built_at = built_at
+        self.checked_at = checked_at or built_at
+
+    @classmethod
+    def build(cls, entries, sources):
+        """Index (kind, name, date) entries, sources identifies the board versions they came from"""
+        days = {}
+        for kind, name, day in entries:
+            days.setdefault(day_key(day), {}).setdefault(kind, []).append([name, day.year])
+        for kinds in days.values():
+            for people in kinds.values():
+                people.sort()
+        return cls(days, sources, time.time())
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        """Load a stored index, or None if there is none"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data['days'], data['sources'], data['built_at'], data.get('checked_at'))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path=INDEX_PATH):
+        """Write the index to disk atomically"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = temp_path(path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'sources': self.sources,
+                'built_at': self.built_at,
+                'checked_at': self.checked_at,
+                'days': self.days
+            }, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def keys_for(self, day):
+        """Index keys celebrated on a date, which takes in Feb 29 on the observed day of a common year"""
+        key = day_key(day)
+        if key == LEAP_DAY_OBSERVED and not calendar.isleap(day.year):
+            return [key, LEAP_DAY]
+        return [key]
+
+    def on(self, day):
+        """Celebrations on a date as {kind: [(name, year), ...]}, empty when there are none"""
+        found = {}
+        for key in self.keys_for(day):
+            for kind, people in self.days.get(key, {}).items():
+                found.setdefault(kind, []).extend((name, year) for name, year in people)
+        return found
+
+    def between(self, start, days):
+        """Celebrations in the days from start on, as [(date, {kind: [(name, year), ...]}), ...] for days that have any"""
+        upcoming = []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            found = self.on(day)
+            if found:
+                upcoming.append((day, found))
+        return upcoming
+
+    def __len__(self):
+        return sum(len(people) for kinds in self.days.values() for people in kinds.values())
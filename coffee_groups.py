@@ -0,0 +1,168 @@
+"""
+Coffee group matching with memory
+Keeps the groups of the last HISTORY_ROUNDS coffee rounds next to the board
+cache and assigns people to groups by simulated annealing over swaps of two
+people between groups, minimising how often people meet again (recent rounds
+weigh more) and, more lightly, how many people in a group share a project or
+branch. A swap only rescores the two groups it touches, so a run is a fixed
+number of cheap moves per person and thousands of people match in seconds.
+The same people, history and seed always give the same groups.
+"""
+
+import os
+import json
+import math
+import random
+
+from board_cache import CACHE_DIR, temp_path
+
+# Configuration
+HISTORY_PATH = os.path.join(CACHE_DIR, "coffee_history.json")
+HISTORY_ROUNDS = int(os.environ.get('COFFEE_HISTORY_ROUNDS', '12'))  # about six months of bi-weekly rounds
+PROJECT_WEIGHT = float(os.environ.get('COFFEE_PROJECT_WEIGHT', '1'))  # cost of two people from one project in a group
+BRANCH_WEIGHT = float(os.environ.get('COFFEE_BRANCH_WEIGHT', '0.5'))  # cost of two people from one branch in a group
+MOVES_PER_PERSON = int(os.environ.get('COFFEE_MOVES_PER_PERSON', '50'))  # annealing swaps tried per person
+START_TEMPERATURE = 2.0
+END_TEMPERATURE = 0.02
+
+
+def group_sizes(count):
+    """Sizes of the groups for a number of people: alternating 4 and 3, with 1 or 2 left over joining the last group"""
+    sizes = []
+    remaining = count
+    while remaining >= 4:
+        size = 4 if len(sizes) % 2 == 0 else 3
+        sizes.append(size)
+        remaining -= size
+    if remaining == 3 or not sizes:
+        sizes.append(remaining)
+    elif remaining:
+        sizes[-1] += remaining
+    return [size for size in sizes if size]
+
+
+class PairingHistory:
+    """Groups of past rounds, oldest first, as [{'round': label, 'groups': [[key, ...], ...]}, ...]"""
+
+    def __init__(self, rounds=None):
+        self.rounds = rounds or []
+
+    @classmethod
+    def load(cls, path=HISTORY_PATH):
+        """Load the stored history, empty when there is none"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f)['rounds'])
+        except (OSError, ValueError, KeyError):
+            return cls()
+
+    def save(self, path=HISTORY_PATH):
+        """Write the history to disk atomically"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = temp_path(path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'rounds': self.rounds}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def add(self, label, groups):
+        """Record a round's groups, replacing an earlier run of the same round, and forget rounds past HISTORY_ROUNDS"""
+        self.rounds = [r for r in self.rounds if r['round'] != label]
+        self.rounds.append({'round': label, 'groups': [list(group) for group in groups]})
+        # One more than is weighed, so rerunning the latest round still sees the HISTORY_ROUNDS before it
+        del self.rounds[:-(HISTORY_ROUNDS + 1)]
+
+    def weights(self, exclude=None):
+        """Cost of each pair meeting again as {key: {other: cost}}, leaving out the round labelled exclude"""
+        rounds = [r for r in self.rounds if r['round'] != exclude][-HISTORY_ROUNDS:]
+        weights = {}
+        for age, past in enumerate(reversed(rounds)):
+            # Last round's partners cost HISTORY_ROUNDS and the oldest round's 1, well above sharing a project
+            cost = HISTORY_ROUNDS - age
+            for group in past['groups']:
+                for a in group:
+                    met = weights.setdefault(a, {})
+                    for b in group:
+                        if a != b:
+                            met[b] = met.get(b, 0) + cost
+        return weights
+
+
+class GroupMatch:
+    """Result of a matching: groups of keys, their total cost and pairs in them that met before or share a project"""
+
+    def __init__(self, groups, cost, repeats, same_project):
+        self.groups = groups
+        self.cost = cost
+        self.repeats = repeats
+        self.same_project = same_project
+
+
+def match_groups(people, weights=None, seed=None, projects=None, branches=None, moves_per_person=MOVES_PER_PERSON):
+    """Assign people (keys) to groups of group_sizes(len(people)), minimising repeat meetings from weights
+    (PairingHistory.weights) and shared projects and branches ({key: name}); deterministic for a seed"""
+    rng = random.Random(seed)
+    people = sorted(set(people))
+    rng.shuffle(people)
+    count = len(people)
+
+    # People as indexes from here on, projects and branches as small ints (-1 for none)
+    index = {key: i for i, key in enumerate(people)}
+    met = [{index[other]: cost for other, cost in (weights or {}).get(key, {}).items() if other in index}
+           for key in people]
+
+    def codes(names):
+        ids = {}
+        return [ids.setdefault(names[key], len(ids)) if names and names.get(key) else -1 for key in people]
+
+    project = codes(projects)
+    branch = codes(branches)
+
+    def pair_cost(a, b):
+        cost = met[a].get(b, 0)
+        if project[a] >= 0 and project[a] == project[b]:
+            cost += PROJECT_WEIGHT
+        if branch[a] >= 0 and branch[a] == branch[b]:
+            cost += BRANCH_WEIGHT
+        return cost
+
+    def cost_in(a, members, skip):
+        """Cost of a person with the members of a group, leaving out themself and skip"""
+        return sum(pair_cost(a, b) for b in members if b != a and b != skip)
+
+    groups = []
+    group_of = [0] * count
+    start = 0
+    for g, size in enumerate(group_sizes(count)):
+        groups.append(list(range(start, start + size)))
+        for person in groups[-1]:
+            group_of[person] = g
+        start += size
+
+    # Simulated annealing over swaps of two people in different groups, cooling geometrically
+    moves = moves_per_person * count if len(groups) > 1 else 0
+    temperature = START_TEMPERATURE
+    cooling = (END_TEMPERATURE / START_TEMPERATURE) ** (1.0 / moves) if moves else 1.0
+    for _ in range(moves):
+        temperature *= cooling
+        a = rng.randrange(count)
+        b = rng.randrange(count)
+        ga, gb = group_of[a], group_of[b]
+        if ga == gb:
+            continue
+        members_a, members_b = groups[ga], groups[gb]
+        before = cost_in(a, members_a, a) + cost_in(b, members_b, b)
+        after = cost_in(a, members_b, b) + cost_in(b, members_a, a)
+        delta = after - before
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            members_a[members_a.index(a)] = b
+            members_b[members_b.index(b)] = a
+            group_of[a], group_of[b] = gb, ga
+
+    total = repeats = same_project = 0
+    for members in groups:
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                total += pair_cost(a, b)
+                repeats += b in met[a]
+                same_project += project[a] >= 0 and project[a] == project[b]
+    return GroupMatch([[people[i] for i in members] for members in groups], total, repeats, same_project)
@@ -1,134 +1,78 @@
+"""
+Coffee matcher
+Posts bi-weekly coffee groups of 3-4 active employees. Groups avoid people
+who met in the last rounds (kept in the pairing history) and mix projects and
+branches; a round's groups are reproducible from its seed, the ISO week
+unless COFFEE_SEED is set.
+
+Usage:
+    python coffee_matcher.py                  (post this round's groups)
+    python coffee_matcher.py preview [seed]   (print the groups without posting or recording them)
+"""
+
 import os
-import json
-import urllib.request
-import urllib.parse
-import random
+import sys
 from datetime import datetime, timezone, timedelta
 
+from board_cache import iter_group_items, resolve_groups, is_active_group
+from employees import EmployeeSchema
+from coffee_groups import HISTORY_ROUNDS, PairingHistory, match_groups
+from run_ledger import RunLedger, post_once, this_week
+from instrumentation import run_report, timed
+
 # Configuration
-MONDAY_API_TOKEN = os.environ.get('MONDAY_API_TOKEN')
-SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
 ANNIVERSARY_BOARD_ID = "6329303796"
 SLACK_CHANNEL = "#coffee-dates"
+SEED = os.environ.get('COFFEE_SEED', '')  # default the round's ISO week
 
-def query_monday(query):
-    """Query Monday.com API"""
-    url = "https://api.monday.com/v2"
-    headers = {
-        "Authorization": MONDAY_API_TOKEN,
-        "Content-Type": "application/json"
-    }
-    data = json.dumps({"query": query}).encode('utf-8')
-    
-    req = urllib.request.Request(url, data=data, headers=headers)
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read().decode('utf-8'))
-
-def post_to_slack(message):
-    """Post message to Slack"""
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "channel": SLACK_CHANNEL,
-        "text": message,
-        "unfurl_links": False
-    }
-    
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode('utf-8'),
-        headers=headers
-    )
-    
-    with urllib.request.urlopen(req) as response:
-        result = json.loads(response.read().decode('utf-8'))
-        return result.get("ok")
+# Columns read from the employee board, used to mix projects and branches
+COFFEE_COLUMNS = {
+    'project': lambda col: col['id'].lower() == 'project' or col['title'] == 'Project',
+    'branch': lambda col: 'branch' in col['id'].lower()
+}
 
+@timed('fetch')
 def get_active_employees():
-    """Get list of active employees from Monday.com with pagination"""
+    """Get active employees from Monday.com as {'id', 'name', 'project', 'branch'} dicts"""
     print("☕ Fetching active employees from Monday.com...")
     
-    # Increased limit to 500 to get all items at once
-    query = f'''
-    {{
-      boards(ids: {ANNIVERSARY_BOARD_ID}) {{
-        groups {{
-          id
-          title
-          items_page(limit: 500) {{
-            items {{
-              name
-            }}
-          }}
-        }}
-      }}
-    }}
-    '''
-    
-    result = query_monday(query)
     employees = []
+    counts = {}
     
-    if result.get('data') and result['data'].get('boards'):
-        groups = result['data']['boards'][0]['groups']
-        
-        for group in groups:
-            group_title = group.get('title', '').lower()
-            
-            # Include both "Active Employees" and "Active - Non billable" groups
-            # Exclude "Not Active" groups
-            if ('active' in group_title and 'employee' in group_title and 'not' not in group_title) or \
-               ('active' in group_title and 'non' in group_title and 'billable' in group_title):
-                items = group['items_page']['items']
-                group_name = group.get('title', '')
-                print(f"  Including group: {group_name} ({len(items)} people)")
-                for item in items:
-                    name = item.get('name', '').strip()
-                    if name:
-                        employees.append(name)
-        
-        print(f"✅ Found {len(employees)} people total from active groups")
+    group_ids = resolve_groups(ANNIVERSARY_BOARD_ID, is_active_group)
+    if not group_ids:
+        return employees
     
-    return employees
-
-def create_groups(employees, group_size=3):
-    """Create random groups of 3-4 people"""
-    random.shuffle(employees)
-    groups = []
+    schema = EmployeeSchema.for_board(ANNIVERSARY_BOARD_ID, COFFEE_COLUMNS)
+    for group, item in iter_group_items(ANNIVERSARY_BOARD_ID, schema.item_fields(), group_ids=group_ids):
+        emp = schema.parse(item, group)
+        name = (emp.name or '').strip()
+        if name:
+            employees.append({'id': emp.item_id or name, 'name': name,
+                              'project': emp['project'], 'branch': emp['branch']})
+            counts[group['title']] = counts.get(group['title'], 0) + 1
     
-    i = 0
-    while i < len(employees):
-        # Calculate how many people are left
-        remaining = len(employees) - i
-        
-        # If 4 or more people left, make a group of 3 or 4
-        if remaining >= 4:
-            # Alternate between groups of 3 and 4
-            size = 4 if len(groups) % 2 == 0 else 3
-            groups.append(employees[i:i+size])
-            i += size
-        # If exactly 3 people left, make a group of 3
-        elif remaining == 3:
-            groups.append(employees[i:i+3])
-            i += 3
-        # If 2 people left, add them to the last group
-        elif remaining == 2:
-            if groups:
-                groups[-1].extend(employees[i:i+2])
-            else:
-                groups.append(employees[i:i+2])
-            break
-        # If 1 person left, add to last group
-        else:
-            if groups:
-                groups[-1].append(employees[i])
-            else:
-                groups.append([employees[i]])
-            break
+    for group_name, count in counts.items():
+        print(f"  Including group: {group_name} ({count} people)")
+    print(f"✅ Found {len(employees)} people total from active groups")
     
-    return groups
+    return employees
+
+@timed('match')
+def create_groups(employees, history, round_label, seed=None):
+    """Create groups of 3-4 people that avoid the last rounds' groups and mix projects and branches"""
+    by_id = {emp['id']: emp for emp in employees}
+    match = match_groups(
+        list(by_id),
+        history.weights(exclude=round_label),
+        seed=round_label if seed is None else seed,
+        projects={key: emp['project'] for key, emp in by_id.items()},
+        branches={key: emp['branch'] for key, emp in by_id.items()}
+    )
+    past_rounds = min(HISTORY_ROUNDS, sum(1 for past in history.rounds if past['round'] != round_label))
+    print(f"🔀 {len(match.groups)} groups, {match.repeats} pair(s) meeting again within the last "
+          f"{past_rounds} round(s), {match.same_project} pair(s) from the same project")
+    return match.groups, [[by_id[key]['name'] for key in group] for group in match.groups]
 
 def create_coffee_pairings():
     """Create and post coffee date pairings"""
@@ -146,12 +90,14 @@ def create_coffee_pairings():
         print("❌ Not enough employees to create pairings")
         return
     
-    # Create random groups
-    groups = create_groups(employees)
+    # Groups avoiding people's recent coffee partners, reproducible for the round (the ISO week)
+    round_label = this_week()
+    history = PairingHistory.load()
+    keys, groups = create_groups(employees, history, round_label, SEED or None)
     
     # Build message
     message = "☕ *Coffee Dates Alert!* ☕\n\n"
-    message += "It's time to meet at 8:30 AM on Thursday! Here are your random coffee groups:\n\n"
+    message += "It's time to meet at 8:30 AM on Thursday! Here are your coffee groups:\n\n"
     
     for i, group in enumerate(groups, 1):
         message += f"*Group {i}:*\n"
@@ -162,12 +108,38 @@ def create_coffee_pairings():
     message += "_Connect with your group this Thursday at 8:30 AM for coffee ☕🍕💬_\n\n"
     message += "Next pairings will be posted in two weeks!"
     
-    # Post to Slack
-    if post_to_slack(message):
-        print(f"✅ Posted coffee pairings for {len(groups)} groups!")
-        print(f"Total participants: {len(employees)}")
-    else:
+    # Post to Slack, unless this week's pairings already went out
+    result = post_once(RunLedger('coffee_matcher', this_week()), SLACK_CHANNEL, message, content='pairings')
+    if not result:
         print("❌ Failed to post coffee pairings")
+    else:
+        if result.attempts:
+            print(f"✅ Posted coffee pairings for {len(groups)} groups!")
+            print(f"Total participants: {len(employees)}")
+        # Remembered once they are out, a rerun of the round matches the same way and records the same groups
+        history.add(round_label, keys)
+        history.save()
+
+def preview(seed=None):
+    """Print this round's groups without posting or recording them"""
+    employees = get_active_employees()
+    round_label = this_week()
+    _, groups = create_groups(employees, PairingHistory.load(), round_label, seed)
+    for i, group in enumerate(groups, 1):
+        print(f"  Group {i}: {', '.join(group)}")
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else 'post'
+    
+    if command == 'post':
+        with run_report('coffee_matcher'):
+            create_coffee_pairings()
+    elif command == 'preview':
+        preview(argv[2] if len(argv) > 2 else SEED or None)
+    else:
+        print(__doc__)
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    create_coffee_pairings()
+    sys.exit(main(sys.argv))
@@ -0,0 +1,135 @@
+"""
+Declarative column projections for Monday.com boards
+Each bot declares the columns it reads as {field: column ids or matcher}.
+The spec is validated against the board's column metadata and turned into a
+column_values(ids: [...]) projection so only those columns are downloaded.
+
+Usage:
+    python column_spec.py <board_id> [group title] [items]
+
+Lists the board's columns, and with a group title also prints every
+non-empty column of the group's first items (default 1).
+"""
+
+import os
+import sys
+import json
+import time
+import itertools
+
+import monday_client
+from board_cache import CACHE_DIR, CACHE_TTL, temp_path
+
+
+def get_board_columns(board_id, ttl=CACHE_TTL):
+    """Get the board's column metadata (id, title, type), cached on disk"""
+    path = os.path.join(CACHE_DIR, f"board_{board_id}_columns.json")
+    try:
+        if ttl > 0 and time.time() - os.path.getmtime(path) < ttl:
+            with open(path, 'r') as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    query = f'''
+    {{
+      boards(ids: {board_id}) {{
+        columns {{
+          id
+          title
+          type
+        }}
+      }}
+    }}
+    '''
+    result = monday_client.query_monday(query)
+    monday_client.raise_for_errors(result)
+    columns = result['data']['boards'][0]['columns']
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = temp_path(path)
+    with open(tmp_path, 'w') as f:
+        json.dump(columns, f)
+    os.replace(tmp_path, path)
+    return columns
+
+
+def resolve_columns(board_id, spec):
+    """Resolve a {field: column id, list of ids or matcher} spec to concrete column ids"""
+    columns = get_board_columns(board_id)
+    known_ids = {col['id'] for col in columns}
+    resolved = {}
+
+    for field, wanted in spec.items():
+        if callable(wanted):
+            ids = [col['id'] for col in columns if wanted(col)]
+            if not ids:
+                print(f"⚠️ No column on board {board_id} matches field '{field}'")
+        else:
+            ids = [wanted] if isinstance(wanted, str) else list(wanted)
+            missing = [col_id for col_id in ids if col_id not in known_ids]
+            if missing:
+                raise ValueError(f"Board {board_id} has no column(s) {missing} for field '{field}'")
+        resolved[field] = ids
+
+    return resolved
+
+
+def projection(resolved, extra_fields="name", column_fields="id text value"):
+    """Build the GraphQL item selection for already resolved columns"""
+    column_ids = []
+    for ids in resolved.values():
+        for col_id in ids:
+            if col_id not in column_ids:
+                column_ids.append(col_id)
+
+    if not column_ids:
+        return extra_fields
+    return f"{extra_fields}\ncolumn_values(ids: {json.dumps(column_ids)}) {{ {column_fields} }}"
+
+
+def project_columns(board_id, spec, extra_fields="name", column_fields="id text value"):
+    """Build the GraphQL item selection that projects only the columns in the spec"""
+    return projection(resolve_columns(board_id, spec), extra_fields, column_fields)
+
+
+def print_sample_items(board_id, group_title, limit):
+    """Print every non-empty column of the first items in a group, to find the column ids a bot needs"""
+    group_ids = [group['id'] for group in monday_client.get_board_groups(board_id) if group['title'] == group_title]
+    if not group_ids:
+        print(f"⚠️ Board {board_id} has no group '{group_title}'")
+        return
+
+    print(f"\n📋 SAMPLE ITEMS (first {limit} in {group_title}):")
+    item_fields = "id\nname\ncolumn_values { id text }"
+    # Only ask for as many items as are shown, a full page is slow on boards with many columns
+    page_size = max(1, min(limit, monday_client.PAGE_SIZE))
+    items = monday_client.iter_group_items(board_id, item_fields, page_size=page_size, group_ids=group_ids)
+    # islice stops before pulling item limit + 1, which would fetch another page
+    for group, item in itertools.islice(items, limit):
+        print(f"\nItem: {item['name']}\n")
+        for col in item['column_values']:
+            if col['text']:
+                print(f"[{col['id']}]: {col['text']}")
+
+
+def main(argv):
+    if len(argv) < 2:
+        print(__doc__)
+        return 1
+
+    board_id = argv[1]
+    print(f"📋 ALL COLUMNS IN BOARD {board_id}:\n")
+    for col in get_board_columns(board_id, ttl=0):
+        print(f"Title: {col['title']}")
+        print(f"ID: {col['id']}")
+        print(f"Type: {col['type']}")
+        print("---")
+
+    if len(argv) > 2:
+        print_sample_items(board_id, argv[2], int(argv[3]) if len(argv) > 3 else 1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
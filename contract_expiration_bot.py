@@ -1,362 +1,311 @@
+"""
+Contract expiration bot
+Posts the contracts that expired or expire within each project's red, orange
+and yellow thresholds, grouped by project, and answers ad hoc questions from
+the stored end date index. Between full digests (every CONTRACT_DIGEST_DAYS)
+only the changes since the last run are posted: contracts that newly reached
+a more urgent bucket, renewals and contracts that left the board.
+
+Usage:
+    python contract_expiration_bot.py                           (post the weekly alert changes, or the digest when due)
+    python contract_expiration_bot.py digest                    (post the full list now)
+    python contract_expiration_bot.py window <from> <to>        (contracts ending between two YYYY-MM-DD dates)
+    python contract_expiration_bot.py expired <days>            (contracts expired more than N days ago)
+    python contract_expiration_bot.py forecast [months]         (renewals due per month, default 6)
+"""
+
 import os
-import json
-import urllib.request
-import urllib.parse
-from datetime import datetime, timezone, timedelta
+import sys
+import time
+from datetime import datetime, date, timezone, timedelta
+
+from monday_client import MondayAPIError
+from board_sync import iter_group_items
+from board_cache import CACHE_TTL, resolve_groups
+from employees import EmployeeSchema
+from contracts import ContractBatch, EndDateIndex, Thresholds, BUCKETS, THRESHOLDS_JSON, load_alert_state, save_alert_state
+from slack_messages import ReportBuilder
+from run_ledger import RunLedger, this_week
+from instrumentation import run_report, span, timed
+from bot_log import get_logger, sampled, dump_enabled, dump_item
 
 # Configuration
-MONDAY_API_TOKEN = os.environ.get('MONDAY_API_TOKEN')
-SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
 BOARD_ID = "6329303796"
 SLACK_CHANNEL = "contract-renewals"
+DIGEST_DAYS = int(os.environ.get('CONTRACT_DIGEST_DAYS', '28'))  # days between full lists, 0 posts only changes after the first
 
-def parse_date_to_iso(date_str):
-    """Convert various date formats to YYYY-MM-DD"""
-    if not date_str:
-        return ""
-    
-    formats = [
-        '%b %d, %Y',          # Oct 19, 2026
-        '%B %d, %Y',          # October 19, 2026
-        '%m/%d/%Y',           # 10/19/2026
-        '%m/%d/%y',           # 10/19/26
-        '%Y-%m-%d',           # 2026-10-19
-        '%d/%m/%Y',           # 19/10/2026
-        '%d/%m/%y',           # 19/10/26
-        '%Y/%m/%d',           # 2026/10/19
-        '%y/%m/%d',           # 26/10/19
-    ]
-    
-    for fmt in formats:
-        try:
-            parsed_date = datetime.strptime(date_str.strip(), fmt)
-            return parsed_date.strftime('%Y-%m-%d')
-        except ValueError:
-            continue
-    
-    return ""
+log = get_logger('contract_expiration_bot')
 
-def query_monday(query):
-    """Query Monday.com API"""
-    url = "https://api.monday.com/v2"
-    headers = {
-        "Authorization": MONDAY_API_TOKEN,
-        "Content-Type": "application/json"
-    }
-    data = json.dumps({"query": query}).encode('utf-8')
-    
-    req = urllib.request.Request(url, data=data, headers=headers)
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read().decode('utf-8'))
+# Columns read from the employee board
+CONTRACT_COLUMNS = {
+    'position': 'position',
+    'project': 'project',
+    'start_date': ['start_date___', 'date_mkkgvb4z'],  # Adaca Start Date, Contract Start Date
+    'duration_months': 'numbers_mkm2917g',
+    'contract_status': 'status_mkn52y8w'
+}
 
-def post_to_slack(message, channel=SLACK_CHANNEL):
-    """Post message to Slack"""
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "channel": channel,
-        "text": message,
-        "unfurl_links": False
-    }
+@timed('fetch')
+def get_employees_with_contracts():
+    """Get all employees with a contract start date and duration as one ContractBatch, None when the fetch failed"""
+    print("📋 Fetching employees from Monday.com...")
     
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode('utf-8'),
-        headers=headers
-    )
+    schema = EmployeeSchema.for_board(BOARD_ID, CONTRACT_COLUMNS, date_fields=('start_date',))
+    item_fields = schema.item_fields()
     
-    with urllib.request.urlopen(req) as response:
-        result = json.loads(response.read().decode('utf-8'))
-        return result.get("ok")
-
-def calculate_contract_end_date(start_date_str, duration_months):
-    """Calculate contract end date from start date + duration in months"""
-    if not start_date_str or not duration_months:
-        return ""
+    batch = ContractBatch()
+    seen_groups = set()
     
     try:
-        # Parse start date
-        start_date = None
-        for fmt in ['%Y-%m-%d', '%b %d, %Y', '%B %d, %Y', '%m/%d/%Y', '%m/%d/%y']:
-            try:
-                start_date = datetime.strptime(start_date_str.strip(), fmt)
-                break
-            except ValueError:
-                continue
-        
-        if not start_date:
-            return ""
-        
-        # Add duration in months
-        month = start_date.month + int(duration_months)
-        year = start_date.year
-        
-        # Handle month overflow
-        while month > 12:
-            month -= 12
-            year += 1
+        # Only process "Active Employees" group (not Non Billable)
+        group_ids = resolve_groups(BOARD_ID, lambda title: title == 'Active Employees')
+        if not group_ids:
+            return None
         
-        # Create end date (same day of month, or last day if not valid)
-        day = start_date.day
-        while day > 0:
-            try:
-                end_date = datetime(year, month, day)
-                return end_date.strftime('%Y-%m-%d')
-            except ValueError:
-                day -= 1  # Try previous day if invalid (e.g., Feb 31)
-        
-        return ""
-    except Exception as e:
-        print(f"Error calculating contract end date: {e}")
-        return ""
+        for group, item in iter_group_items(BOARD_ID, item_fields, group_ids=group_ids):
+            if group['id'] not in seen_groups:
+                seen_groups.add(group['id'])
+                print(f"  Checking group: {group['title']}")
+            
+            emp = schema.parse(item, group)
+            name = emp.name
+            start_date = emp['start_date']
+            duration_months = emp['duration_months']
+            
+            if name and dump_enabled():
+                dump_item(f"\n    Processing: {name}",
+                          [(field, text) for field, text in zip(schema.fields, emp.texts) if text])
+            
+            if name and start_date and duration_months:
+                start = emp.date('start_date')
+                try:
+                    months = int(duration_months)
+                except ValueError:
+                    months = -1
+                
+                if start and months >= 0:
+                    log.info("    ✓ %s: %s + %s months", name, start_date, duration_months,
+                             extra=sampled('contract'))
+                    batch.append(emp.item_id, name, emp['project'], start, months,
+                                 (emp['position'], emp['contract_status']))
+                else:
+                    log.info("    ✗ %s: Could not calculate end date", name, extra=sampled('bad contract date'))
+            elif name:
+                log.info("    ✗ %s: Missing start_date=%s, duration=%s", name, start_date, duration_months,
+                         extra=sampled('missing contract data'))
+    except MondayAPIError as e:
+        print(f"❌ API ERRORS:")
+        print(f"   - {e}")
+        return None
+    
+    print(f"✅ Found {len(batch)} employees with contract dates")
+    return batch
 
-def get_employees_with_contracts():
-    """Get all employees and calculate contract end dates"""
-    print("📋 Fetching employees from Monday.com...")
+def check_contract_expirations(digest=None):
+    """Check for contracts expiring in 30, 60, 90 days, or already expired, and post what changed since the last run.
+    The full list goes out instead on the first run, every DIGEST_DAYS, or when digest is True."""
+    print("⏰ Checking contract expirations...")
     
-    query = f'''
-    {{
-      boards(ids: {BOARD_ID}) {{
-        groups {{
-          id
-          title
-          items_page(limit: 500) {{
-            items {{
-              name
-              column_values {{
-                id
-                text
-                value
-              }}
-            }}
-          }}
-        }}
-      }}
-    }}
-    '''
+    today = manila_today()
+    thresholds = Thresholds.from_json(THRESHOLDS_JSON)
     
-    result = query_monday(query)
-    employees = []
+    print(f"Today: {today.strftime('%Y-%m-%d')}")
+    for last_day in thresholds.default:
+        print(f"{last_day} days: {(today + timedelta(days=last_day)).strftime('%Y-%m-%d')}")
+    for project, limits in thresholds.projects.items():
+        print(f"{project}: {'/'.join(str(limit) for limit in limits)} days")
     
-    print(f"API Response keys: {result.keys()}")
+    # Get all employees, a failed fetch leaves the stored index as it is
+    batch = get_employees_with_contracts()
+    if batch is None:
+        print("❌ Could not fetch contracts, nothing posted")
+        return
     
-    if 'errors' in result:
-        print(f"❌ API ERRORS:")
-        for error in result['errors']:
-            print(f"   - {error}")
-        print(f"\nFull error response: {json.dumps(result, indent=2)}")
-        return []
+    # End dates, days remaining and buckets for the whole roster at once (including past dates),
+    # sorted once into the end date index that also orders each project's alerts
+    with span('match'):
+        ends = batch.end_ordinals()
+        index = EndDateIndex.build(batch, ends)
+        expirations = batch.evaluate(today, thresholds, ends)
+    if len(batch):
+        index.save()
     
-    print(f"Has 'data'? {result.get('data') is not None}")
+    # Compare against the buckets stored by the last announcement
+    state = load_alert_state()
+    previous = state.get('contracts')
+    digest_at = state.get('digest_at')
+    if not len(batch) and previous:
+        # An empty board read is far likelier a broken fetch than everyone leaving at once; announcing
+        # every contract as removed and forgetting the state would re-announce them all next run
+        print(f"⚠️ No contracts read but {len(previous)} were stored, keeping the alert state and posting nothing")
+        return
+    if digest is None:
+        digest = (previous is None or not digest_at
+                  or (DIGEST_DAYS > 0 and today.toordinal() - date.fromisoformat(digest_at).toordinal() >= DIGEST_DAYS))
     
-    if result.get('data'):
-        print(f"Data keys: {result['data'].keys()}")
-        print(f"Has 'boards'? {result['data'].get('boards') is not None}")
-        
-        if result['data'].get('boards'):
-            print(f"Number of boards: {len(result['data']['boards'])}")
-            if len(result['data']['boards']) > 0:
-                print(f"Board keys: {result['data']['boards'][0].keys()}")
-                print(f"Number of groups: {len(result['data']['boards'][0].get('groups', []))}")
+    if digest:
+        print("📋 Posting the full digest")
+        report = build_digest(expirations, expirations.by_project(index.rows))
+        ledger = RunLedger('contract_expiration_bot', this_week())
+        digest_at = today.isoformat()
+    else:
+        with span('match'):
+            changes = expirations.changes(previous)
+        report = build_changes(expirations, changes)
+        ledger = RunLedger('contract_expiration_bot')
     
-    if result.get('data') and result['data'].get('boards'):
-        groups = result['data']['boards'][0]['groups']
-        
-        for group in groups:
-            group_title = group.get('title', '')
-            
-            # Only process "Active Employees" group (not Non Billable)
-            if group_title != 'Active Employees':
-                print(f"  Skipping group: {group_title}")
-                continue
-            
-            items = group['items_page']['items']
-            
-            print(f"  Checking group: {group_title} ({len(items)} items)")
-            
-            for item in items:
-                name = item.get('name', '').strip()
-                position = ""
-                project = ""
-                start_date = ""
-                duration_months = ""
-                contract_status = ""
-                
-                if name:
-                    print(f"\n    Processing: {name}")
-                
-                for col in item['column_values']:
-                    col_id = col.get('id', '')
-                    col_text = (col.get('text') or '').strip()
-                    col_value = col.get('value') or ''
-                    
-                    # Debug: Print all columns for first employee
-                    if name and col_text:
-                        print(f"      [{col_id}]: {col_text}")
-                    
-                    # Get position
-                    if col_id == 'position':
-                        position = col_text
-                    
-                    # Get project
-                    elif col_id == 'project':
-                        project = col_text
-                    
-                    # Get start date (Adaca Start Date or Contract Start Date)
-                    elif col_id in ['start_date___', 'date_mkkgvb4z']:
-                        if col_text:
-                            start_date = col_text
-                            print(f"      >>> Found start date: {start_date}")
-                    
-                    # Get contract duration (in months)
-                    elif col_id == 'numbers_mkm2917g':
-                        duration_months = col_text
-                        print(f"      >>> Found duration: {duration_months} months")
-                    
-                    # Get contract status
-                    elif col_id == 'status_mkn52y8w':
-                        contract_status = col_text
-                
-                # Calculate contract end date from start date + duration
-                if name and start_date and duration_months:
-                    contract_end_date = calculate_contract_end_date(start_date, duration_months)
-                    
-                    if contract_end_date:
-                        print(f"    ✓ {name}: {start_date} + {duration_months} months = {contract_end_date}")
-                        employees.append({
-                            'name': name,
-                            'position': position,
-                            'project': project,
-                            'contract_end_date': contract_end_date,
-                            'contract_status': contract_status
-                        })
-                    else:
-                        print(f"    ✗ {name}: Could not calculate end date")
-                elif name:
-                    print(f"    ✗ {name}: Missing start_date={start_date}, duration={duration_months}")
+    # Post to Slack, long reports continue in the thread; parts already posted this period are skipped
+    if report:
+        if not all(report.post(SLACK_CHANNEL, ledger)):
+            print("❌ Failed to post to Slack")
+            return
+        print(f"✅ Contract {'expiration alerts' if digest else 'alert changes'} posted to Slack!")
+    elif digest:
+        print(f"ℹ️ No contracts expiring in the next {thresholds.max_days} days")
+    else:
+        print("ℹ️ No contract alert changes since the last run")
     
-    print(f"✅ Found {len(employees)} employees with contract dates")
-    return employees
+    # Only remember what was announced, a failed post is retried against the old state next run
+    save_alert_state({'contracts': expirations.state(), 'digest_at': digest_at, 'updated_at': today.isoformat()})
 
-def check_contract_expirations():
-    """Check for contracts expiring in 30, 60, 90 days, or already expired"""
-    print("⏰ Checking contract expirations...")
+def write_contract(report, expirations, row, emoji=None):
+    """Write one contract's alert lines to a report"""
+    batch = expirations.batch
+    emoji = emoji or BUCKETS[expirations.labels[row]][1]
+    position, contract_status = batch.details[row]
+    days_until = expirations.days[row]
+    report.write(f"{emoji} {batch.names[row]} - {position}\n")
+    report.write(f"   Contract End Date: {expirations.end_date(row).strftime('%Y-%m-%d')} ({expirations.label(row)})\n")
+    if days_until >= 0:
+        report.write(f"   Days remaining: {days_until}\n")
+    else:
+        report.write(f"   Expired {abs(days_until)} days ago\n")
+    report.write(f"   Status: {contract_status}\n\n")
+
+def write_summary(report, expirations):
+    """Write the summary of contracts in each bucket"""
+    counts = expirations.counts()
+    thresholds = expirations.thresholds
+    report.section("━━━━━━━━━━━━━━━━━━━━━\n")
+    report.write(f"📊 *Summary*\n")
+    report.write(f"⚫ Expired: {counts['expired']}\n")
+    red, orange, yellow = thresholds.default
+    report.write(f"🔴 Red ({red} days): {counts['red']}\n")
+    report.write(f"🟠 Orange ({orange} days): {counts['orange']}\n")
+    report.write(f"🟡 Yellow ({yellow} days): {counts['yellow']}\n")
+    if thresholds.projects:
+        overrides = [f"{project} {'/'.join(str(limit) for limit in limits)}" for project, limits in thresholds.projects.items()]
+        report.write(f"⚙️ Own thresholds: {', '.join(overrides)}\n")
+    report.write(f"📋 Total contracts to review: {sum(counts.values())}\n")
+    report.write("━━━━━━━━━━━━━━━━━━━━━\n")
+
+def build_digest(expirations, projects):
+    """Full report of every contract in a bucket, grouped by project, or None when there are none"""
+    if not projects:
+        return None
     
-    # Get today's date in Manila timezone
-    manila_tz = timezone(timedelta(hours=8))
-    today = datetime.now(manila_tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    # Build alert message with traffic light colors - GROUPED BY PROJECT
+    report = ReportBuilder()
+    report.section("🚦 *CONTRACT EXPIRATION ALERTS* 🚦\n\n")
     
-    # Calculate future dates
-    days_30 = today + timedelta(days=30)
-    days_60 = today + timedelta(days=60)
-    days_90 = today + timedelta(days=90)
+    # Projects sorted alphabetically, one report section per project, most urgent first within it
+    for project, rows in projects.items():
+        report.section(f"📁 *{project}*\n")
+        for row in rows:
+            write_contract(report, expirations, row)
+        report.write("\n")
     
-    print(f"Today: {today.strftime('%Y-%m-%d')}")
-    print(f"30 days: {days_30.strftime('%Y-%m-%d')}")
-    print(f"60 days: {days_60.strftime('%Y-%m-%d')}")
-    print(f"90 days: {days_90.strftime('%Y-%m-%d')}")
+    write_summary(report, expirations)
+    report.write("💼 Please review and take necessary action for contract renewals.")
+    return report
+
+def build_changes(expirations, changes):
+    """Compact report of the contracts that moved since the last run, or None when nothing did"""
+    if not any(changes.values()):
+        return None
+    batch = expirations.batch
     
-    # Get all employees
-    employees = get_employees_with_contracts()
+    report = ReportBuilder()
+    report.section("🚦 *CONTRACT ALERT CHANGES* 🚦\n\n")
     
-    # Categorize by expiration timeframe (including past dates)
-    expiring_30 = []
-    expiring_60 = []
-    expiring_90 = []
-    expired = []
+    for key, emoji, name in BUCKETS:
+        rows = sorted(changes[key], key=lambda row: ((batch.projects[row] or 'No Project'), expirations.ends[row]))
+        if rows:
+            report.section(f"{emoji} *Newly {name.lower()}* ({len(rows)})\n")
+            for row in rows:
+                report.write(f"{emoji} {batch.names[row]} ({batch.projects[row] or 'No Project'}) - "
+                             f"{expirations.end_date(row).strftime('%Y-%m-%d')}, {expirations.label(row)}\n")
     
-    for emp in employees:
-        try:
-            contract_date = datetime.strptime(emp['contract_end_date'], '%Y-%m-%d')
-            contract_date = contract_date.replace(tzinfo=manila_tz)
-            days_until = (contract_date - today).days
-            
-            emp['days_until'] = days_until
-            
-            # Include all expired contracts (any date before today)
-            if days_until < 0:
-                expired.append(emp)
-            elif days_until <= 30:
-                expiring_30.append(emp)
-            elif days_until <= 60:
-                expiring_60.append(emp)
-            elif days_until <= 90:
-                expiring_90.append(emp)
-                
-        except ValueError:
-            continue
+    if changes['renewed']:
+        report.section(f"✅ *Renewed* ({len(changes['renewed'])})\n")
+        for row, old_end in changes['renewed']:
+            report.write(f"✅ {batch.names[row]} ({batch.projects[row] or 'No Project'}) - "
+                         f"{old_end.strftime('%Y-%m-%d')} → {expirations.end_date(row).strftime('%Y-%m-%d')}\n")
     
-    # Build and post alert message with traffic light colors - GROUPED BY PROJECT
-    if expired or expiring_30 or expiring_60 or expiring_90:
-        message = "🚦 *CONTRACT EXPIRATION ALERTS* 🚦\n\n"
-        
-        # Combine all lists with their traffic light status
-        all_alerts = []
-        for emp in expired:
-            emp['alert_type'] = 'expired'
-            emp['emoji'] = '⚫'
-            emp['label'] = 'EXPIRED - NEEDS RENEWAL'
-            all_alerts.append(emp)
-        for emp in expiring_30:
-            emp['alert_type'] = 'red'
-            emp['emoji'] = '🔴'
-            emp['label'] = 'RED ALERT - 30 DAYS'
-            all_alerts.append(emp)
-        for emp in expiring_60:
-            emp['alert_type'] = 'orange'
-            emp['emoji'] = '🟠'
-            emp['label'] = 'ORANGE ALERT - 60 DAYS'
-            all_alerts.append(emp)
-        for emp in expiring_90:
-            emp['alert_type'] = 'yellow'
-            emp['emoji'] = '🟡'
-            emp['label'] = 'YELLOW ALERT - 90 DAYS'
-            all_alerts.append(emp)
-        
-        # Group by project
-        projects = {}
-        for emp in all_alerts:
-            project = emp['project'] or 'No Project'
-            if project not in projects:
-                projects[project] = []
-            projects[project].append(emp)
-        
-        # Sort projects alphabetically
-        for project in sorted(projects.keys()):
-            message += f"📁 *{project}*\n"
-            
-            # Sort employees within project by days_until (most urgent first)
-            for emp in sorted(projects[project], key=lambda x: x['days_until']):
-                message += f"{emp['emoji']} {emp['name']} - {emp['position']}\n"
-                message += f"   Contract End Date: {emp['contract_end_date']} ({emp['label']})\n"
-                if emp['days_until'] >= 0:
-                    message += f"   Days remaining: {emp['days_until']}\n"
-                else:
-                    message += f"   Expired {abs(emp['days_until'])} days ago\n"
-                message += f"   Status: {emp['contract_status']}\n\n"
-            
-            message += "\n"
-        
-        message += "━━━━━━━━━━━━━━━━━━━━━\n"
-        message += f"📊 *Summary*\n"
-        message += f"⚫ Expired: {len(expired)}\n"
-        message += f"🔴 Red (30 days): {len(expiring_30)}\n"
-        message += f"🟠 Orange (60 days): {len(expiring_60)}\n"
-        message += f"🟡 Yellow (90 days): {len(expiring_90)}\n"
-        message += f"📋 Total contracts to review: {len(all_alerts)}\n"
-        message += "━━━━━━━━━━━━━━━━━━━━━\n"
-        message += "💼 Please review and take necessary action for contract renewals."
-        
-        # Post to Slack
-        if post_to_slack(message):
-            print("✅ Contract expiration alerts posted to Slack!")
-        else:
-            print("❌ Failed to post to Slack")
+    if changes['removed']:
+        report.section(f"👋 *No longer on the board* ({len(changes['removed'])})\n")
+        for name, project, bucket, old_end in sorted(changes['removed'], key=lambda removed: (removed[1] or '', removed[0])):
+            report.write(f"👋 {name} ({project or 'No Project'}) - was {bucket}, ending {old_end.strftime('%Y-%m-%d')}\n")
+    
+    write_summary(report, expirations)
+    report.write("💡 Changes since the last run, `python contract_expiration_bot.py digest` posts the full list.")
+    return report
+
+def manila_today():
+    """Today's date in Manila"""
+    manila_tz = timezone(timedelta(hours=8))
+    return datetime.now(manila_tz).date()
+
+def get_end_date_index(ttl=CACHE_TTL):
+    """The stored end date index while it is younger than the TTL, otherwise rebuilt from the board"""
+    index = EndDateIndex.load()
+    if index and ttl > 0 and time.time() - index.built_at < ttl:
+        print(f"📦 Using stored contract index ({len(index)} contracts)")
+        return index
+    
+    batch = get_employees_with_contracts()
+    if not batch:
+        if index:
+            print(f"⚠️ Could not refresh contracts, using the stored index from {datetime.fromtimestamp(index.built_at):%Y-%m-%d %H:%M}")
+            return index
+        return EndDateIndex([], [])
+    index = EndDateIndex.build(batch, batch.end_ordinals())
+    index.save()
+    return index
+
+def print_contracts(contracts):
+    """Print (end date, name, project, position, status) rows"""
+    for end_date, name, project, position, status in contracts:
+        print(f"  {end_date.strftime('%Y-%m-%d')}  {name} - {position} ({project or 'No Project'}) {status}")
+    print(f"📋 {len(contracts)} contract(s)")
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else 'check'
+    
+    if command == 'check':
+        with run_report('contract_expiration_bot'):
+            check_contract_expirations()
+    elif command == 'digest':
+        with run_report('contract_expiration_bot'):
+            check_contract_expirations(digest=True)
+    elif command == 'window' and len(argv) > 3:
+        first, last = date.fromisoformat(argv[2]), date.fromisoformat(argv[3])
+        print(f"📅 Contracts ending from {first} to {last}:")
+        print_contracts(get_end_date_index().window(first, last))
+    elif command == 'expired' and len(argv) > 2:
+        cutoff = manila_today() - timedelta(days=int(argv[2]))
+        print(f"⚫ Contracts expired more than {argv[2]} days ago (before {cutoff}):")
+        print_contracts(get_end_date_index().expired_before(cutoff))
+    elif command == 'forecast':
+        months = int(argv[2]) if len(argv) > 2 else 6
+        print(f"🔮 Renewals due over the next {months} month(s):")
+        for month, count, projects in get_end_date_index().forecast(manila_today(), months):
+            top = ', '.join(f"{project} {n}" for project, n in sorted(projects.items(), key=lambda p: -p[1])[:5])
+            print(f"  {month}: {count:>4}{f'  ({top})' if top else ''}")
     else:
-        print("ℹ️ No contracts expiring in the next 90 days")
+        print(__doc__)
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    check_contract_expirations()
+    sys.exit(main(sys.argv))
@@ -0,0 +1,285 @@
+"""
+Batch contract expiration engine
+Holds the roster as columns (start date, duration in months, project) and
+computes month-end clamped end dates, days remaining and alert buckets for
+every contract in one pass over those columns, with no retry loops, then
+groups the alerts by project.
+
+Bucket thresholds can differ per project, and the end dates are kept in a
+sorted index stored next to the board cache that answers window queries
+("ending between D1 and D2", "expired more than N days ago") and monthly
+renewal forecasts with a bisect per boundary.
+
+The bucket each contract was in at the last announcement is stored too, so a
+run can announce only what moved: newly expired or more urgent contracts,
+renewals (a later end date) and contracts that left the board.
+"""
+
+import os
+import json
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from board_cache import CACHE_DIR, temp_path
+
+# Configuration
+INDEX_PATH = os.path.join(CACHE_DIR, "contract_index.json")
+STATE_PATH = os.path.join(CACHE_DIR, "contract_alert_state.json")
+DEFAULT_THRESHOLDS = (30, 60, 90)  # last day remaining that is red, orange and yellow
+# Per project overrides as JSON, e.g. {"Acme": [60, 120, 180]}, a "default" entry replaces DEFAULT_THRESHOLDS
+THRESHOLDS_JSON = os.environ.get('CONTRACT_THRESHOLDS', '')
+
+# Alert buckets, most urgent first: (key, emoji, name), the expired bucket takes everything before today
+BUCKETS = (
+    ('expired', '⚫', 'EXPIRED'),
+    ('red', '🔴', 'RED'),
+    ('orange', '🟠', 'ORANGE'),
+    ('yellow', '🟡', 'YELLOW'),
+)
+NO_ALERT = len(BUCKETS)  # bucket index of contracts further out than the last bucket
+
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def add_months(start, months):
+    """Date a number of months after start, clamped to the end of a shorter month (Jan 31 + 1 = Feb 28)"""
+    year, month = divmod(start.year * 12 + start.month - 1 + months, 12)
+    month += 1
+    leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    return date(year, month, min(start.day, _DAYS_IN_MONTH[month] + (month == 2 and leap)))
+
+
+class Thresholds:
+    """Red, orange and yellow day limits, a default plus overrides per project"""
+
+    def __init__(self, default=DEFAULT_THRESHOLDS, projects=None):
+        self.default = self._validate('default', default)
+        self.projects = {project: self._validate(project, limits) for project, limits in (projects or {}).items()}
+        self.max_days = max([self.default[-1]] + [limits[-1] for limits in self.projects.values()])
+
+    @staticmethod
+    def _validate(project, limits):
+        limits = tuple(int(limit) for limit in limits)
+        if len(limits) != NO_ALERT - 1 or list(limits) != sorted(set(limits)) or limits[0] < 0:
+            raise ValueError(f"Contract thresholds for '{project}' must be {NO_ALERT - 1} increasing day counts, got {list(limits)}")
+        return limits
+
+    @classmethod
+    def from_json(cls, text):
+        """Thresholds from a JSON object of project -> limits, '' gives the defaults"""
+        projects = json.loads(text) if text else {}
+        default = projects.pop('default', DEFAULT_THRESHOLDS)
+        return cls(default, projects)
+
+    def limits(self, project):
+        """The day limits for a project"""
+        return self.projects.get(project, self.default)
+
+    def bounds(self, project):
+        """Upper bounds of every bucket for a project, for bisecting days remaining"""
+        return (-1,) + self.limits(project)
+
+    def label(self, bucket, project):
+        """Alert label of a bucket for a project, e.g. RED ALERT - 30 DAYS"""
+        if bucket == 0:
+            return 'EXPIRED - NEEDS RENEWAL'
+        return f"{BUCKETS[bucket][2]} ALERT - {self.limits(project)[bucket - 1]} DAYS"
+
+
+class ContractBatch:
+    """Contracts as parallel columns, rows are appended once and evaluated together"""
+
+    def __init__(self):
+        self.keys = []  # stable identity per contract, the board item id
+        self.names = []
+        self.projects = []
+        self.details = []  # per row payload for reports, e.g. position and status
+        self.starts = []
+        self.durations = []
+
+    def append(self, key, name, project, start, duration_months, details=None):
+        """Add one contract, identified by key, starting on a date and running a number of months"""
+        self.keys.append(key)
+        self.names.append(name)
+        self.projects.append(project)
+        self.details.append(details)
+        self.starts.append(start)
+        self.durations.append(duration_months)
+
+    def __len__(self):
+        return len(self.names)
+
+    def end_ordinals(self):
+        """Proleptic ordinal (date.toordinal) of every contract's end date"""
+        return [add_months(start, months).toordinal() for start, months in zip(self.starts, self.durations)]
+
+    def evaluate(self, today, thresholds=None, ends=None):
+        """End dates, days remaining and bucket of every contract as of today"""
+        thresholds = thresholds or Thresholds()
+        ends = self.end_ordinals() if ends is None else ends
+        today_ordinal = today.toordinal()
+        days = [end - today_ordinal for end in ends]
+        if thresholds.projects:
+            bounds = {project: thresholds.bounds(project) for project in set(self.projects)}
+            labels = [bisect_left(bounds[project], remaining) for project, remaining in zip(self.projects, days)]
+        else:
+            limits = thresholds.bounds(None)
+            labels = [bisect_left(limits, remaining) for remaining in days]
+        return Expirations(self, ends, days, labels, thresholds)
+
+
+class Expirations:
+    """Evaluated contracts: end date ordinals, days remaining and bucket index per row"""
+
+    def __init__(self, batch, ends, days, labels, thresholds):
+        self.batch = batch
+        self.ends = ends
+        self.days = days
+        self.labels = labels
+        self.thresholds = thresholds
+
+    def end_date(self, row):
+        """End date of a row as a date"""
+        return date.fromordinal(self.ends[row])
+
+    def counts(self):
+        """Number of contracts in each bucket, by bucket key"""
+        counts = [0] * (NO_ALERT + 1)
+        for label in self.labels:
+            counts[label] += 1
+        return {bucket[0]: counts[i] for i, bucket in enumerate(BUCKETS)}
+
+    def label(self, row):
+        """Alert label of a row"""
+        return self.thresholds.label(self.labels[row], self.batch.projects[row])
+
+    def by_project(self, order, default='No Project'):
+        """Alert rows grouped by project, projects sorted by name and rows in the given order (most urgent first)"""
+        projects = {}
+        labels = self.labels
+        for row in order:
+            if labels[row] < NO_ALERT:
+                projects.setdefault(self.batch.projects[row] or default, []).append(row)
+        return {project: projects[project] for project in sorted(projects)}
+
+    def state(self):
+        """Bucket, end ordinal, name and project of every contract by key, as stored between runs"""
+        batch = self.batch
+        return {
+            key: [label, end, name, project]
+            for key, label, end, name, project in zip(batch.keys, self.labels, self.ends, batch.names, batch.projects)
+        }
+
+    def changes(self, previous):
+        """What moved since a stored state: {bucket key: [rows newly in it], 'renewed': [(row, old end date)],
+        'removed': [(name, project, old bucket key, old end date)]}"""
+        changes = {bucket[0]: [] for bucket in BUCKETS}
+        changes['renewed'] = []
+        changes['removed'] = []
+        seen = set()
+        for row, (key, label, end) in enumerate(zip(self.batch.keys, self.labels, self.ends)):
+            seen.add(key)
+            before = previous.get(key)
+            if before and end > before[1]:
+                # A later end date is a renewal, worth announcing when the old one was on the alert list
+                if before[0] < NO_ALERT:
+                    changes['renewed'].append((row, date.fromordinal(before[1])))
+            elif label < NO_ALERT and (not before or label < before[0]):
+                changes[BUCKETS[label][0]].append(row)
+
+        for key, (label, end, name, project) in previous.items():
+            if key not in seen and label < NO_ALERT:
+                changes['removed'].append((name, project, BUCKETS[label][0], date.fromordinal(end)))
+        return changes
+
+
+def load_alert_state(path=STATE_PATH):
+    """The stored alert state ({'contracts': {...}, 'digest_at': ...}), empty when there is none"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_alert_state(state, path=STATE_PATH):
+    """Write the alert state to disk atomically"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = temp_path(path)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+class EndDateIndex:
+    """Contract end dates sorted once, with each contract's name, project, position and status alongside"""
+
+    def __init__(self, ends, entries, built_at=None, rows=None):
+        self.ends = ends
+        self.entries = entries
+        self.built_at = built_at or time.time()
+        self.rows = rows  # batch row of each entry when built from a batch in this run
+
+    @classmethod
+    def build(cls, batch, ends):
+        """Index a batch by the end ordinals computed for it"""
+        rows = sorted(range(len(batch)), key=ends.__getitem__)
+        entries = []
+        for row in rows:
+            position, status = batch.details[row] or ('', '')
+            entries.append([batch.names[row], batch.projects[row], position, status])
+        return cls([ends[row] for row in rows], entries, rows=rows)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        """Load a stored index, or None if there is none"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data['ends'], data['entries'], data['built_at'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path=INDEX_PATH):
+        """Write the index to disk atomically"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = temp_path(path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'built_at': self.built_at, 'ends': self.ends, 'entries': self.entries}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return len(self.ends)
+
+    def span(self, first=None, last=None):
+        """Positions [lo, hi) of the contracts ending from first to last inclusive, either end open when None"""
+        lo = bisect_left(self.ends, first.toordinal()) if first else 0
+        hi = bisect_right(self.ends, last.toordinal()) if last else len(self.ends)
+        return lo, max(lo, hi)
+
+    def window(self, first=None, last=None):
+        """(end date, name, project, position, status) of the contracts ending from first to last, soonest first"""
+        lo, hi = self.span(first, last)
+        return [(date.fromordinal(self.ends[i]), *self.entries[i]) for i in range(lo, hi)]
+
+    def expired_before(self, day):
+        """Contracts that ended before a date, oldest first"""
+        return self.window(None, date.fromordinal(day.toordinal() - 1))
+
+    def forecast(self, start, months):
+        """Renewals due per month from start on (the first month counts from start), as [(YYYY-MM, count, {project: count}), ...]"""
+        forecast = []
+        year, month = start.year, start.month
+        lo = bisect_left(self.ends, start.toordinal())
+        for _ in range(months):
+            label = f"{year}-{month:02d}"
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            hi = bisect_left(self.ends, date(year, month, 1).toordinal())
+            projects = {}
+            for i in range(lo, hi):
+                project = self.entries[i][1] or 'No Project'
+                projects[project] = projects.get(project, 0) + 1
+            forecast.append((label, hi - lo, projects))
+            lo = hi
+        return forecast
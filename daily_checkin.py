@@ -1,11 +1,10 @@
-import os
-import json
-import urllib.request
 import random
 from datetime import datetime, timezone, timedelta
 
+from run_ledger import RunLedger, post_once
+from instrumentation import run_report
+
 # Configuration
-SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
 SLACK_CHANNEL = "recruitmentteam-suicidesquad"
 
 # Motivational Quotes
@@ -53,37 +52,6 @@ FUN_FACTS = [
     "Your brain uses 20% of your body's energy but only makes up 2% of your body weight. 🧠"
 ]
 
-def post_to_slack(message):
-    """Post message to Slack channel"""
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "channel": SLACK_CHANNEL,
-        "text": message,
-        "unfurl_links": False
-    }
-    
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode('utf-8'),
-        headers=headers
-    )
-    
-    try:
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            if result.get("ok"):
-                return True
-            else:
-                print(f"Error posting to Slack: {result.get('error')}")
-                return False
-    except Exception as e:
-        print(f"Error posting to Slack: {e}")
-        return False
-
 def get_daily_message():
     """Get the appropriate message based on day of week"""
     manila_tz = timezone(timedelta(hours=8))
@@ -164,10 +132,13 @@ def send_daily_checkin():
     
     message = get_daily_message()
     
-    if post_to_slack(message):
-        print("✅ Daily check-in posted successfully!")
-    else:
+    # The message is random, so the ledger keys on the check-in itself rather than its text
+    result = post_once(RunLedger('daily_checkin'), SLACK_CHANNEL, message, content='checkin')
+    if not result:
         print("❌ Failed to post daily check-in")
+    elif result.attempts:
+        print("✅ Daily check-in posted successfully!")
 
 if __name__ == "__main__":
-    send_daily_checkin()
+    with run_report('daily_checkin'):
+        send_daily_checkin()
@@ -0,0 +1,126 @@
+"""
+Shared date parsing for Monday.com column text
+Detects the format with precompiled patterns instead of trying strptime
+formats one by one, memoizes repeated strings, and learns per column whether
+numeric dates are written month-first or day-first. Values that could be
+read either way (03/04/2025) are flagged instead of silently taking the
+first format that happens to parse. Until a column shows an unambiguous value
+they are read in the default order and are not revisited once it does.
+"""
+
+import re
+from datetime import date
+from functools import lru_cache
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'june': 6, 'july': 7,
+    'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12
+}
+
+ISO_RE = re.compile(r'^(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:[T ].*)?$')           # 2026-10-19, 2026/10/19
+NUMERIC_RE = re.compile(r'^(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}|\d{2})$')          # 10/19/2026, 19/10/26
+MONTH_NAME_RE = re.compile(r'^([A-Za-z]{3,9})\.? +(\d{1,2}),? +(\d{4})$')         # Oct 19, 2026
+DAY_MONTH_NAME_RE = re.compile(r'^(\d{1,2}) +([A-Za-z]{3,9})\.?,? +(\d{4})$')     # 19 Oct 2026
+
+MONTH_FIRST = 'mdy'
+DAY_FIRST = 'dmy'
+
+
+def _year(text):
+    """Expand two-digit years the way strptime's %y does"""
+    year = int(text)
+    if len(text) == 2:
+        year += 1900 if year >= 69 else 2000
+    return year
+
+
+def _make_date(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def _candidates(text):
+    """Parse a date string into (month-first, day-first) readings, either may be None"""
+    match = ISO_RE.match(text)
+    if match:
+        parsed = _make_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        return parsed, parsed
+
+    match = NUMERIC_RE.match(text)
+    if match:
+        first, second, year = int(match.group(1)), int(match.group(2)), _year(match.group(3))
+        return _make_date(year, first, second), _make_date(year, second, first)
+
+    match = MONTH_NAME_RE.match(text)
+    if match:
+        month = MONTHS.get(match.group(1).lower())
+        parsed = _make_date(int(match.group(3)), month, int(match.group(2))) if month else None
+        return parsed, parsed
+
+    match = DAY_MONTH_NAME_RE.match(text)
+    if match:
+        month = MONTHS.get(match.group(2).lower())
+        parsed = _make_date(int(match.group(3)), month, int(match.group(1))) if month else None
+        return parsed, parsed
+
+    return None, None
+
+
+class DateParser:
+    """Parses dates and remembers, per column, which numeric order the data uses"""
+
+    def __init__(self, default_order=MONTH_FIRST):
+        self.default_order = default_order
+        self.column_orders = {}
+        self.ambiguous = set()
+
+    def learn(self, column, order):
+        """Record that a column writes numeric dates in the given order"""
+        if column is not None:
+            self.column_orders.setdefault(column, order)
+
+    def parse(self, text, column=None):
+        """Parse a date string into a datetime.date, or None"""
+        if not text:
+            return None
+        month_first, day_first = _candidates(text.strip())
+
+        if month_first == day_first:
+            return month_first
+        if month_first is None:
+            self.learn(column, DAY_FIRST)
+            return day_first
+        if day_first is None:
+            self.learn(column, MONTH_FIRST)
+            return month_first
+
+        # Both readings are valid dates: trust what the column has shown so far
+        order = self.column_orders.get(column)
+        if order is None:
+            order = self.default_order
+            if (column, text) in self.ambiguous:
+                return month_first if order == MONTH_FIRST else day_first
+            self.ambiguous.add((column, text))
+            print(f"      ⚠️ Ambiguous date '{text}'{f' in {column}' if column else ''}, reading it as "
+                  f"{'month/day' if order == MONTH_FIRST else 'day/month'} before the column's order is known, "
+                  f"it may be misread")
+        return month_first if order == MONTH_FIRST else day_first
+
+
+_default_parser = DateParser()
+
+
+def parse_date(text, column=None):
+    """Parse a date string into a datetime.date, or None"""
+    return _default_parser.parse(text, column)
+
+
+def parse_date_to_iso(text, column=None):
+    """Convert various date formats to YYYY-MM-DD ('' if unparseable)"""
+    parsed = parse_date(text, column)
+    return parsed.isoformat() if parsed else ""
@@ -0,0 +1,139 @@
+"""
+Compact employee records built from Monday.com board items
+A schema resolves a bot's column spec once per board into a column id -> slot
+map, and every item is parsed once into a __slots__ record holding its texts,
+raw values and already parsed dates, so bot logic never re-walks the JSON.
+"""
+
+import json
+
+from instrumentation import accumulate
+from column_spec import resolve_columns, projection
+from date_parser import parse_date
+
+
+def _parse_date(text, value, column):
+    """Parse a date column, preferring the ISO date in its JSON value"""
+    if value and '"date"' in value:
+        try:
+            parsed = parse_date(json.loads(value).get('date'))
+            if parsed:
+                return parsed
+        except (ValueError, TypeError, AttributeError):
+            pass
+    return parse_date(text, column)
+
+
+class EmployeeSchema:
+    """Field layout for one board: field names, column id -> slot map and which fields are dates"""
+
+    __slots__ = ('board_id', 'fields', 'slots', 'column_slots', 'date_slots')
+
+    def __init__(self, board_id, resolved, date_fields=()):
+        self.board_id = str(board_id)
+        self.fields = tuple(resolved)
+        self.slots = {field: i for i, field in enumerate(self.fields)}
+        self.column_slots = {}
+        for i, field in enumerate(self.fields):
+            for col_id in resolved[field]:
+                # A column feeds the first field in the spec that claims it
+                self.column_slots.setdefault(col_id, i)
+        self.date_slots = frozenset(self.slots[field] for field in date_fields)
+
+    @classmethod
+    def for_board(cls, board_id, spec, date_fields=()):
+        """Resolve a column spec against the board and build its schema"""
+        return cls(board_id, resolve_columns(board_id, spec), date_fields)
+
+    def item_fields(self, extra_fields="id\nname", column_fields="id text value"):
+        """GraphQL item selection that projects only this schema's columns"""
+        resolved = {}
+        for col_id, slot in self.column_slots.items():
+            resolved.setdefault(self.fields[slot], []).append(col_id)
+        return projection(resolved, extra_fields, column_fields)
+
+    def parse(self, item, group=None):
+        """Parse one raw board item into an Employee"""
+        with accumulate('parse'):
+            return self._parse(item, group)
+
+    def _parse(self, item, group):
+        count = len(self.fields)
+        texts = [''] * count
+        values = [None] * count
+
+        for col in item.get('column_values') or ():
+            slot = self.column_slots.get(col.get('id'))
+            if slot is None:
+                continue
+            text = (col.get('text') or '').strip()
+            # Later columns only override earlier ones when they have something to say
+            if text or not texts[slot]:
+                texts[slot] = text
+                values[slot] = col.get('value') or values[slot]
+
+        dates = None
+        if self.date_slots:
+            dates = [None] * count
+            for slot in self.date_slots:
+                if texts[slot] or values[slot]:
+                    dates[slot] = _parse_date(texts[slot], values[slot], (self.board_id, self.fields[slot]))
+
+        extra = {key: val for key, val in item.items() if key not in ('id', 'name', 'column_values')}
+
+        return Employee(
+            self,
+            str(item.get('id') or ''),
+            (item.get('name') or '').strip(),
+            group['id'] if group else None,
+            group['title'] if group else None,
+            texts,
+            values,
+            dates,
+            extra or None
+        )
+
+    def parse_all(self, items):
+        """Parse (group, item) pairs or bare items into a compact list of Employees"""
+        employees = []
+        for entry in items:
+            if isinstance(entry, tuple):
+                employees.append(self.parse(entry[1], entry[0]))
+            else:
+                employees.append(self.parse(entry))
+        return employees
+
+
+class Employee:
+    """One board item with its projected columns parsed once"""
+
+    __slots__ = ('schema', 'item_id', 'name', 'group_id', 'group_title', 'texts', 'values', 'dates', 'extra')
+
+    def __init__(self, schema, item_id, name, group_id, group_title, texts, values, dates, extra):
+        self.schema = schema
+        self.item_id = item_id
+        self.name = name
+        self.group_id = group_id
+        self.group_title = group_title
+        self.texts = texts
+        self.values = values
+        self.dates = dates
+        self.extra = extra
+
+    def text(self, field):
+        """Column text for a field ('' when empty)"""
+        return self.texts[self.schema.slots[field]]
+
+    def value(self, field):
+        """Raw JSON value for a field (None when empty)"""
+        return self.values[self.schema.slots[field]]
+
+    def date(self, field):
+        """Parsed datetime.date for a date field (None when missing or unparseable)"""
+        return self.dates[self.schema.slots[field]] if self.dates else None
+
+    def __getitem__(self, field):
+        return self.text(field)
+
+    def __repr__(self):
+        return f"Employee({self.name!r}, {dict(zip(self.schema.fields, self.texts))!r})"
@@ -0,0 +1,275 @@
+"""
+Run instrumentation
+Records spans (fetch, parse, match, render, send), every HTTP call to
+Monday.com and Slack with its latency and size, the Monday complexity each
+query consumed and Slack's rate limit responses, then writes one JSON report
+per bot run. Outside a run every hook is a cheap no-op. Pool threads record
+into their caller's run when their task is wrapped with bind().
+
+Usage:
+    python instrumentation.py [bot]
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from datetime import datetime, timezone
+
+# Configuration
+RUN_REPORT_DIR = os.environ.get('RUN_REPORT_DIR', 'run_reports')  # empty to skip writing reports
+MAX_TIMELINE = 500  # individual spans kept in a report, the totals always cover all of them
+
+_current = contextvars.ContextVar('instrumentation_run', default=None)
+_open_spans = contextvars.ContextVar('instrumentation_open_spans', default=frozenset())
+
+
+class Run:
+    """Everything recorded during one bot run"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.started_at = time.time()
+        self.clock = time.perf_counter()
+        self.lock = threading.Lock()
+        self.spans = {}
+        self.timeline = []
+        self.http = {}
+        self.complexity = {'queries': 0, 'consumed': 0, 'budget_left': None, 'reset_in_seconds': None}
+        self.rate_limits = {'rate_limited': 0, 'retry_after_seconds': 0.0, 'headers': {}}
+        self.counters = {}
+
+    def add_span(self, name, started, seconds, attrs, timeline=True):
+        with self.lock:
+            totals = self.spans.setdefault(name, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            totals['count'] += 1
+            totals['seconds'] += seconds
+            totals['max_seconds'] = max(totals['max_seconds'], seconds)
+            if timeline and len(self.timeline) < MAX_TIMELINE:
+                span = {'name': name, 'start': round(started - self.clock, 4), 'seconds': round(seconds, 4)}
+                if attrs:
+                    span['attrs'] = attrs
+                self.timeline.append(span)
+
+    def add_http(self, service, operation, seconds, status, sent, received, headers):
+        with self.lock:
+            stats = self.http.setdefault(service, {
+                'requests': 0, 'errors': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                'bytes_sent': 0, 'bytes_received': 0, 'operations': {}
+            })
+            stats['requests'] += 1
+            stats['errors'] += 0 if status == 200 else 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            stats['bytes_sent'] += sent
+            stats['bytes_received'] += received
+            op = stats['operations'].setdefault(operation, {'requests': 0, 'seconds': 0.0})
+            op['requests'] += 1
+            op['seconds'] += seconds
+
+            if headers:
+                if status == 429:
+                    self.rate_limits['rate_limited'] += 1
+                    try:
+                        self.rate_limits['retry_after_seconds'] += float(headers.get('retry-after') or 0)
+                    except ValueError:
+                        pass
+                for key, value in headers.items():
+                    if key.startswith('x-ratelimit'):
+                        self.rate_limits['headers'][key] = value
+
+    def add_complexity(self, complexity):
+        with self.lock:
+            self.complexity['queries'] += 1
+            self.complexity['consumed'] += complexity.get('query') or 0
+            if complexity.get('after') is not None:
+                self.complexity['budget_left'] = complexity['after']
+            if complexity.get('reset_in_x_seconds') is not None:
+                self.complexity['reset_in_seconds'] = complexity['reset_in_x_seconds']
+
+    def add_count(self, name, n):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self, status, error=None):
+        """The run as a JSON-serialisable dict"""
+        def rounded(stats):
+            return {key: round(value, 4) if isinstance(value, float) else value for key, value in stats.items()}
+
+        with self.lock:
+            http = {}
+            for service, stats in self.http.items():
+                http[service] = dict(rounded(stats), operations={
+                    op: rounded(op_stats) for op, op_stats in stats['operations'].items()
+                })
+            return {
+                'bot': self.bot,
+                'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+                'duration_seconds': round(time.perf_counter() - self.clock, 4),
+                'status': status,
+                'error': error,
+                'spans': {name: rounded(totals) for name, totals in self.spans.items()},
+                'http': http,
+                'monday_complexity': dict(self.complexity),
+                'slack_rate_limits': rounded(self.rate_limits),
+                'counters': dict(self.counters),
+                'timeline': list(self.timeline)
+            }
+
+
+def current():
+    """The run being recorded in this context, or None"""
+    return _current.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a block as a named span of the current run, a span nested in one of the same name is part of it"""
+    run = _current.get()
+    open_spans = _open_spans.get()
+    if run is None or name in open_spans:
+        yield
+        return
+    token = _open_spans.set(open_spans | {name})
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _open_spans.reset(token)
+        run.add_span(name, started, time.perf_counter() - started, attrs)
+
+
+@contextmanager
+def accumulate(name):
+    """Like span, for per-item work: adds to the span's totals without filling the timeline"""
+    run = _current.get()
+    if run is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add_span(name, started, time.perf_counter() - started, None, timeline=False)
+
+
+def timed(name):
+    """Decorator recording every call of a function as a span"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    """Add to a named counter of the current run"""
+    run = _current.get()
+    if run is not None:
+        run.add_count(name, n)
+
+
+def record_http(service, operation, seconds, status, sent=0, received=0, headers=None):
+    """Record one HTTP request, status None for a request that never got a response"""
+    run = _current.get()
+    if run is not None:
+        run.add_http(service, operation, seconds, status, sent, received, headers)
+
+
+def record_complexity(complexity):
+    """Record the complexity block Monday.com returned with a query"""
+    run = _current.get()
+    if run is not None and isinstance(complexity, dict):
+        run.add_complexity(complexity)
+
+
+def bind(fn):
+    """Wrap one pool task so it runs in a copy of the caller's context (and records into its run),
+    a bound task must not run twice at once, so bind each submit separately"""
+    context = contextvars.copy_context()
+
+    def task(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return task
+
+
+def write_report(report, directory=RUN_REPORT_DIR):
+    """Write a run report as JSON, returns its path"""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    path = os.path.join(directory, f"{report['bot']}-{stamp}-{os.getpid()}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def summary_line(report):
+    """One line summary of a run report"""
+    parts = [f"{report['duration_seconds']:.2f}s"]
+    monday = report['http'].get('monday')
+    if monday:
+        consumed = report['monday_complexity']['consumed']
+        parts.append(f"{monday['requests']} Monday request(s), {monday['seconds']:.2f}s"
+                     f"{f', {consumed:,} complexity' if consumed else ''}")
+    slack = report['http'].get('slack')
+    if slack:
+        limited = report['slack_rate_limits']['rate_limited']
+        parts.append(f"{slack['requests']} Slack request(s), {slack['seconds']:.2f}s"
+                     f"{f', {limited} rate limited' if limited else ''}")
+    spans = ', '.join(f"{name} {totals['seconds']:.2f}s" for name, totals in report['spans'].items())
+    if spans:
+        parts.append(spans)
+    return f"{report['bot']} {report['status']}: " + ' | '.join(parts)
+
+
+@contextmanager
+def run_report(bot):
+    """Record everything inside the block as one run of a bot and write its report at the end"""
+    run = Run(bot)
+    token = _current.set(run)
+    status, error = 'ok', None
+    try:
+        yield run
+    except BaseException as e:
+        status, error = 'error', f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        report = run.report(status, error)
+        print(f"📈 {summary_line(report)}")
+        if RUN_REPORT_DIR:
+            try:
+                print(f"📈 Run report written to {write_report(report)}")
+            except OSError as e:
+                print(f"⚠️ Could not write run report: {e}")
+
+
+def main(argv):
+    bot = argv[1] if len(argv) > 1 else None
+    latest = {}
+    for path in sorted(glob.glob(os.path.join(RUN_REPORT_DIR or '.', '*.json'))):
+        try:
+            with open(path, 'r') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not bot or report.get('bot') == bot:
+            latest[report.get('bot')] = report
+
+    if not latest:
+        print("ℹ️ No run reports yet")
+        return 0
+    for report in latest.values():
+        print(f"{report['started_at']}  {summary_line(report)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
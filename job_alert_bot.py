@@ -1,200 +1,106 @@
-import os
-import json
-import urllib.request
-import urllib.parse
 from datetime import datetime, timezone, timedelta
 
+from monday_client import iter_group_items, MondayAPIError
+from board_cache import resolve_groups
+from employees import EmployeeSchema
+from slack_messages import ReportBuilder
+from run_ledger import RunLedger, this_week
+from instrumentation import run_report, timed
+from bot_log import get_logger, sampled, dump_enabled, dump_item
+
 # Configuration
-MONDAY_API_TOKEN = os.environ.get('MONDAY_API_TOKEN')
-SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
 BOARD_ID = "6239668497"
 SLACK_CHANNEL = "job-hirings"
 
-def query_monday(query):
-    """Query Monday.com API"""
-    url = "https://api.monday.com/v2"
-    headers = {
-        "Authorization": MONDAY_API_TOKEN,
-        "Content-Type": "application/json"
-    }
-    data = json.dumps({"query": query}).encode('utf-8')
-    
-    req = urllib.request.Request(url, data=data, headers=headers)
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read().decode('utf-8'))
-
-def post_to_slack(message, channel=SLACK_CHANNEL):
-    """Post message to Slack"""
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "channel": channel,
-        "text": message,
-        "unfurl_links": False
-    }
-    
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode('utf-8'),
-        headers=headers
-    )
-    
-    with urllib.request.urlopen(req) as response:
-        result = json.loads(response.read().decode('utf-8'))
-        return result.get("ok")
+log = get_logger('job_alert_bot')
 
-def parse_date_to_iso(date_str):
-    """Convert various date formats to YYYY-MM-DD"""
-    if not date_str:
-        return ""
-    
-    formats = [
-        '%Y-%m-%d',
-        '%b %d, %Y',
-        '%B %d, %Y',
-        '%m/%d/%Y',
-        '%m/%d/%y',
-        '%d/%m/%Y',
-        '%d/%m/%y',
-    ]
-    
-    for fmt in formats:
-        try:
-            parsed_date = datetime.strptime(date_str.strip(), fmt)
-            return parsed_date.strftime('%Y-%m-%d')
-        except ValueError:
-            continue
-    
-    return ""
+# Columns read from the jobs board
+JOB_COLUMNS = {
+    'role_status': 'status7',
+    'client': 'dropdown',
+    'top_5_skills': 'dropdown_mkxfm4d1',
+    'headcount': lambda col: any(key in col['id'].lower() for key in ('number', 'headcount', 'head_count')),
+    'job_listed_date': 'date_1_mkn7ny21'
+}
 
+@timed('fetch')
 def get_new_jobs():
     """Get new job postings from Active recruitment group"""
     print("🔍 Fetching job postings from Monday.com...")
     
-    query = f'''
-    {{
-      boards(ids: {BOARD_ID}) {{
-        groups {{
-          id
-          title
-          items_page(limit: 500) {{
-            items {{
-              id
-              name
-              column_values {{
-                id
-                text
-                value
-              }}
-            }}
-          }}
-        }}
-      }}
-    }}
-    '''
+    schema = EmployeeSchema.for_board(BOARD_ID, JOB_COLUMNS, date_fields=('job_listed_date',))
+    item_fields = schema.item_fields()
     
-    result = query_monday(query)
     new_jobs = []
-    
-    if 'errors' in result:
-        print(f"❌ API ERRORS:")
-        for error in result['errors']:
-            print(f"   - {error}")
-        return []
-    
-    if result.get('data') and result['data'].get('boards'):
-        groups = result['data']['boards'][0]['groups']
+    seen_groups = set()
+    
+    # Get today and time ranges in Manila timezone
+    manila_tz = timezone(timedelta(hours=8))
+    today = datetime.now(manila_tz)
+    three_days_ago = today - timedelta(days=3)
+    ninety_days_ago = today - timedelta(days=90)
+    
+    print(f"Looking for jobs added in last 3 days (since {three_days_ago.strftime('%Y-%m-%d')})")
+    print(f"And jobs open for 0-90+ days")
+    
+    try:
+        # Only process "Active Recruitment" group (case-insensitive)
+        group_ids = resolve_groups(BOARD_ID, lambda title: title.lower() == 'active recruitment')
+        if not group_ids:
+            return []
         
-        # Get today and time ranges in Manila timezone
-        manila_tz = timezone(timedelta(hours=8))
-        today = datetime.now(manila_tz)
-        three_days_ago = today - timedelta(days=3)
-        ninety_days_ago = today - timedelta(days=90)
-        
-        print(f"Looking for jobs added in last 3 days (since {three_days_ago.strftime('%Y-%m-%d')})")
-        print(f"And jobs open for 0-90+ days")
-        
-        for group in groups:
-            group_title = group.get('title', '')
+        for group, item in iter_group_items(BOARD_ID, item_fields, group_ids=group_ids):
+            if group['id'] not in seen_groups:
+                seen_groups.add(group['id'])
+                print(f"  Checking group: {group['title']}")
+            
+            emp = schema.parse(item, group)
+            job_title = emp.name
+            
+            # Debug: dump all columns to help identify the right IDs (LOG_DUMP_ITEMS=1)
+            if dump_enabled():
+                dump_item(f"    {job_title}", [
+                    (col.get('id', ''), (col.get('text') or '').strip())
+                    for col in item['column_values'] if (col.get('text') or '').strip()
+                ])
+            
+            # Check if Job Listed date exists (still required)
+            if not emp['job_listed_date']:
+                log.info("    ✗ %s: No 'Job Listed' date found", job_title, extra=sampled('job without listed date'))
+                continue
             
-            # Only process "Active Recruitment" group (case-insensitive)
-            if group_title.lower() != 'active recruitment':
-                print(f"  Skipping group: {group_title}")
+            listed_day = emp.date('job_listed_date')
+            if not listed_day:
+                log.info("    ✗ %s: Could not parse 'Job Listed' date: %s", job_title, emp['job_listed_date'],
+                         extra=sampled('bad job listed date'))
                 continue
+            listed_date = datetime(listed_day.year, listed_day.month, listed_day.day, tzinfo=manila_tz)
             
-            items = group['items_page']['items']
-            print(f"  Checking group: {group_title} ({len(items)} items)")
+            # Calculate age of job
+            job_age_days = (today - listed_date).days
             
-            for item in items:
-                job_title = item.get('name', '').strip()
-                job_id = item.get('id', '')
-                
-                role_status = ""
-                client = ""
-                top_5_skills = ""
-                headcount = ""
-                job_listed_date = ""
-                
-                for col in item['column_values']:
-                    col_id = col.get('id', '')
-                    col_text = (col.get('text') or '').strip()
-                    
-                    # Debug: print all columns to help identify the right IDs
-                    if col_text:
-                        print(f"      Column '{col_id}': {col_text}")
-                    
-                    # Map column IDs
-                    if col_id == 'status7':  # Role Status
-                        role_status = col_text
-                    elif col_id == 'dropdown':  # Client
-                        client = col_text
-                    elif col_id == 'dropdown_mkxfm4d1':  # Top 5 skills needed
-                        top_5_skills = col_text
-                    elif 'number' in col_id.lower() or 'headcount' in col_id.lower() or 'head_count' in col_id.lower():  # Headcount
-                        headcount = col_text
-                    elif col_id == 'date_1_mkn7ny21':  # Job Listed
-                        job_listed_date = col_text
-                
-                # Check if Job Listed date exists (still required)
-                if not job_listed_date:
-                    print(f"    ✗ {job_title}: No 'Job Listed' date found")
-                    continue
-                
-                job_listed_iso = parse_date_to_iso(job_listed_date)
-                if not job_listed_iso:
-                    print(f"    ✗ {job_title}: Could not parse 'Job Listed' date: {job_listed_date}")
-                    continue
-                
-                try:
-                    listed_date = datetime.strptime(job_listed_iso, '%Y-%m-%d')
-                    listed_date = listed_date.replace(tzinfo=manila_tz)
-                except:
-                    print(f"    ✗ {job_title}: Could not convert date")
-                    continue
-                
-                # Calculate age of job
-                job_age_days = (today - listed_date).days
-                
-                # Include jobs from 0 to 90+ days
-                # Alert specifically for jobs added in last 3 days
-                is_new = listed_date >= three_days_ago
-                
-                print(f"    ✓ {job_title} ({job_age_days} days old) {'🆕 NEW!' if is_new else ''}")
-                
-                new_jobs.append({
-                    'id': job_id,
-                    'title': job_title,
-                    'role_status': role_status,
-                    'client': client,
-                    'top_5_skills': top_5_skills,
-                    'headcount': headcount or "1",
-                    'created_at': listed_date.strftime('%B %d, %Y'),
-                    'job_age_days': job_age_days,
-                    'is_new': is_new
-                })
+            # Include jobs from 0 to 90+ days
+            # Alert specifically for jobs added in last 3 days
+            is_new = listed_date >= three_days_ago
+            
+            log.info("    ✓ %s (%d days old) %s", job_title, job_age_days, '🆕 NEW!' if is_new else '',
+                     extra=sampled('job'))
+            
+            new_jobs.append({
+                'id': emp.item_id,
+                'title': job_title,
+                'role_status': emp['role_status'],
+                'client': emp['client'],
+                'top_5_skills': emp['top_5_skills'],
+                'headcount': emp['headcount'] or "1",
+                'created_at': listed_date.strftime('%B %d, %Y'),
+                'job_age_days': job_age_days,
+                'is_new': is_new
+            })
+    except MondayAPIError as e:
+        print(f"❌ API ERRORS:")
+        print(f"   - {e}")
+        return []
     
     print(f"✅ Found {len(new_jobs)} job(s)")
     return new_jobs
@@ -217,50 +123,56 @@ def post_job_alerts():
     new_jobs.sort(key=lambda x: x['job_age_days'])
     regular_jobs.sort(key=lambda x: x['job_age_days'])
     
-    # Build message
-    message = f"*WEEKLY JOB OPENINGS*\n\n"
-    message += f"💰 Refer & earn a bonus when your referral is regularized!\n\n"
+    # Build report, one section per job so long lists split between jobs
+    report = ReportBuilder()
+    report.section(f"*WEEKLY JOB OPENINGS*\n\n")
+    report.write(f"💰 Refer & earn a bonus when your referral is regularized!\n\n")
     
     if new_jobs:
-        message += f"*NEW THIS WEEK* ({len(new_jobs)})\n\n"
+        heading = f"*NEW THIS WEEK* ({len(new_jobs)})\n\n"
         
         for job in new_jobs:
-            message += f"• *{job['title']}*\n"
+            report.section(heading)
+            heading = ""
+            report.write(f"• *{job['title']}*\n")
             
             if job['top_5_skills']:
-                message += f"  Skills: {job['top_5_skills']}\n"
+                report.write(f"  Skills: {job['top_5_skills']}\n")
             
             if job['headcount']:
-                message += f"  Headcount: {job['headcount']}\n"
+                report.write(f"  Headcount: {job['headcount']}\n")
             
-            message += f"  Posted: {job['created_at']}\n\n"
+            report.write(f"  Posted: {job['created_at']}\n\n")
     
     if regular_jobs:
-        message += f"\n*ALL ACTIVE OPENINGS* ({len(regular_jobs)})\n\n"
+        heading = f"\n*ALL ACTIVE OPENINGS* ({len(regular_jobs)})\n\n"
         
         for job in regular_jobs:
-            message += f"• *{job['title']}*\n"
+            report.section(heading)
+            heading = ""
+            report.write(f"• *{job['title']}*\n")
             
             if job['top_5_skills']:
-                message += f"  Skills: {job['top_5_skills']}\n"
+                report.write(f"  Skills: {job['top_5_skills']}\n")
             
             if job['headcount']:
-                message += f"  Headcount: {job['headcount']}\n"
+                report.write(f"  Headcount: {job['headcount']}\n")
             
-            message += f"  Open for: {job['job_age_days']} days\n\n"
+            report.write(f"  Open for: {job['job_age_days']} days\n\n")
     
     # Post summary
-    message += f"───────────────────\n"
-    message += f"*SUMMARY*\n"
-    message += f"New this week: {len(new_jobs)}\n"
-    message += f"Total active: {len(jobs)}\n\n"
-    message += f"Know someone perfect for these roles? Refer them and earn a bonus when they're regularized!"
-    
-    # Post to Slack
-    if post_to_slack(message):
+    report.section(f"───────────────────\n")
+    report.write(f"*SUMMARY*\n")
+    report.write(f"New this week: {len(new_jobs)}\n")
+    report.write(f"Total active: {len(jobs)}\n\n")
+    report.write(f"Know someone perfect for these roles? Refer them and earn a bonus when they're regularized!")
+    
+    # Post to Slack, long reports continue in the thread; parts already posted this week are skipped
+    if all(report.post(SLACK_CHANNEL, RunLedger('job_alert_bot', this_week()))):
         print("✅ Job alerts posted successfully!")
     else:
         print("❌ Failed to post to Slack")
 
 if __name__ == "__main__":
-    post_job_alerts()
+    with run_report('job_alert_bot'):
+        post_job_alerts()
@@ -0,0 +1,369 @@
+"""
+Shared Monday.com GraphQL client
+Keeps a small pool of persistent HTTPS connections so a bot run pays the TLS
+handshake once, decodes gzip responses and retries on 429s, 5xx responses and
+an exhausted complexity budget. Boards are read with cursor pagination so
+items stream in page by page however large the board gets, and selected
+groups are fetched concurrently.
+"""
+
+import os
+import re
+import json
+import gzip
+import zlib
+import time
+import random
+import queue
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+
+# Configuration
+MONDAY_API_TOKEN = os.environ.get('MONDAY_API_TOKEN')
+MONDAY_API_HOST = "api.monday.com"
+MONDAY_API_PATH = "/v2"
+TIMEOUT = float(os.environ.get('MONDAY_TIMEOUT', '60'))
+MAX_RETRIES = int(os.environ.get('MONDAY_MAX_RETRIES', '5'))
+POOL_SIZE = int(os.environ.get('MONDAY_POOL_SIZE', '4'))
+CONNECTION_CLASS = http.client.HTTPSConnection  # benchmark.py swaps in plain HTTP for its local fakes
+MAX_BACKOFF = 60
+PAGE_SIZE = int(os.environ.get('MONDAY_PAGE_SIZE', '500'))
+GROUP_WORKERS = POOL_SIZE
+TRACK_COMPLEXITY = os.environ.get('MONDAY_TRACK_COMPLEXITY', 'true').lower() in ('1', 'true', 'yes')
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+COMPLEXITY_CODES = ('ComplexityException', 'COMPLEXITY_BUDGET_EXHAUSTED')
+RESET_IN_RE = re.compile(r'reset in (\d+) seconds?')
+OPERATION_RE = re.compile(r'\{\s*(\w+)(?:[^{]*\{\s*(\w+))?')
+COMPLEXITY_FIELD = "complexity { query after reset_in_x_seconds }"
+
+_pool = []
+_pool_lock = threading.Lock()
+
+
+class MondayAPIError(Exception):
+    """Raised when Monday.com keeps failing after all retries"""
+
+    def __init__(self, message, status=None, response=None):
+        super().__init__(message)
+        self.status = status
+        self.response = response
+
+
+def _get_connection():
+    """Take an idle connection from the pool or open a new one"""
+    with _pool_lock:
+        if _pool:
+            return _pool.pop()
+    return CONNECTION_CLASS(MONDAY_API_HOST, timeout=TIMEOUT)
+
+
+def _release_connection(conn):
+    """Return a healthy connection to the pool"""
+    with _pool_lock:
+        if len(_pool) < POOL_SIZE:
+            _pool.append(conn)
+            return
+    conn.close()
+
+
+def close_connections():
+    """Close every pooled connection"""
+    with _pool_lock:
+        while _pool:
+            _pool.pop().close()
+
+
+def _backoff(attempt):
+    """Exponential backoff with jitter"""
+    return min(MAX_BACKOFF, 2 ** attempt) + random.uniform(0, 1)
+
+
+def _complexity_wait(result):
+    """Seconds to wait if the response says the complexity budget is exhausted"""
+    errors = result.get('errors') or []
+    if result.get('error_code'):
+        errors = errors + [{'message': result.get('error_message', ''),
+                            'extensions': {'code': result['error_code']}}]
+
+    for error in errors:
+        if not isinstance(error, dict):
+            continue
+        extensions = error.get('extensions') or {}
+        code = extensions.get('code') or error.get('error_code') or ''
+        message = error.get('message') or ''
+        if code in COMPLEXITY_CODES or 'complexity budget' in message.lower():
+            if extensions.get('retry_in_seconds'):
+                return float(extensions['retry_in_seconds'])
+            match = RESET_IN_RE.search(message)
+            return float(match.group(1)) + 1 if match else 30.0
+    return None
+
+
+def _operation(query):
+    """Short name for what a query reads, e.g. boards.items_page or next_items_page, for run reports"""
+    match = OPERATION_RE.search(query)
+    if not match:
+        return 'query'
+    if match.group(1) == 'boards' and match.group(2):
+        if match.group(2) == 'groups' and 'items_page' in query:
+            return "boards.groups.items_page"
+        return f"boards.{match.group(2)}"
+    return match.group(1)
+
+
+def _with_complexity(query):
+    """Ask Monday.com to report what the query cost alongside its data"""
+    brace = query.find('{')
+    if brace < 0:
+        return query
+    return f"{query[:brace + 1]}\n      {COMPLEXITY_FIELD}{query[brace + 1:]}"
+
+
+def _post(body, operation='query'):
+    """Send one request over a pooled connection, returns (status, response, payload)"""
+    headers = {
+        "Authorization": MONDAY_API_TOKEN or "",
+        "Content-Type": "application/json",
+        "Accept-Encoding": "gzip",
+        "Connection": "keep-alive"
+    }
+    conn = _get_connection()
+    started = time.perf_counter()
+    try:
+        conn.request("POST", MONDAY_API_PATH, body=body, headers=headers)
+        response = conn.getresponse()
+        payload = response.read()
+    except Exception:
+        conn.close()
+        instrumentation.record_http('monday', operation, time.perf_counter() - started, None, len(body))
+        raise
+    instrumentation.record_http('monday', operation, time.perf_counter() - started, response.status,
+                                len(body), len(payload))
+
+    if response.getheader('Content-Encoding', '').lower() == 'gzip':
+        try:
+            payload = gzip.decompress(payload)
+        except (OSError, EOFError, zlib.error) as e:
+            # A truncated or corrupt body, the connection's state is unknown so it isn't reused
+            conn.close()
+            raise http.client.HTTPException(f"Could not decode gzip response: {e}") from e
+
+    if response.will_close:
+        conn.close()
+    else:
+        _release_connection(conn)
+    return response.status, response, payload
+
+
+def query_monday(query, variables=None):
+    """Query Monday.com API"""
+    operation = _operation(query)
+    body = {"query": _with_complexity(query) if TRACK_COMPLEXITY else query}
+    if variables:
+        body["variables"] = variables
+    body = json.dumps(body).encode('utf-8')
+
+    last_error = None
+    for attempt in range(MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            status, response, payload = _post(body, operation)
+        except (http.client.HTTPException, OSError) as e:
+            last_error = MondayAPIError(f"Connection error: {e}")
+        else:
+            try:
+                result = json.loads(payload.decode('utf-8')) if payload else {}
+            except ValueError:
+                result = {}
+
+            if status == 200 and isinstance(result, dict):
+                wait = _complexity_wait(result)
+                if wait is None:
+                    if isinstance(result.get('data'), dict):
+                        instrumentation.record_complexity(result['data'].pop('complexity', None))
+                    return result
+                last_error = MondayAPIError("Complexity budget exhausted", status, result)
+                retry_after = wait
+            elif status in RETRY_STATUSES:
+                last_error = MondayAPIError(f"HTTP {status}", status, result)
+                header = response.getheader('Retry-After')
+                if header and header.isdigit():
+                    retry_after = float(header)
+                elif isinstance(result, dict):
+                    retry_after = _complexity_wait(result)
+            else:
+                # Monday returns GraphQL errors with 4xx statuses too, callers inspect them
+                if isinstance(result, dict) and ('errors' in result or 'error_message' in result):
+                    return result
+                raise MondayAPIError(f"HTTP {status}: {payload[:200]!r}", status, result)
+
+        if attempt == MAX_RETRIES:
+            break
+
+        wait = retry_after if retry_after is not None else _backoff(attempt)
+        instrumentation.count('monday_retries')
+        print(f"⏳ Monday.com request failed ({last_error}), retrying in {wait:.0f}s "
+              f"(attempt {attempt + 1}/{MAX_RETRIES})")
+        time.sleep(wait)
+
+    raise last_error
+
+
+def raise_for_errors(result):
+    """Turn a GraphQL error response into a MondayAPIError"""
+    if 'errors' in result or 'error_message' in result:
+        errors = result.get('errors') or [result.get('error_message')]
+        raise MondayAPIError(f"API errors: {errors}", response=result)
+
+
+def _follow_cursor(cursor, item_fields, page_size):
+    """Yield pages of items from next_items_page until the cursor runs out"""
+    query = f'''
+    query ($cursor: String!, $limit: Int!) {{
+      next_items_page(cursor: $cursor, limit: $limit) {{
+        cursor
+        items {{
+          {item_fields}
+        }}
+      }}
+    }}
+    '''
+    while cursor:
+        result = query_monday(query, {"cursor": cursor, "limit": page_size})
+        raise_for_errors(result)
+        page = result['data']['next_items_page']
+        yield page['items']
+        cursor = page.get('cursor')
+
+
+def iter_board_items(board_id, item_fields, page_size=PAGE_SIZE):
+    """Yield every item on a board, one page at a time"""
+    query = f'''
+    query ($limit: Int!) {{
+      boards(ids: {board_id}) {{
+        items_page(limit: $limit) {{
+          cursor
+          items {{
+            {item_fields}
+          }}
+        }}
+      }}
+    }}
+    '''
+    result = query_monday(query, {"limit": page_size})
+    raise_for_errors(result)
+
+    for board in result['data']['boards']:
+        page = board['items_page']
+        yield from page['items']
+        for items in _follow_cursor(page.get('cursor'), item_fields, page_size):
+            yield from items
+
+
+def get_board_groups(board_id):
+    """Get the id and title of every group on a board"""
+    query = f'''
+    {{
+      boards(ids: {board_id}) {{
+        groups {{
+          id
+          title
+        }}
+      }}
+    }}
+    '''
+    result = query_monday(query)
+    raise_for_errors(result)
+    return [group for board in result['data']['boards'] for group in board['groups']]
+
+
+def _group_pages(board_id, item_fields, page_size, group_ids=None):
+    """Yield (group, items) one page at a time for the selected groups, or all of them"""
+    group_filter = f"(ids: {json.dumps(list(group_ids))})" if group_ids else ""
+    query = f'''
+    query ($limit: Int!) {{
+      boards(ids: {board_id}) {{
+        groups{group_filter} {{
+          id
+          title
+          items_page(limit: $limit) {{
+            cursor
+            items {{
+              {item_fields}
+            }}
+          }}
+        }}
+      }}
+    }}
+    '''
+    result = query_monday(query, {"limit": page_size})
+    raise_for_errors(result)
+
+    for board in result['data']['boards']:
+        for group in board['groups']:
+            page = group.pop('items_page')
+            yield group, page['items']
+            for items in _follow_cursor(page.get('cursor'), item_fields, page_size):
+                yield group, items
+
+
+def _concurrent_group_pages(board_id, item_fields, page_size, group_ids):
+    """Page through several groups at once on a bounded thread pool, yielding (group, items)"""
+    pages = queue.Queue(maxsize=GROUP_WORKERS * 2)
+    stop = threading.Event()
+    done = object()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                pages.put(entry, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch(group_id):
+        try:
+            for entry in _group_pages(board_id, item_fields, page_size, [group_id]):
+                if not put(entry):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+
+    executor = ThreadPoolExecutor(max_workers=min(GROUP_WORKERS, len(group_ids)))
+    try:
+        for group_id in group_ids:
+            executor.submit(instrumentation.bind(fetch), group_id)
+
+        remaining = len(group_ids)
+        while remaining:
+            entry = pages.get()
+            if entry is done:
+                remaining -= 1
+            elif isinstance(entry, Exception):
+                raise entry
+            else:
+                yield entry
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_group_items(board_id, item_fields, page_size=PAGE_SIZE, group_ids=None):
+    """Yield (group, item) for every item in the selected groups (default all), one page at a time"""
+    if group_ids is not None and not group_ids:
+        return
+    if group_ids and len(group_ids) > 1:
+        pages = _concurrent_group_pages(board_id, item_fields, page_size, group_ids)
+    else:
+        pages = _group_pages(board_id, item_fields, page_size, group_ids)
+
+    for group, items in pages:
+        for item in items:
+            yield group, item
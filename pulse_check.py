@@ -1,146 +1,40 @@
-import os
-import json
-import urllib.request
-import urllib.parse
 import time
 from datetime import datetime, timezone, timedelta
 
+from board_cache import iter_group_items, resolve_groups, is_active_group
+from slack_directory import get_directory
+from slack_dispatcher import dispatch
+from run_ledger import RunLedger, post_once, this_month
+from instrumentation import run_report, span, timed
+from bot_log import get_logger, sampled
+
 # Configuration
-MONDAY_API_TOKEN = os.environ.get('MONDAY_API_TOKEN')
-SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
 BOARD_ID = "6329303796"
 RESULTS_USER = "Den"
 
-def query_monday(query):
-    """Query Monday.com API"""
-    url = "https://api.monday.com/v2"
-    headers = {
-        "Authorization": MONDAY_API_TOKEN,
-        "Content-Type": "application/json"
-    }
-    data = json.dumps({"query": query}).encode('utf-8')
-    
-    req = urllib.request.Request(url, data=data, headers=headers)
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read().decode('utf-8'))
-
-def get_all_slack_users():
-    """Get all Slack users once with retry logic"""
-    print("📋 Fetching all Slack users...")
-    url = "https://slack.com/api/users.list"
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                if result.get('ok'):
-                    print(f"✅ Fetched {len(result.get('members', []))} Slack users")
-                    return result.get('members', [])
-        except urllib.error.HTTPError as e:
-            if e.code == 429 and attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 10
-                print(f"⏳ Rate limited, waiting {wait_time} seconds... (attempt {attempt + 1}/{max_retries})")
-                time.sleep(wait_time)
-            else:
-                print(f"❌ Error fetching user list: {e}")
-                break
-        except Exception as e:
-            print(f"❌ Error fetching user list: {e}")
-            break
-    return []
+log = get_logger('pulse_check')
 
-def find_user_id(display_name, slack_users):
-    """Find Slack user ID from cached user list"""
-    for user in slack_users:
-        if user.get('deleted') or user.get('is_bot'):
-            continue
-            
-        real_name = user.get('real_name', '').strip()
-        username = user.get('name', '').strip()
-        profile_name = user.get('profile', {}).get('display_name', '').strip()
-        
-        # Check all possible name formats
-        if (real_name == display_name or 
-            username == display_name.lower() or 
-            profile_name == display_name or
-            display_name.lower() in real_name.lower()):
-            return user.get('id')
-    return None
-
-def send_slack_dm(user_id, message):
-    """Send DM to a Slack user"""
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "channel": user_id,
-        "text": message,
-        "unfurl_links": False
-    }
-    
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode('utf-8'),
-        headers=headers
-    )
-    
-    try:
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result.get("ok")
-    except urllib.error.HTTPError as e:
-        print(f"  ⚠️ Error sending DM: {e}")
-        return False
-    except Exception as e:
-        print(f"  ⚠️ Error sending DM: {e}")
-        return False
+def find_user_id(display_name, directory):
+    """Find Slack user ID in the indexed user directory"""
+    return directory.find(display_name)
 
+@timed('fetch')
 def get_active_employees():
     """Get list of active employees from Monday.com"""
     print("📊 Fetching active employees from Monday.com...")
     
-    query = f'''
-    {{
-      boards(ids: {BOARD_ID}) {{
-        groups {{
-          id
-          title
-          items_page {{
-            items {{
-              name
-            }}
-          }}
-        }}
-      }}
-    }}
-    '''
-    
-    result = query_monday(query)
     employees = []
     
-    if result.get('data') and result['data'].get('boards'):
-        groups = result['data']['boards'][0]['groups']
-        
-        for group in groups:
-            group_title = group.get('title', '').lower()
-            
-            if ('active' in group_title and 'employee' in group_title) or \
-               ('active' in group_title and 'non' in group_title and 'billable' in group_title):
-                items = group['items_page']['items']
-                for item in items:
-                    name = item.get('name', '').strip()
-                    if name:
-                        employees.append(name)
-        
-        print(f"✅ Found {len(employees)} active employees")
+    group_ids = resolve_groups(BOARD_ID, is_active_group)
+    if not group_ids:
+        return employees
+    
+    for group, item in iter_group_items(BOARD_ID, "name", group_ids=group_ids):
+        name = item.get('name', '').strip()
+        if name:
+            employees.append(name)
+    
+    print(f"✅ Found {len(employees)} active employees")
     
     return employees
 
@@ -161,12 +55,20 @@ def send_pulse_check():
         print("❌ No employees found")
         return
     
-    # Get all Slack users ONCE
-    slack_users = get_all_slack_users()
-    if not slack_users:
-        print("❌ Could not fetch Slack users")
+    # Slack users come from the on-disk directory unless it has expired
+    try:
+        with span('fetch', source='slack_directory'):
+            directory = get_directory()
+    except Exception as e:
+        print(f"❌ Could not fetch Slack users: {e}")
         return
     
+    # Resolve every employee in one pass over the index
+    with span('match'):
+        user_ids, not_found = directory.resolve_all(employees)
+    print(f"🔎 Matched {len(user_ids)}/{len(employees)} employees to Slack users ({len(not_found)} unmatched)")
+    directory.report_ambiguous()
+    
     # Create the message
     message = f"""📊 *Monthly Pulse Check - {month_name}*
 
@@ -183,26 +85,52 @@ Please reply with a number from 1 to 5:
 
 _Your response is anonymous and helps us improve Adaca._"""
     
-    # Send DM to each employee
-    sent_count = 0
+    # Report who can't be reached, then DM everyone else concurrently
+    # Anyone already DMed this month (an earlier, interrupted run) is skipped
+    ledger = RunLedger('pulse_check', this_month())
     failed = []
-    
-    for i, employee_name in enumerate(employees):
-        print(f"Sending to: {employee_name} ({i+1}/{len(employees)})")
-        
-        user_id = find_user_id(employee_name, slack_users)
-        
+    recipients = []
+    already_sent = 0
+    seen_user_ids = set()
+    for employee_name in employees:
+        user_id = user_ids.get(employee_name)
+        if user_id in seen_user_ids:
+            # Two board rows for the same Slack user, one DM is enough
+            log.info("  ⏭️ %s: same Slack user as an earlier row, skipped", employee_name,
+                     extra=sampled('duplicate Slack user'))
+            continue
         if user_id:
-            time.sleep(1)  # Rate limit: 1 message per second
-            if send_slack_dm(user_id, message):
-                sent_count += 1
-                print(f"  ✅ Sent")
-            else:
-                failed.append(employee_name)
-                print(f"  ❌ Failed to send")
+            seen_user_ids.add(user_id)
+        if user_id and ledger.get(user_id, message):
+            already_sent += 1
+        elif user_id:
+            recipients.append((employee_name, user_id))
         else:
             failed.append(employee_name)
-            print(f"  ❌ User not found in Slack")
+            if employee_name in directory.ambiguous:
+                log.info("  ❌ %s: several Slack users match, skipped", employee_name, extra=sampled('ambiguous Slack user'))
+            else:
+                log.info("  ❌ %s: user not found in Slack", employee_name, extra=sampled('Slack user not found'))
+    
+    names = {user_id: employee_name for employee_name, user_id in recipients}
+    
+    def report(result):
+        ledger.record(result.recipient, message, result)
+        if result.ok:
+            log.info("  ✅ Sent to %s", names[result.recipient], extra=sampled('pulse check sent'))
+        else:
+            log.warning("  ❌ Failed to send to %s: %s", names[result.recipient], result.error,
+                        extra=sampled('pulse check failed'))
+    
+    if already_sent:
+        print(f"⏭️ {already_sent} employees already got this month's pulse check, skipping them")
+    print(f"📤 Sending to {len(recipients)} employees...")
+    started = time.monotonic()
+    results = dispatch(((user_id, message) for _, user_id in recipients), on_result=report)
+    print(f"⏱️ Sent in {time.monotonic() - started:.1f}s")
+    
+    sent_count = already_sent + sum(1 for result in results if result.ok)
+    failed.extend(names[result.recipient] for result in results if not result.ok)
     
     print(f"\n📊 Pulse Check Summary:")
     print(f"✅ Successfully sent: {sent_count}")
@@ -212,8 +140,7 @@ _Your response is anonymous and helps us improve Adaca._"""
         print(f"Failed employees: {', '.join(failed)}")
     
     # Notify results recipient
-    time.sleep(2)
-    results_user_id = find_user_id(RESULTS_USER, slack_users)
+    results_user_id = find_user_id(RESULTS_USER, directory)
     if results_user_id:
         notification = f"""📊 *Monthly Pulse Check Sent - {month_name}*
 
@@ -226,8 +153,10 @@ _I'll send you the compiled results in 7 days. People will reply with their scor
             if len(failed) > 10:
                 notification += f"\n...and {len(failed) - 10} more"
         
-        send_slack_dm(results_user_id, notification)
-        print(f"✅ Notified {RESULTS_USER}")
+        result = post_once(ledger, results_user_id, notification, content='sent-notification')
+        if result and result.attempts:
+            print(f"✅ Notified {RESULTS_USER}")
 
 if __name__ == "__main__":
-    send_pulse_check()
+    with run_report('pulse_check'):
+        send_pulse_check()
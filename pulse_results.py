@@ -0,0 +1,245 @@
+"""
+Pulse check response collector
+Reads the replies to this month's pulse check DMs, keeps each person's latest
+1-5 score and DMs the compiled results to RESULTS_USER. Recipients and the
+time of their pulse DM come from the run ledger. Histories are fetched
+concurrently under a shared rate limit, and a per-recipient checkpoint means
+each run only reads messages newer than the last one collected.
+
+Usage:
+    python pulse_results.py [collect|summary|send] [YYYY-MM]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import slack_client
+import instrumentation
+from board_cache import CACHE_DIR, temp_path
+from slack_directory import get_directory
+from slack_dispatcher import TokenBucket
+from run_ledger import RunLedger, post_once, content_hash, this_month
+from pulse_check import RESULTS_USER
+
+# Configuration
+STATE_PATH = os.path.join(CACHE_DIR, "pulse_results.json")
+HISTORY_RATE = float(os.environ.get('PULSE_HISTORY_RATE', '0.8'))  # conversations.history is Tier 3, ~50/min
+HISTORY_WORKERS = int(os.environ.get('PULSE_HISTORY_WORKERS', '4'))
+HISTORY_PAGE_SIZE = 200
+MAX_RETRIES = 5
+
+SCORE_RE = re.compile(r'(?<![\d.])([1-5])(?![\d.])')
+
+
+def load_state(path=STATE_PATH):
+    """Load collected scores and checkpoints for every month"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_PATH):
+    """Write the collector state to disk atomically"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = temp_path(path)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def parse_score(text):
+    """The single 1-5 score in a reply, or None when there isn't exactly one"""
+    scores = set(SCORE_RE.findall(text or ''))
+    return int(scores.pop()) if len(scores) == 1 else None
+
+
+def _limited_call(bucket, api_method, payload=None, params=None):
+    """Make a Web API call through the shared rate limit, waiting out 429s and retrying transient errors"""
+    for attempt in range(MAX_RETRIES + 1):
+        bucket.acquire()
+        try:
+            return slack_client.call(api_method, payload, params)
+        except slack_client.RetryableError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            if e.retry_after is not None:
+                bucket.pause(e.retry_after)
+            else:
+                time.sleep(min(30, 2 ** attempt) * random.uniform(0.5, 1.5))
+
+
+def sent_pulses(month):
+    """{user_id: ts of their pulse DM} for a month, from the pulse check's run ledger"""
+    notification = content_hash('sent-notification')
+    ledger = RunLedger('pulse_check', month)
+    return {entry['recipient']: entry['ts'] for entry in ledger.entries.values()
+            if entry.get('hash') != notification and entry.get('ts')}
+
+
+def _collect_one(bucket, user_id, channel, oldest):
+    """Read a DM channel since a timestamp, returns (channel, newest ts seen, [(ts, score)])"""
+    if not channel:
+        channel = _limited_call(bucket, 'conversations.open', {'users': user_id})['channel']['id']
+
+    newest = oldest
+    scores = []
+    cursor = None
+    while True:
+        params = {'channel': channel, 'oldest': oldest, 'limit': HISTORY_PAGE_SIZE}
+        if cursor:
+            params['cursor'] = cursor
+        result = _limited_call(bucket, 'conversations.history', params=params)
+
+        for message in result.get('messages') or []:
+            if float(message['ts']) > float(newest):
+                newest = message['ts']
+            # Only the employee's own replies count, not the bot's messages
+            if message.get('user') != user_id or message.get('bot_id') or message.get('subtype'):
+                continue
+            score = parse_score(message.get('text'))
+            if score:
+                scores.append((message['ts'], score))
+
+        cursor = (result.get('response_metadata') or {}).get('next_cursor')
+        if not cursor:
+            return channel, newest, scores
+
+
+def collect(month=None, state=None):
+    """Fetch new replies for a month's pulse check and fold them into the saved scores"""
+    month = month or this_month()
+    state = load_state() if state is None else state
+    pulses = sent_pulses(month)
+    if not pulses:
+        print(f"ℹ️ No pulse check DMs recorded for {month}")
+        return state
+
+    data = state.setdefault(month, {'channels': {}, 'checkpoints': {}, 'scores': {}, 'score_ts': {}})
+    data['sent'] = len(pulses)
+    bucket = TokenBucket(HISTORY_RATE, HISTORY_WORKERS)
+    print(f"📥 Collecting pulse replies for {month} from {len(pulses)} DMs...")
+
+    @instrumentation.timed('fetch')
+    def run(user_id):
+        oldest = data['checkpoints'].get(user_id) or pulses[user_id]
+        return user_id, _collect_one(bucket, user_id, data['channels'].get(user_id), oldest)
+
+    new_scores = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=HISTORY_WORKERS) as pool:
+        futures = [pool.submit(instrumentation.bind(run), user_id) for user_id in pulses]
+        for future in futures:
+            try:
+                user_id, (channel, newest, scores) = future.result()
+            except Exception as e:
+                # One DM failing in any way must not lose the checkpoints of the others
+                failed += 1
+                print(f"  ⚠️ Could not read replies: {e}")
+                continue
+            data['channels'][user_id] = channel
+            data['checkpoints'][user_id] = newest
+            # The latest score wins if someone changes their mind
+            for ts, score in scores:
+                if float(ts) > float(data['score_ts'].get(user_id, 0)):
+                    data['scores'][user_id] = score
+                    data['score_ts'][user_id] = ts
+                    new_scores += 1
+
+    save_state(state)
+    print(f"✅ {new_scores} new score(s), {len(data['scores'])}/{len(pulses)} responded"
+          f"{f', {failed} DM(s) could not be read' if failed else ''}")
+    return state
+
+
+def summarize(month, data):
+    """Distribution, average, NPS-style score and response rate for a month"""
+    scores = list(data.get('scores', {}).values())
+    sent = data.get('sent', 0)
+    distribution = {score: scores.count(score) for score in range(1, 6)}
+    responded = len(scores)
+    promoters = distribution[5]
+    detractors = distribution[1] + distribution[2] + distribution[3]
+    return {
+        'month': month,
+        'sent': sent,
+        'responded': responded,
+        'response_rate': responded / sent if sent else 0.0,
+        'distribution': distribution,
+        'average': sum(scores) / responded if responded else 0.0,
+        'nps': round(100 * (promoters - detractors) / responded) if responded else 0
+    }
+
+
+def format_summary(summary):
+    """Slack message for a month's results"""
+    message = f"📊 *Monthly Pulse Check Results - {summary['month']}*\n\n"
+    message += "*Would you recommend Adaca to your friend?*\n\n"
+    for score in range(5, 0, -1):
+        count = summary['distribution'][score]
+        share = count / summary['responded'] if summary['responded'] else 0
+        message += f"{score} {'⭐' * score}: {count} ({share:.0%})\n"
+    message += f"\n📈 Average: {summary['average']:.2f} / 5\n"
+    message += f"🧭 NPS-style score: {summary['nps']:+d} (5 = promoter, 1-3 = detractor)\n"
+    message += f"📬 Response rate: {summary['responded']}/{summary['sent']} ({summary['response_rate']:.0%})\n\n"
+    message += "_Individual answers stay anonymous, only totals are shared._"
+    return message
+
+
+def send_summary(month=None, state=None):
+    """DM the month's results to RESULTS_USER, once per month"""
+    month = month or this_month()
+    state = load_state() if state is None else state
+    if month not in state:
+        print(f"ℹ️ Nothing collected for {month}")
+        return
+
+    summary = summarize(month, state[month])
+    message = format_summary(summary)
+    print(message)
+
+    results_user_id = get_directory().find(RESULTS_USER)
+    if not results_user_id:
+        print(f"❌ Could not find {RESULTS_USER} in Slack")
+        return
+    result = post_once(RunLedger('pulse_results', month), results_user_id, message, content='summary')
+    if result and result.attempts:
+        print(f"✅ Sent results to {RESULTS_USER}")
+
+
+def collect_and_send(month=None):
+    """Fetch the month's replies, then DM the summary"""
+    send_summary(month, collect(month))
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else 'send'
+    month = argv[2] if len(argv) > 2 else None
+
+    if command == 'collect':
+        with instrumentation.run_report('pulse_results'):
+            collect(month)
+    elif command == 'summary':
+        month = month or this_month()
+        state = load_state()
+        if month in state:
+            print(format_summary(summarize(month, state[month])))
+        else:
+            print(f"ℹ️ Nothing collected for {month}")
+    elif command == 'send':
+        with instrumentation.run_report('pulse_results'):
+            collect_and_send(month)
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
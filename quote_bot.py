@@ -1,14 +1,15 @@
 import anthropic
 import json
-import urllib.request
-import urllib.parse
 import os
 from datetime import datetime, timezone, timedelta
 import random
 
+from slack_client import post_message
+from run_ledger import RunLedger
+from instrumentation import run_report, span, timed
+
 # Get configuration from environment variables
 ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY')
-SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
 SLACK_CHANNEL = "general"
 
 # Curated collection of inspirational quotes from famous people
@@ -107,6 +108,7 @@ def get_famous_quote(previous_quotes):
     print(f"✨ Selected quote from {selected['author']}")
     return formatted_quote
 
+@timed('generate')
 def generate_unique_quote(previous_quotes):
     """Generate a quote/joke that's different from recent ones"""
     print("🤖 Asking Claude for daily inspiration...")
@@ -169,31 +171,14 @@ Requirements:
     print(f"📝 Generated {content_type} content")
     return quote
 
-def post_to_slack(message):
-    """Post message to Slack"""
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "channel": SLACK_CHANNEL,
-        "text": message,
-        "unfurl_links": False
-    }
-    
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode('utf-8'),
-        headers=headers
-    )
-    
-    with urllib.request.urlopen(req) as response:
-        result = json.loads(response.read().decode('utf-8'))
-        return result.get("ok")
-
 def main():
     try:
+        # Skip re-runs once today's quote is out, before spending an API call on a new one
+        ledger = RunLedger('quote_bot')
+        if ledger.get(SLACK_CHANNEL, 'quote'):
+            print("⏭️ Today's quote was already posted, skipping")
+            return
+        
         # Load previous quotes
         quote_history = load_quote_history()
         
@@ -252,7 +237,10 @@ def main():
         
         # Post to Slack
         print(f"📤 Posting to #{SLACK_CHANNEL}...")
-        if post_to_slack(slack_message):
+        with span('send'):
+            result = post_message(SLACK_CHANNEL, slack_message)
+        ledger.record(SLACK_CHANNEL, 'quote', result)
+        if result:
             print("✅ SUCCESS! Quote posted to Slack!")
         else:
             print("❌ Error posting to Slack")
@@ -263,4 +251,5 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
+    with run_report('quote_bot'):
+        main()
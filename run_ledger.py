@@ -0,0 +1,160 @@
+"""
+Append-only run ledger
+Every successful Slack send is recorded as one JSON line keyed by (bot,
+period, recipient, content hash). A re-run or workflow retry loads the index
+first and skips whatever already went out, so a failed run resumes where it
+stopped instead of posting everything again.
+
+Usage:
+    python run_ledger.py list [bot]
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime, timezone, timedelta
+
+from board_cache import CACHE_DIR, temp_path
+from instrumentation import span
+from slack_client import post_message, DeliveryResult
+
+# Configuration
+LEDGER_PATH = os.environ.get('RUN_LEDGER_PATH', os.path.join(CACHE_DIR, 'run_ledger.jsonl'))
+RETENTION_DAYS = int(os.environ.get('RUN_LEDGER_RETENTION_DAYS', '120'))
+FORCE_RESEND = os.environ.get('FORCE_RESEND', '').lower() in ('1', 'true', 'yes')
+MANILA_TZ = timezone(timedelta(hours=8))
+
+# Bots scheduled in one process share the ledger file
+_file_lock = threading.Lock()
+
+
+def content_hash(content):
+    """Short stable hash of a message's content or logical identity"""
+    if not isinstance(content, str):
+        content = json.dumps(content, sort_keys=True)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+
+
+def today():
+    """Today's date in Manila as YYYY-MM-DD, the default ledger period"""
+    return datetime.now(MANILA_TZ).date().isoformat()
+
+
+def this_week():
+    """ISO week in Manila as YYYY-Www, the period for weekly bots"""
+    year, week, _ = datetime.now(MANILA_TZ).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def this_month():
+    """Month in Manila as YYYY-MM, the period for monthly bots"""
+    return datetime.now(MANILA_TZ).strftime('%Y-%m')
+
+
+class RunLedger:
+    """Sends one bot already made in one period (a day, a week or a month)"""
+
+    def __init__(self, bot, period=None, path=LEDGER_PATH):
+        self.bot = bot
+        self.period = period or today()
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Index this bot's entries, dropping lines past the retention window"""
+        with _file_lock:
+            self._read_and_compact()
+
+    def _read_and_compact(self):
+        cutoff = time.time() - RETENTION_DAYS * 24 * 60 * 60
+        kept = []
+        stale = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        stale += 1  # a line cut short by a crash
+                        continue
+                    if entry.get('at', 0) < cutoff:
+                        stale += 1
+                        continue
+                    kept.append(line if line.endswith("\n") else line + "\n")
+                    if entry.get('bot') == self.bot and entry.get('period') == self.period:
+                        self.entries[entry['key']] = entry
+        except OSError:
+            return
+
+        if stale:
+            tmp_path = temp_path(self.path)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(kept)
+            os.replace(tmp_path, self.path)
+
+    def key(self, recipient, content):
+        """Ledger key for a send in this bot's current period"""
+        return f"{self.bot}|{self.period}|{recipient}|{content_hash(content)}"
+
+    def get(self, recipient, content):
+        """The recorded send for this recipient and content, or None"""
+        if FORCE_RESEND:
+            return None
+        return self.entries.get(self.key(recipient, content))
+
+    def record(self, recipient, content, result):
+        """Append a successful send to the ledger, failures are left to be retried next run"""
+        if not result.ok:
+            return
+        entry = {
+            'key': self.key(recipient, content),
+            'bot': self.bot,
+            'period': self.period,
+            'recipient': recipient,
+            'hash': content_hash(content),
+            'ts': result.ts,
+            'at': time.time()
+        }
+        with self.lock, _file_lock:
+            self.entries[entry['key']] = entry
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, separators=(',', ':')) + "\n")
+
+
+def skipped(recipient, entry):
+    """DeliveryResult standing in for a send the ledger says already happened"""
+    return DeliveryResult(recipient, True, "already sent", 0, entry.get('ts'))
+
+
+def post_once(ledger, channel, message, content=None):
+    """Post a message unless the ledger already has it, content defaults to the message itself"""
+    content = message if content is None else content
+    entry = ledger.get(channel, content)
+    if entry:
+        print(f"⏭️ Already posted to {channel} in this run period, skipping")
+        return skipped(channel, entry)
+    with span('send'):
+        result = post_message(channel, message)
+    ledger.record(channel, content, result)
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'list':
+        print(__doc__)
+        sys.exit(1)
+    bot = sys.argv[2] if len(sys.argv) > 2 else None
+    try:
+        with open(LEDGER_PATH, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if not bot or entry.get('bot') == bot:
+                    print(f"{entry['bot']}  {entry['period']}  {entry['recipient']}  {entry['hash']}  {entry.get('ts')}")
+    except OSError:
+        print("ℹ️ No ledger yet")
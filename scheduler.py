@@ -0,0 +1,264 @@
+"""
+Scheduler daemon
+Runs every bot from one long-lived process on cron-like schedules in Manila
+time, instead of one GitHub workflow (and one fresh runner) per bot. Jobs
+share the Monday.com and Slack connection pools, the board cache and the
+bots' already imported modules; jobs due in the same minute run concurrently,
+and the calendar rules the workflows used to check in shell (bi-weekly
+coffee, first Monday pulse check) live here with the schedules.
+
+Schedules are five field cron expressions (minute hour day month weekday).
+Unlike classic cron, day and weekday must both match, so '0 8 1-7 * 1' is
+8:00 on the first Monday of the month.
+
+Usage:
+    python scheduler.py [run]                   (run until stopped)
+    python scheduler.py list                    (jobs and their next run)
+    python scheduler.py once <job> [--force]    (run a job now if today is one of its days)
+"""
+
+import os
+import sys
+import signal
+import importlib
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+import bot_log
+import monday_client
+import slack_client
+from instrumentation import run_report
+
+# Configuration
+MANILA_TZ = timezone(timedelta(hours=8))
+MAX_WORKERS = int(os.environ.get('SCHEDULER_WORKERS', '6'))
+CATCH_UP = timedelta(minutes=int(os.environ.get('SCHEDULER_CATCH_UP_MINUTES', '15')))  # how late a missed job may still run
+ENABLED_JOBS = [name for name in os.environ.get('SCHEDULER_JOBS', '').split(',') if name]  # default all
+
+WEEKDAY_NAMES = {'sun': 0, 'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6}
+
+
+def _parse_field(field, low, high, names=None):
+    """Values a cron field allows: *, n, a-b and lists of them, each with an optional /step"""
+    values = set()
+    for part in field.lower().split(','):
+        expr, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if expr == '*':
+            start, end = low, high
+        else:
+            bounds = [int(names.get(bound, bound)) if names else int(bound) for bound in expr.split('-')]
+            start, end = bounds[0], bounds[-1]
+            if len(bounds) == 1 and step > 1:
+                end = high  # 'n/step' runs from n to the end of the range
+        if step < 1 or start > end or start < low or end > high:
+            raise ValueError(f"Invalid cron field '{field}', values must be within {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class Cron:
+    """Five field cron expression matched against Manila time"""
+
+    __slots__ = ('expression', 'minutes', 'hours', 'days', 'months', 'weekdays')
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' needs 5 fields: minute hour day month weekday")
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        # 0 and 7 are both Sunday
+        self.weekdays = frozenset(day % 7 for day in _parse_field(fields[4], 0, 7, WEEKDAY_NAMES))
+
+    def matches_day(self, day):
+        """Whether the expression runs at all on a date"""
+        return day.month in self.months and day.day in self.days and day.isoweekday() % 7 in self.weekdays
+
+    def matches(self, moment):
+        """Whether the expression fires at a minute"""
+        return moment.minute in self.minutes and moment.hour in self.hours and self.matches_day(moment.date())
+
+
+class Job:
+    """One bot on a schedule, with its entry point as 'module:function' and an optional extra check of the date"""
+
+    def __init__(self, name, cron, entry_point, when=None):
+        self.name = name
+        self.cron = Cron(cron)
+        self.entry_point = entry_point
+        self.when = when
+
+    def runs_on(self, day):
+        """Whether the job runs on a date"""
+        return self.cron.matches_day(day) and (self.when is None or self.when(day))
+
+    def is_due(self, moment):
+        """Whether the job fires at a minute"""
+        return self.cron.matches(moment) and (self.when is None or self.when(moment.date()))
+
+    def next_run(self, after, horizon_days=400):
+        """First minute after a moment at which the job fires, or None within the horizon"""
+        start = after.replace(second=0, microsecond=0)
+        for offset in range(horizon_days):
+            day = (start + timedelta(days=offset)).date()
+            if not self.runs_on(day):
+                continue
+            for hour in sorted(self.cron.hours):
+                for minute in sorted(self.cron.minutes):
+                    moment = datetime(day.year, day.month, day.day, hour, minute, tzinfo=MANILA_TZ)
+                    if moment > after:
+                        return moment
+        return None
+
+    def load(self):
+        """Import the bot and return its entry point, bots are imported on first run so one missing dependency only fails its own job"""
+        module_name, function_name = self.entry_point.split(':')
+        return getattr(importlib.import_module(module_name), function_name)
+
+
+def coffee_week(day):
+    """Weeks the coffee workflow ran on: it read `date +%V` in UTC on Sunday night, the ISO week before Manila's Monday"""
+    return (day - timedelta(days=1)).isocalendar()[1] % 2 == 1
+
+
+# Times are the workflows' UTC crons moved to Manila
+JOBS = [
+    Job('quote_bot', '0 6 * * *', 'quote_bot:main'),
+    Job('daily_checkin', '0 6 * * 1-5', 'daily_checkin:send_daily_checkin'),
+    Job('birthday_bot', '0 9 * * *', 'birthday_bot:check_celebrations'),
+    Job('welcome_bot', '0 9 * * *', 'welcome_bot:check_new_hires'),
+    Job('contract_expiration_bot', '0 6 * * 1', 'contract_expiration_bot:check_contract_expirations'),
+    Job('job_alert_bot', '0 6 * * 1', 'job_alert_bot:post_job_alerts'),
+    Job('coffee_matcher', '0 6 * * 1', 'coffee_matcher:create_coffee_pairings', when=coffee_week),
+    Job('benched_reminder', '0 6 * * 1', 'benched_reminder:main'),
+    Job('pulse_check', '0 8 1-7 * 1', 'pulse_check:send_pulse_check'),
+    Job('pulse_results', '0 8 8-14 * 1', 'pulse_results:collect_and_send'),
+]
+
+
+def enabled_jobs():
+    """The jobs this process runs, all of them unless SCHEDULER_JOBS names some"""
+    if not ENABLED_JOBS:
+        return list(JOBS)
+    unknown = set(ENABLED_JOBS) - {job.name for job in JOBS}
+    if unknown:
+        raise ValueError(f"Unknown job(s) in SCHEDULER_JOBS: {', '.join(sorted(unknown))}")
+    return [job for job in JOBS if job.name in ENABLED_JOBS]
+
+
+def find_job(name):
+    """Job by name, or None"""
+    for job in JOBS:
+        if job.name == name:
+            return job
+    return None
+
+
+def run_job(job):
+    """Run one job as its own bot run, returns True when it finished without raising"""
+    print(f"▶️ Starting {job.name}")
+    try:
+        entry_point = job.load()
+        with run_report(job.name):
+            entry_point()
+    except (Exception, SystemExit) as e:
+        print(f"❌ {job.name} failed: {type(e).__name__}: {e}")
+        traceback.print_exc()
+        return False
+    print(f"✅ Finished {job.name}")
+    return True
+
+
+def run_due(jobs, moment, executor):
+    """Run every job due at a minute concurrently and wait for them all"""
+    due = [job for job in jobs if job.is_due(moment)]
+    if not due:
+        return []
+
+    print(f"\n🕐 {moment.strftime('%Y-%m-%d %H:%M')} Manila: {', '.join(job.name for job in due)}")
+    results = list(executor.map(run_job, due))
+    bot_log.report_sampled()
+
+    # Keep-alive connections would sit idle until the next batch, hours from now
+    monday_client.close_connections()
+    slack_client.close_connections()
+    return results
+
+
+def _minute(moment):
+    return moment.replace(second=0, microsecond=0)
+
+
+def run_forever(jobs, stop):
+    """Check every minute for due jobs until stop is set, running minutes missed while busy late"""
+    last = _minute(datetime.now(MANILA_TZ)) - timedelta(minutes=1)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='job') as executor:
+        while not stop.is_set():
+            current = _minute(datetime.now(MANILA_TZ))
+            moment = last + timedelta(minutes=1)
+            while moment <= current and not stop.is_set():
+                if current - moment > CATCH_UP:
+                    missed = [job.name for job in jobs if job.is_due(moment)]
+                    if missed:
+                        print(f"⚠️ Missed {', '.join(missed)} at {moment.strftime('%Y-%m-%d %H:%M')}, too late to run")
+                else:
+                    run_due(jobs, moment, executor)
+                moment += timedelta(minutes=1)
+            last = max(last, current)
+
+            now = datetime.now(MANILA_TZ)
+            stop.wait((_minute(now) + timedelta(minutes=1) - now).total_seconds())
+
+
+def print_jobs(jobs):
+    """Print every job with its schedule and next run"""
+    now = datetime.now(MANILA_TZ)
+    print(f"📅 {len(jobs)} job(s), Manila time now {now.strftime('%Y-%m-%d %H:%M')}\n")
+    for job in jobs:
+        next_run = job.next_run(now)
+        rule = f" ({job.when.__name__})" if job.when else ''
+        print(f"  {job.name:<25} {job.cron.expression:<14}{rule:<15} "
+              f"next {next_run.strftime('%a %Y-%m-%d %H:%M') if next_run else 'never'}")
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else 'run'
+
+    if command == 'list':
+        print_jobs(enabled_jobs())
+    elif command == 'once' and len(argv) > 2:
+        job = find_job(argv[2])
+        if not job:
+            print(f"❌ Unknown job '{argv[2]}', one of: {', '.join(job.name for job in JOBS)}")
+            return 1
+        today = datetime.now(MANILA_TZ).date()
+        if '--force' not in argv[3:] and not job.runs_on(today):
+            rule = f", {job.when.__name__}" if job.when else ''
+            print(f"⏭️ {today.strftime('%A %Y-%m-%d')} is not one of {job.name}'s days ({job.cron.expression}{rule}), skipping")
+            return 0
+        ok = run_job(job)
+        bot_log.report_sampled()
+        return 0 if ok else 1
+    elif command == 'run':
+        jobs = enabled_jobs()
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        print(f"🚀 Scheduler started with {len(jobs)} job(s), Ctrl+C or SIGTERM stops it after the running jobs")
+        print_jobs(jobs)
+        run_forever(jobs, stop)
+        print("👋 Scheduler stopped")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,217 @@
+"""
+Shared Slack Web API client
+Keeps a small pool of persistent HTTPS connections to slack.com so a run that
+posts many messages pays the TLS handshake once, retries 429s (honouring
+Retry-After), 5xx responses, network errors and transient Slack errors with
+exponential backoff, and reports every post as a DeliveryResult instead of a
+bare bool or an exception. Many messages at once go through
+slack_dispatcher.dispatch, which keeps each channel's messages in order.
+"""
+
+import os
+import json
+import time
+import random
+import threading
+import http.client
+import urllib.parse
+
+import instrumentation
+
+# Configuration
+SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
+SLACK_API_HOST = "slack.com"
+TIMEOUT = float(os.environ.get('SLACK_TIMEOUT', '30'))
+MAX_RETRIES = int(os.environ.get('SLACK_MAX_RETRIES', '5'))
+POOL_SIZE = int(os.environ.get('SLACK_POOL_SIZE', '16'))
+CONNECTION_CLASS = http.client.HTTPSConnection  # benchmark.py swaps in plain HTTP for its local fakes
+MAX_BACKOFF = 30
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+TRANSIENT_ERRORS = ('internal_error', 'fatal_error', 'service_unavailable', 'request_timeout', 'ratelimited')
+
+_pool = []
+_pool_lock = threading.Lock()
+
+
+class SlackAPIError(Exception):
+    """Raised when Slack rejects a call or keeps failing after all retries"""
+
+    def __init__(self, message, status=None, response=None):
+        super().__init__(message)
+        self.status = status
+        self.response = response
+
+
+class RetryableError(SlackAPIError):
+    """A call failed in a way worth retrying, optionally after a server-given delay"""
+
+    def __init__(self, message, retry_after=None, status=None, response=None):
+        super().__init__(message, status, response)
+        self.retry_after = retry_after
+
+
+class DeliveryResult:
+    """Outcome of sending one message"""
+
+    __slots__ = ('recipient', 'ok', 'error', 'attempts', 'ts')
+
+    def __init__(self, recipient, ok, error=None, attempts=1, ts=None):
+        self.recipient = recipient
+        self.ok = ok
+        self.error = error
+        self.attempts = attempts
+        self.ts = ts
+
+    def __bool__(self):
+        return bool(self.ok)
+
+    def __repr__(self):
+        return f"DeliveryResult({self.recipient!r}, ok={self.ok}, error={self.error!r}, attempts={self.attempts})"
+
+
+def _get_connection():
+    """Take an idle connection from the pool or open a new one"""
+    with _pool_lock:
+        if _pool:
+            return _pool.pop()
+    return CONNECTION_CLASS(SLACK_API_HOST, timeout=TIMEOUT)
+
+
+def _release_connection(conn):
+    """Return a healthy connection to the pool"""
+    with _pool_lock:
+        if len(_pool) < POOL_SIZE:
+            _pool.append(conn)
+            return
+    conn.close()
+
+
+def close_connections():
+    """Close every pooled connection"""
+    with _pool_lock:
+        while _pool:
+            _pool.pop().close()
+
+
+def _backoff(attempt):
+    """Exponential backoff with jitter"""
+    return min(MAX_BACKOFF, 2 ** attempt) + random.uniform(0, 1)
+
+
+def _request(method, path, body, headers):
+    """Send one request over a pooled connection, returns (status, response, payload)"""
+    conn = _get_connection()
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        payload = response.read()
+    except Exception:
+        conn.close()
+        raise
+
+    if response.will_close:
+        conn.close()
+    else:
+        _release_connection(conn)
+    return response.status, response, payload
+
+
+def _rate_limit_headers(response):
+    """Retry-After and any X-RateLimit-* headers of a response"""
+    return {key.lower(): value for key, value in response.getheaders()
+            if key.lower() == 'retry-after' or key.lower().startswith('x-ratelimit')}
+
+
+def call(api_method, payload=None, params=None, token=None):
+    """Make one Web API call without retrying, returns the result or raises RetryableError / SlackAPIError"""
+    headers = {
+        "Authorization": f"Bearer {token or SLACK_BOT_TOKEN}",
+        "Connection": "keep-alive"
+    }
+    path = f"/api/{api_method}"
+    if payload is not None:
+        headers["Content-Type"] = "application/json; charset=utf-8"
+        http_method, body = "POST", json.dumps(payload).encode('utf-8')
+    else:
+        # Read methods take form style arguments
+        if params:
+            path += "?" + urllib.parse.urlencode(params)
+        http_method, body = "GET", None
+
+    started = time.perf_counter()
+    try:
+        status, response, raw = _request(http_method, path, body, headers)
+    except (http.client.HTTPException, OSError) as e:
+        instrumentation.record_http('slack', api_method, time.perf_counter() - started, None, len(body or b''))
+        raise RetryableError(f"Connection error: {e}")
+    instrumentation.record_http('slack', api_method, time.perf_counter() - started, status, len(body or b''),
+                                len(raw), _rate_limit_headers(response))
+
+    try:
+        result = json.loads(raw.decode('utf-8')) if raw else {}
+    except ValueError:
+        result = {}
+
+    if status in RETRY_STATUSES:
+        header = response.getheader('Retry-After')
+        retry_after = float(header) if header and header.isdigit() else None
+        raise RetryableError(f"HTTP {status}", retry_after, status, result)
+    if status != 200:
+        raise SlackAPIError(f"HTTP {status}", status, result)
+    if not result.get('ok'):
+        error = result.get('error', 'unknown_error')
+        if error in TRANSIENT_ERRORS:
+            raise RetryableError(error, status=status, response=result)
+        raise SlackAPIError(error, status, result)
+    return result
+
+
+def api_call(api_method, payload=None, params=None, token=None):
+    """Make a Web API call, retrying rate limits and transient failures"""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return call(api_method, payload, params, token)
+        except RetryableError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            wait = e.retry_after if e.retry_after is not None else _backoff(attempt)
+            instrumentation.count('slack_retries')
+            print(f"⏳ Slack {api_method} failed ({e}), retrying in {wait:.0f}s "
+                  f"(attempt {attempt + 1}/{MAX_RETRIES})")
+            time.sleep(wait)
+
+
+def message_payload(channel, message):
+    """chat.postMessage body for plain text or a dict of message fields (blocks, thread_ts, ...)"""
+    payload = {"channel": channel, "unfurl_links": False}
+    if isinstance(message, dict):
+        payload.update(message)
+    else:
+        payload["text"] = message
+    return payload
+
+
+def send_once(channel, message):
+    """Post one message without retrying, returns its ts (used by the dispatcher, which retries itself)"""
+    return call("chat.postMessage", message_payload(channel, message)).get('ts')
+
+
+def post_message(channel, message):
+    """Post a message with retries, returns a DeliveryResult"""
+    payload = message_payload(channel, message)
+    for attempt in range(MAX_RETRIES + 1):
+        attempts = attempt + 1
+        try:
+            result = call("chat.postMessage", payload)
+            return DeliveryResult(channel, True, attempts=attempts, ts=result.get('ts'))
+        except RetryableError as e:
+            if attempt == MAX_RETRIES:
+                return DeliveryResult(channel, False, str(e), attempts)
+            wait = e.retry_after if e.retry_after is not None else _backoff(attempt)
+            instrumentation.count('slack_retries')
+            print(f"⏳ Slack post to {channel} failed ({e}), retrying in {wait:.0f}s")
+            time.sleep(wait)
+        except SlackAPIError as e:
+            print(f"❌ Slack rejected post to {channel}: {e}")
+            return DeliveryResult(channel, False, str(e), attempts)
@@ -0,0 +1,247 @@
+"""
+Indexed Slack user directory
+Builds exact lookup maps on real name, display name and username (normalized
+and casefolded) plus token and trigram indexes for fuzzy fallback, so matching
+every employee to a Slack user is one pass over the names instead of a scan of
+the whole workspace per employee. The index is persisted next to the board
+cache and within the TTL runs skip users.list entirely. Slack has no cheap
+"changed since" check, so after the TTL the whole member list is paged again;
+a fingerprint of the members is compared first and the index is only rebuilt
+and rewritten when they changed.
+"""
+
+import os
+import json
+import time
+import hashlib
+import unicodedata
+from collections import Counter
+
+import slack_client
+from board_cache import CACHE_DIR, temp_path
+
+# Configuration
+DIRECTORY_PATH = os.path.join(CACHE_DIR, "slack_directory.json")
+DIRECTORY_TTL = int(os.environ.get('SLACK_DIRECTORY_TTL', str(24 * 60 * 60)))  # 1 day
+USERS_PAGE_SIZE = 200  # Slack's recommended users.list page size
+FUZZY_THRESHOLD = 0.6  # minimum trigram similarity for a fuzzy match
+FUZZY_MARGIN = 0.1     # how far the best fuzzy match must lead the runner-up
+
+EXACT_FIELDS = ('real_name', 'display_name', 'username')
+
+
+def normalize(name):
+    """Casefold a name and strip accents, punctuation and extra whitespace"""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = ''.join(ch if ch.isalnum() else ' ' for ch in stripped.casefold())
+    return ' '.join(cleaned.split())
+
+
+def trigrams(normalized):
+    """Character trigrams of a normalized name, padded so short names still index"""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _member_hash(member):
+    """Hash of the member fields the index is built from, summed into an order independent fingerprint"""
+    profile = member.get('profile') or {}
+    return int(hashlib.sha1(json.dumps([
+        member.get('id'), member.get('deleted'), member.get('is_bot'), member.get('real_name'),
+        member.get('name'), profile.get('display_name'), profile.get('real_name')
+    ]).encode('utf-8')).hexdigest(), 16)
+
+
+def fingerprint(members):
+    """Order independent fingerprint of the indexed fields of users.list members"""
+    return format(sum(_member_hash(member) for member in members) % (1 << 160), '040x')
+
+
+def iter_slack_members(page_size=USERS_PAGE_SIZE):
+    """Yield every member of the workspace, following users.list cursors"""
+    cursor = ''
+    while True:
+        params = {'limit': page_size}
+        if cursor:
+            params['cursor'] = cursor
+        result = slack_client.api_call('users.list', params=params)
+        yield from result.get('members') or []
+
+        cursor = (result.get('response_metadata') or {}).get('next_cursor')
+        if not cursor:
+            return
+
+
+class SlackDirectory:
+    """Name -> Slack user id lookups over one workspace snapshot"""
+
+    def __init__(self, users, exact, tokens, grams, fingerprint=None, fetched_at=0):
+        self.users = users        # id -> [real_name, display_name, username, trigram count]
+        self.exact = exact        # field -> normalized name -> [ids]
+        self.tokens = tokens      # token -> [ids]
+        self.grams = grams        # trigram -> [ids]
+        self.fingerprint = fingerprint
+        self.fetched_at = fetched_at
+        self.ambiguous = {}       # looked up name -> candidate ids
+
+    @classmethod
+    def build(cls, members, members_fingerprint=None):
+        """Index active human members from a list of users.list members"""
+        users = {}
+        exact = {field: {} for field in EXACT_FIELDS}
+        tokens = {}
+        grams = {}
+
+        for member in members:
+            if member.get('deleted') or member.get('is_bot') or member.get('id') == 'USLACKBOT':
+                continue
+            user_id = member['id']
+            profile = member.get('profile') or {}
+            real_name = (member.get('real_name') or profile.get('real_name') or '').strip()
+            display_name = (profile.get('display_name') or '').strip()
+            username = (member.get('name') or '').strip()
+
+            for field, value in zip(EXACT_FIELDS, (real_name, display_name, username)):
+                key = normalize(value)
+                if key:
+                    ids = exact[field].setdefault(key, [])
+                    if user_id not in ids:
+                        ids.append(user_id)
+
+            normalized = normalize(real_name or display_name)
+            for token in set(normalized.split()):
+                tokens.setdefault(token, []).append(user_id)
+            user_grams = trigrams(normalized) if normalized else set()
+            for gram in user_grams:
+                grams.setdefault(gram, []).append(user_id)
+
+            users[user_id] = [real_name, display_name, username, len(user_grams)]
+
+        return cls(users, exact, tokens, grams, members_fingerprint or fingerprint(members), time.time())
+
+    @classmethod
+    def load(cls, path=DIRECTORY_PATH):
+        """Load a persisted directory, or None if there is none"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data['users'], data['exact'], data['tokens'], data['grams'],
+                       data.get('fingerprint'), data.get('fetched_at', 0))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path=DIRECTORY_PATH):
+        """Write the directory to disk atomically"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = temp_path(path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fingerprint': self.fingerprint,
+                'fetched_at': self.fetched_at,
+                'users': self.users,
+                'exact': self.exact,
+                'tokens': self.tokens,
+                'grams': self.grams
+            }, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def label(self, user_id):
+        """Readable name for a user id"""
+        real_name, display_name, username = self.users[user_id][:3]
+        return real_name or display_name or username or user_id
+
+    def _exact(self, key):
+        """Ids matched exactly, trying real name, then display name, then username"""
+        for field in EXACT_FIELDS:
+            ids = self.exact[field].get(key)
+            if ids:
+                return ids
+        return []
+
+    def _by_tokens(self, key):
+        """Ids whose name contains every token of the lookup"""
+        candidates = None
+        for token in key.split():
+            ids = self.tokens.get(token)
+            if not ids:
+                return []
+            candidates = set(ids) if candidates is None else candidates & set(ids)
+            if not candidates:
+                return []
+        return sorted(candidates or ())
+
+    def _by_trigrams(self, key):
+        """Ids whose name is clearly the closest by trigram similarity"""
+        query = trigrams(key)
+        shared = Counter()
+        for gram in query:
+            shared.update(self.grams.get(gram, ()))
+        if not shared:
+            return []
+
+        scored = sorted(
+            ((hits / (len(query) + self.users[user_id][3] - hits), user_id) for user_id, hits in shared.items()),
+            reverse=True
+        )
+        best_score = scored[0][0]
+        if best_score < FUZZY_THRESHOLD:
+            return []
+        return [user_id for score, user_id in scored if best_score - score < FUZZY_MARGIN]
+
+    def find(self, name):
+        """Slack user id for a name, or None when there is no match or more than one"""
+        key = normalize(name)
+        if not key:
+            return None
+
+        for matcher in (self._exact, self._by_tokens, self._by_trigrams):
+            ids = matcher(key)
+            if len(ids) == 1:
+                return ids[0]
+            if ids:
+                self.ambiguous[name] = ids
+                return None
+        return None
+
+    def resolve_all(self, names):
+        """Resolve many names in one pass, returns ({name: user_id}, [unmatched names])"""
+        matched = {}
+        unmatched = []
+        for name in names:
+            user_id = self.find(name)
+            if user_id:
+                matched[name] = user_id
+            else:
+                unmatched.append(name)
+        return matched, unmatched
+
+    def report_ambiguous(self):
+        """Print every lookup that matched more than one Slack user"""
+        for name, ids in self.ambiguous.items():
+            candidates = ', '.join(f"{self.label(user_id)} ({user_id})" for user_id in ids[:5])
+            more = f" and {len(ids) - 5} more" if len(ids) > 5 else ""
+            print(f"  ⚠️ '{name}' matches several Slack users: {candidates}{more}")
+
+
+def get_directory(ttl=DIRECTORY_TTL, path=DIRECTORY_PATH):
+    """Slack directory from disk while it is younger than the TTL, otherwise refetched and reindexed if the members changed"""
+    cached = SlackDirectory.load(path)
+    if cached and ttl > 0 and time.time() - cached.fetched_at < ttl:
+        print(f"📦 Using cached Slack directory ({len(cached.users)} users)")
+        return cached
+
+    print("📋 Fetching all Slack users...")
+    members = list(iter_slack_members())
+    members_fingerprint = fingerprint(members)
+    if cached and cached.fingerprint == members_fingerprint:
+        # Nothing changed: keep the stored index and just mark it as checked
+        cached.fetched_at = time.time()
+        cached.save(path)
+        print(f"✅ Slack directory unchanged ({len(cached.users)} users)")
+        return cached
+
+    directory = SlackDirectory.build(members, members_fingerprint)
+    directory.save(path)
+    print(f"✅ Indexed {len(directory.users)} Slack users")
+    return directory
@@ -0,0 +1,112 @@
+"""
+Concurrent, rate limited Slack message dispatch
+Sends many messages from a small thread pool. chat.postMessage allows about one
+message per second per channel (each DM is its own channel), so every channel
+has its own token bucket, and a shared bucket keeps the total under the
+workspace-wide limit. Messages for the same channel go out in order on one
+worker, different channels in parallel. A 429 pauses that channel's bucket for
+its Retry-After, transient failures are retried with jittered backoff, and
+every message gets a DeliveryResult.
+"""
+
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+from slack_client import DeliveryResult, RetryableError, send_once
+
+# Configuration
+SEND_RATE = float(os.environ.get('SLACK_SEND_RATE', '10'))  # messages per second across all channels, under the workspace limit
+SEND_BURST = int(os.environ.get('SLACK_SEND_BURST', '20'))
+CHANNEL_RATE = float(os.environ.get('SLACK_CHANNEL_RATE', '1'))  # messages per second to one channel, chat.postMessage allows about 1
+CHANNEL_BURST = int(os.environ.get('SLACK_CHANNEL_BURST', '1'))
+SEND_WORKERS = int(os.environ.get('SLACK_SEND_WORKERS', '16'))
+MAX_RETRIES = 5
+MAX_BACKOFF = 30
+
+
+class TokenBucket:
+    """Thread safe token bucket that can be paused for a Retry-After"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for a while, and drop the burst so sending resumes gently"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+
+
+def _deliver(bucket, channel_bucket, send, recipient, payload):
+    """Send one message through its channel's bucket and the shared one, retrying transient failures"""
+    for attempt in range(1, MAX_RETRIES + 1):
+        channel_bucket.acquire()
+        bucket.acquire()
+        try:
+            return DeliveryResult(recipient, True, attempts=attempt, ts=send(recipient, payload))
+        except RetryableError as e:
+            if attempt == MAX_RETRIES:
+                return DeliveryResult(recipient, False, str(e), attempt)
+            instrumentation.count('slack_retries')
+            if e.retry_after is not None:
+                print(f"  ⏳ Rate limited, pausing sends to {recipient} for {e.retry_after:.0f}s")
+                channel_bucket.pause(e.retry_after)
+            else:
+                time.sleep(min(MAX_BACKOFF, 2 ** attempt) * random.uniform(0.5, 1.5))
+        except Exception as e:
+            return DeliveryResult(recipient, False, str(e), attempt)
+
+
+def dispatch(messages, send=send_once, rate=SEND_RATE, burst=SEND_BURST, workers=SEND_WORKERS, on_result=None,
+             channel_rate=CHANNEL_RATE, channel_burst=CHANNEL_BURST):
+    """Send (recipient, payload) pairs, in order per recipient, returns DeliveryResults in input order"""
+    messages = list(messages)
+    if not messages:
+        return []
+    bucket = TokenBucket(rate, burst)
+    results = [None] * len(messages)
+
+    # One ordered queue of message indexes per channel
+    queues = {}
+    for i, (recipient, _) in enumerate(messages):
+        queues.setdefault(recipient, []).append(i)
+
+    def run(indexes):
+        channel_bucket = TokenBucket(channel_rate, channel_burst)
+        for i in indexes:
+            result = _deliver(bucket, channel_bucket, send, *messages[i])
+            results[i] = result
+            if on_result:
+                on_result(result)
+
+    with instrumentation.span('send', messages=len(messages)), \
+            ThreadPoolExecutor(max_workers=max(1, min(workers, len(queues)))) as pool:
+        for future in [pool.submit(instrumentation.bind(run), indexes) for indexes in queues.values()]:
+            future.result()
+    return results
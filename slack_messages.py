@@ -0,0 +1,214 @@
+"""
+Message shaping for Slack posts
+Coalesces a run's per-person messages into one Block Kit message (or a parent
+post with threaded replies) so busy days cost one API call instead of one per
+person, builds long reports section by section, and splits anything over
+Slack's block and character limits into follow-up messages in the same thread.
+"""
+
+import os
+
+from instrumentation import span
+from slack_client import post_message, DeliveryResult
+from slack_dispatcher import dispatch
+from run_ledger import skipped
+
+# Configuration
+COALESCE_MODE = os.environ.get('SLACK_COALESCE', 'off')  # off, blocks or thread
+MAX_BLOCKS = 50             # Slack's limit per message
+MAX_SECTION_CHARS = 3000    # Slack's limit per section block
+MAX_HEADER_CHARS = 150      # Slack's limit per header block
+MAX_MESSAGE_CHARS = 12000   # keep well under the 40k text limit so nothing is truncated
+MAX_REPORT_CHARS = int(os.environ.get('SLACK_REPORT_CHARS', '3900'))  # Slack's recommended text length
+CONTINUED = "_(continued)_\n\n"
+
+
+def split_text(text, limit):
+    """Split text into pieces of at most limit chars, preferring paragraph, then line, then word boundaries"""
+    pieces = []
+    while len(text) > limit:
+        cut = -1
+        for separator in ("\n\n", "\n", " "):
+            cut = text.rfind(separator, 0, limit)
+            if cut > 0:
+                break
+        if cut <= 0:
+            cut = limit
+        pieces.append(text[:cut].rstrip())
+        text = text[cut:].lstrip("\n ")
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def header_block(title):
+    """Block Kit header block"""
+    return {"type": "header", "text": {"type": "plain_text", "text": title[:MAX_HEADER_CHARS], "emoji": True}}
+
+
+def section_blocks(text):
+    """Block Kit section blocks for mrkdwn text, split to fit the per-section limit"""
+    return [{"type": "section", "text": {"type": "mrkdwn", "text": piece}}
+            for piece in split_text(text, MAX_SECTION_CHARS)]
+
+
+def chunk_blocks(block_groups, max_blocks=MAX_BLOCKS, max_chars=MAX_MESSAGE_CHARS):
+    """Pack groups of blocks that belong together into messages within the block and size limits,
+    returns [(blocks, [group indexes])]"""
+    chunks = []
+    blocks, members, chars = [], [], 0
+    for i, group in enumerate(block_groups):
+        size = sum(len(block.get('text', {}).get('text', '')) for block in group)
+        # A divider separates groups inside one message
+        needed = len(group) + (1 if blocks else 0)
+        if blocks and (len(blocks) + needed > max_blocks or chars + size > max_chars):
+            chunks.append((blocks, members))
+            blocks, members, chars = [], [], 0
+        if blocks:
+            blocks.append({"type": "divider"})
+        blocks.extend(group)
+        members.append(i)
+        chars += size
+    if blocks:
+        chunks.append((blocks, members))
+    return chunks
+
+
+def post_chunks(channel, messages, ledger=None):
+    """Post message payloads in order, the first as the parent and the rest as its thread replies,
+    skipping any the ledger already has"""
+    with span('send', messages=len(messages)):
+        return _post_chunks(channel, messages, ledger)
+
+
+def _post_chunks(channel, messages, ledger):
+    results = []
+    thread_ts = None
+    for message in messages:
+        entry = ledger.get(channel, message) if ledger else None
+        if entry:
+            result = skipped(channel, entry)
+        else:
+            result = post_message(channel, dict(message, thread_ts=thread_ts) if thread_ts else message)
+            if ledger:
+                ledger.record(channel, message, result)
+        results.append(result)
+        if thread_ts is None:
+            if not result.ok:
+                # Without a parent the replies would land unthreaded, stop here
+                results.extend(DeliveryResult(channel, False, "parent post failed", 0)
+                               for _ in messages[len(results):])
+                break
+            thread_ts = result.ts
+    return results
+
+
+def post_coalesced(channel, title, texts, mode=None, ledger=None, keys=None):
+    """Post a run's messages individually, as one Block Kit message, or as a parent with thread replies,
+    returns one DeliveryResult per text. With a ledger, texts whose key (default the text) already went
+    out are skipped and the rest recorded."""
+    mode = mode or COALESCE_MODE
+    with span('send', messages=len(texts)):
+        if not ledger:
+            return _post_coalesced(channel, title, texts, mode)
+        return _post_coalesced_once(channel, title, texts, mode, ledger, keys)
+
+
+def _post_coalesced_once(channel, title, texts, mode, ledger, keys):
+    keys = keys or texts
+    results = [None] * len(texts)
+    pending = []
+    for i, key in enumerate(keys):
+        entry = ledger.get(channel, key)
+        if entry:
+            results[i] = skipped(channel, entry)
+        else:
+            pending.append(i)
+    if len(pending) < len(texts):
+        print(f"⏭️ {len(texts) - len(pending)} message(s) already posted in this run period, skipping them")
+
+    for i, result in zip(pending, _post_coalesced(channel, title, [texts[i] for i in pending], mode)):
+        ledger.record(channel, keys[i], result)
+        results[i] = result
+    return results
+
+
+def _post_coalesced(channel, title, texts, mode):
+    if not texts:
+        return []
+
+    if mode == 'blocks':
+        groups = [section_blocks(text) for text in texts]
+        groups[0] = [header_block(title)] + groups[0]
+        chunks = chunk_blocks(groups)
+        payloads = [{"text": title, "blocks": blocks} for blocks, _ in chunks]
+        if len(payloads) > 1:
+            print(f"  Splitting {len(texts)} messages into {len(payloads)} posts to stay within Slack's limits")
+        results = [None] * len(texts)
+        for (_, members), result in zip(chunks, post_chunks(channel, payloads)):
+            for i in members:
+                results[i] = result
+        return results
+
+    if mode == 'thread':
+        parent = post_message(channel, {"text": title, "blocks": [header_block(title)]})
+        if not parent.ok:
+            return [parent] * len(texts)
+        return dispatch([(channel, {"text": text, "thread_ts": parent.ts}) for text in texts])
+
+    return [post_message(channel, text) for text in texts]
+
+
+class ReportBuilder:
+    """A long text report kept as a list of sections, split on section boundaries when posted"""
+
+    def __init__(self, limit=MAX_REPORT_CHARS):
+        self.limit = limit
+        self.sections = []
+
+    def section(self, text=""):
+        """Start a new section, optionally with its first text"""
+        self.sections.append([text] if text else [])
+        return self
+
+    def write(self, text):
+        """Append text to the current section"""
+        if not self.sections:
+            self.sections.append([])
+        self.sections[-1].append(text)
+        return self
+
+    def messages(self):
+        """Pack sections into as few messages as fit the limit, splitting oversized sections by line"""
+        with span('render'):
+            return self._messages()
+
+    def _messages(self):
+        budget = self.limit - len(CONTINUED)
+        messages = []
+        current = []
+        size = 0
+        for parts in self.sections:
+            text = "".join(parts)
+            if not text:
+                continue
+            pieces = [text]
+            if len(text) > budget:
+                pieces = split_text(text, budget - 1)
+                pieces = [piece + "\n" for piece in pieces[:-1]] + pieces[-1:]
+            for piece in pieces:
+                if current and size + len(piece) > budget:
+                    messages.append("".join(current).rstrip())
+                    current, size = [], 0
+                current.append(piece)
+                size += len(piece)
+        if current:
+            messages.append("".join(current).rstrip())
+        return [message if i == 0 else CONTINUED + message for i, message in enumerate(messages)]
+
+    def post(self, channel, ledger=None):
+        """Post the report, follow-up messages as replies in the first message's thread"""
+        messages = self.messages()
+        if len(messages) > 1:
+            print(f"  Report is {sum(len(m) for m in messages)} chars, posting it as {len(messages)} messages")
+        return post_chunks(channel, [{"text": message} for message in messages], ledger)
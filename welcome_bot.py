@@ -1,170 +1,60 @@
-import os
-import json
-import urllib.request
-import urllib.parse
 from datetime import datetime, timezone, timedelta
 
+from board_sync import iter_group_items
+from board_cache import resolve_groups, is_active_group
+from employees import EmployeeSchema
+from slack_messages import post_coalesced
+from run_ledger import RunLedger
+from instrumentation import run_report, span, timed
+from bot_log import get_logger, sampled, dump_item
+
 # Configuration
-MONDAY_API_TOKEN = os.environ.get('MONDAY_API_TOKEN')
-SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
 BOARD_ID = "6329303796"
 SLACK_CHANNEL = "general"
 
-def parse_date_to_iso(date_str):
-    """Convert various date formats to YYYY-MM-DD"""
-    if not date_str:
-        return ""
-    
-    # Try different date formats
-    formats = [
-        '%Y-%m-%d',           # 2025-11-05
-        '%b %d, %Y',          # Nov 5, 2025
-        '%B %d, %Y',          # November 5, 2025
-        '%m/%d/%Y',           # 11/5/2025
-        '%d/%m/%Y',           # 05/11/2025
-        '%Y/%m/%d',           # 2025/11/05
-        '%b %d',              # Nov 5 (assumes current year)
-    ]
-    
-    for fmt in formats:
-        try:
-            parsed_date = datetime.strptime(date_str.strip(), fmt)
-            return parsed_date.strftime('%Y-%m-%d')
-        except ValueError:
-            continue
-    
-    print(f"      ⚠️ Could not parse date: {date_str}")
-    return ""  # Return empty if no format matches
-
-def query_monday(query):
-    """Query Monday.com API"""
-    url = "https://api.monday.com/v2"
-    headers = {
-        "Authorization": MONDAY_API_TOKEN,
-        "Content-Type": "application/json"
-    }
-    data = json.dumps({"query": query}).encode('utf-8')
-    
-    req = urllib.request.Request(url, data=data, headers=headers)
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read().decode('utf-8'))
+log = get_logger('welcome_bot')
 
-def post_to_slack(message):
-    """Post message to Slack"""
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {
-        "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "channel": SLACK_CHANNEL,
-        "text": message,
-        "unfurl_links": False
-    }
-    
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode('utf-8'),
-        headers=headers
-    )
-    
-    with urllib.request.urlopen(req) as response:
-        result = json.loads(response.read().decode('utf-8'))
-        return result.get("ok")
+# Columns read from the employee board
+WELCOME_COLUMNS = {
+    'position': lambda col: 'position' in col['id'].lower() or 'role' in col['id'].lower(),
+    'project': lambda col: 'project' in col['id'].lower() or 'client' in col['id'].lower(),
+    'start_date': lambda col: ('adaca' in col['id'].lower() or 'start' in col['id'].lower()) and 'date' in col['id'].lower()
+}
 
+@timed('fetch')
 def get_employees_from_groups():
     """Get all employees from Active Employees and Active - Non billable groups"""
     print("👋 Fetching employees from Monday.com...")
     
-    query = f'''
-    {{
-      boards(ids: {BOARD_ID}) {{
-        groups {{
-          id
-          title
-          items_page(limit: 500) {{
-            cursor
-            items {{
-              name
-              column_values {{
-                id
-                text
-                value
-              }}
-            }}
-          }}
-        }}
-      }}
-    }}
-    '''
-    
-    result = query_monday(query)
+    schema = EmployeeSchema.for_board(BOARD_ID, WELCOME_COLUMNS, date_fields=('start_date',))
     all_employees = []
+    seen_groups = set()
     
-    if result.get('data') and result['data'].get('boards'):
-        groups = result['data']['boards'][0]['groups']
+    group_ids = resolve_groups(BOARD_ID, is_active_group)
+    if not group_ids:
+        return all_employees
+    
+    for group, item in iter_group_items(BOARD_ID, schema.item_fields(), group_ids=group_ids):
+        if group['id'] not in seen_groups:
+            seen_groups.add(group['id'])
+            print(f"  Checking group: {group['title']}")
+        
+        emp = schema.parse(item, group)
+        if not emp.name:
+            continue
         
-        for group in groups:
-            group_title = group.get('title', '').lower()
-            
-            # Include both "Active Employees" and "Active - Non billable" groups
-            if ('active' in group_title and 'employee' in group_title) or \
-               ('active' in group_title and 'non' in group_title and 'billable' in group_title):
-                
-                items = group['items_page']['items']
-                group_name = group.get('title', '')
-                print(f"  Checking group: {group_name}")
-                
-                for item in items:
-                    name = item.get('name', '').strip()
-                    position = ""
-                    project = ""
-                    start_date = ""
-                    
-                    print(f"    Processing: {name}")
-                    
-                    for col in item['column_values']:
-                        col_id = col.get('id', '').lower()
-                        col_text = (col.get('text') or '').strip()
-                        col_value = col.get('value') or ''
-                        
-                        # Debug: print all columns
-                        if col_text:
-                            print(f"      Column {col_id}: {col_text}")
-                        
-                        # Get position
-                        if 'position' in col_id or 'role' in col_id:
-                            position = col_text
-                        
-                        # Get project/client name
-                        elif 'project' in col_id or 'client' in col_id:
-                            project = col_text
-                        
-                        # Get start date
-                        elif ('adaca' in col_id or 'start' in col_id) and 'date' in col_id:
-                            start_date = col_text
-                            if not start_date and col_value:
-                                try:
-                                    value_obj = json.loads(col_value)
-                                    if 'date' in value_obj:
-                                        start_date = value_obj['date']
-                                except:
-                                    pass
-                            
-                            # Convert date to ISO format (YYYY-MM-DD)
-                            if start_date:
-                                start_date = parse_date_to_iso(start_date)
-                    
-                    if name:
-                        print(f"      -> Name: {name}, Position: {position}, Project: {project}, Start Date: {start_date}")
-                        all_employees.append({
-                            'name': name,
-                            'position': position,
-                            'project': project,
-                            'start_date': start_date
-                        })
+        if emp['start_date'] and not emp.date('start_date'):
+            log.warning("      ⚠️ Could not parse date for %s: %s", emp.name, emp['start_date'],
+                        extra=sampled('unparseable start date'))
         
-        print(f"✅ Found {len(all_employees)} total employees")
+        dump_item(f"    -> {emp.name}", [
+            ('Position', emp['position']),
+            ('Project', emp['project']),
+            ('Start Date', emp['start_date'], emp.date('start_date'))
+        ])
+        all_employees.append(emp)
+    
+    print(f"✅ Found {len(all_employees)} total employees")
     
     return all_employees
 
@@ -176,15 +66,14 @@ def find_buddy(new_hire_project, new_hire_start_date, all_employees):
     # Filter employees on same project
     same_project = [emp for emp in all_employees 
                    if emp['project'] == new_hire_project 
-                   and emp['start_date'] != new_hire_start_date
-                   and emp['start_date']]
+                   and emp.date('start_date') != new_hire_start_date
+                   and emp.date('start_date')]
     
     if not same_project:
         return None
     
-    # Sort by start date (earliest first) and return the person who's been there longest
-    same_project.sort(key=lambda x: x['start_date'])
-    return same_project[0]['name'] if same_project else None
+    # Return the person who's been there longest (earliest start date)
+    return min(same_project, key=lambda emp: emp.date('start_date')).name
 
 def check_new_hires():
     """Check for new hires starting today"""
@@ -192,16 +81,16 @@ def check_new_hires():
     
     # Get today's date in Manila timezone
     manila_tz = timezone(timedelta(hours=8))
-    today = datetime.now(manila_tz)
-    today_str = today.strftime('%Y-%m-%d')
+    today = datetime.now(manila_tz).date()
     print(f"Today is: {today.strftime('%B %d, %Y')} (Manila time)")
-    print(f"Looking for start date: {today_str}")
+    print(f"Looking for start date: {today.isoformat()}")
     
     # Get all employees
     all_employees = get_employees_from_groups()
     
     # Find new hires (start date is today)
-    new_hires = [emp for emp in all_employees if emp['start_date'] == today_str]
+    with span('match'):
+        new_hires = [emp for emp in all_employees if emp.date('start_date') == today]
     
     if not new_hires:
         print("ℹ️ No new hires starting today")
@@ -209,15 +98,16 @@ def check_new_hires():
     
     print(f"🎉 Found {len(new_hires)} new hire(s) starting today!")
     
-    # Post welcome message for each new hire
+    # Build a welcome message for each new hire
+    messages = []
     for hire in new_hires:
-        name = hire['name']
+        name = hire.name
         position = hire['position'] or 'Team Member'
         project = hire['project'] or 'Multiple Projects'
-        start_date = datetime.strptime(hire['start_date'], '%Y-%m-%d').strftime('%B %d, %Y')
+        start_date = hire.date('start_date').strftime('%B %d, %Y')
         
         # Find buddy
-        buddy = find_buddy(hire['project'], hire['start_date'], all_employees)
+        buddy = find_buddy(hire['project'], hire.date('start_date'), all_employees)
         
         # Build welcome message
         message = f"🎉 *Welcome to Adaca, {name}!* 🎉\n\n"
@@ -231,12 +121,20 @@ def check_new_hires():
         
         message += "📚 Check out <#company-wiki> for all the essentials to get you started!\n\n"
         message += "Welcome aboard! We're excited to see what you'll accomplish here! 🚀"
-        
-        # Post to Slack
-        if post_to_slack(message):
-            print(f"✅ Posted welcome message for {name}")
+        messages.append(message)
+    
+    # Post to Slack, one post per new hire unless coalescing is on, skipping any already welcomed today
+    title = f"👋 Welcome to our new hires starting {today.strftime('%B %d')}!"
+    ledger = RunLedger('welcome_bot')
+    keys = [f"welcome:{hire.item_id}" for hire in new_hires]
+    for hire, result in zip(new_hires, post_coalesced(SLACK_CHANNEL, title, messages, ledger=ledger, keys=keys)):
+        if not result.attempts:
+            continue
+        if result:
+            print(f"✅ Posted welcome message for {hire.name}")
         else:
-            print(f"❌ Failed to post welcome message for {name}")
+            print(f"❌ Failed to post welcome message for {hire.name}")
 
 if __name__ == "__main__":
-    check_new_hires()
+    with run_report('welcome_bot'):
+        check_new_hires()